@@ -0,0 +1,314 @@
+"""
+Seeded synthetic data for benchmarks, written to a scratch copy of the farmbot.db schema.
+
+    from benchmarks.dataset import generate_dataset
+    manager = generate_dataset("/tmp/bench.db", volumes={"Parts": 50000}, depth=12)
+
+Every table draws from its own random stream seeded with (seed, table), so
+the same seed always produces the same rows. Changing the volume of one
+table does not reshuffle the others. Assemblies form a tree of `depth`
+levels under the ROOT_ASSEMBLY_ID placeholder. Each assembly names its parent
+both in Assemblies.ParentAssemblyID and in an Assemblies_Parts 'Assembly'
+link, and has a few Assemblies_Parts 'Part' rows.
+"""
+import os
+import random
+import sqlite3
+from contextlib import closing
+from datetime import date, timedelta
+
+from config.config_data import BENCHMARK_DEPTH, BENCHMARK_IMAGE_BYTES, BENCHMARK_SEED, BENCHMARK_VOLUMES, ROOT_ASSEMBLY_ID
+from core.journal import GROUP_TABLE, JOURNAL_TABLE
+from domain.hierarchy import CLOSURE_TABLE
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Database whose schema the scratch database copies
+SCHEMA_SOURCE = os.path.join(PROJECT_ROOT, "farmbot.db")
+
+# Tables the application creates itself at startup (ensure_closure, ensure_journal)
+APPLICATION_TABLES = {CLOSURE_TABLE, GROUP_TABLE, JOURNAL_TABLE}
+
+ADJECTIVES = ["steel", "aluminium", "brass", "nylon", "threaded", "slotted", "flanged", "hex", "linear", "angled", "sealed", "heavy"]
+NOUNS = ["bolt", "nut", "washer", "bracket", "plate", "rail", "bearing", "pulley", "belt", "motor", "sensor", "spacer", "hinge", "clamp", "shaft"]
+MAKERS = ["Acme", "Boltworks", "Cascade", "Delta Supply", "Evergreen", "Fastenal", "Gantry Co", "Helix", "Igus", "Jinan Parts"]
+MATERIALS = ["Steel", "Stainless", "Aluminium", "Brass", "PLA", "PETG", "Nylon", "Rubber", "Copper"]
+UNITS = ["Each", "Pack of 10", "Pack of 100", "Metre", "Kilogram"]
+PROCUREMENT_TYPES = ["Purchase", "Manufacture", "Hybrid"]
+FOCUS = ["Low", "Medium", "High"]
+STATUSES = ["Draft", "Released", "Obsolete"]
+DRAWING_TYPES = ["Part", "Assembly", "Schematic"]
+
+# Dates of the generated rows are days after this one
+EPOCH = date(2024, 1, 1)
+
+
+def copy_schema(source, connection):
+    """
+    Creates the tables and indexes of a database file in connection, without any rows.
+
+    Full-text indexes, triggers and the application's own tables are left
+    out; ensure_closure, ensure_search_index and ensure_journal make them.
+
+    Args:
+        source (str): Database file to copy the schema from (opened read-only).
+        connection (sqlite3.Connection): Empty database to create the schema in.
+    """
+    with closing(sqlite3.connect(f"file:{source}?mode=ro", uri=True)) as source_connection:
+        entries = source_connection.execute(
+            "SELECT type, tbl_name, sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite!_%' ESCAPE '!' "
+            "ORDER BY type != 'table', rowid"
+        ).fetchall()
+    virtual = [table for entry_type, table, sql in entries if sql.upper().startswith("CREATE VIRTUAL")]
+    for entry_type, table, sql in entries:
+        if entry_type not in ("table", "index") or table in APPLICATION_TABLES:
+            continue
+        # FTS5 keeps its rows in shadow tables named after the virtual table
+        if any(table == name or table.startswith(f"{name}_") for name in virtual):
+            continue
+        connection.execute(sql)
+    connection.commit()
+
+
+class SyntheticDataset:
+    """
+    Generates the rows of each benchmark table as dicts keyed by column name.
+
+    Attributes:
+        volumes (dict): Table -> rows to generate (see BENCHMARK_VOLUMES).
+        depth (int): Levels of the assembly hierarchy.
+        seed (int): Random seed.
+        image_bytes (int): Size of each generated image.
+    """
+
+    def __init__(self, volumes=None, depth=BENCHMARK_DEPTH, seed=BENCHMARK_SEED, image_bytes=BENCHMARK_IMAGE_BYTES):
+        self.volumes = dict(BENCHMARK_VOLUMES, **(volumes or {}))
+        self.depth = max(1, depth)
+        self.seed = seed
+        self.image_bytes = image_bytes
+
+    def random(self, stream):
+        """ Returns a random generator that depends only on the seed and the stream name. """
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _date(self, rng):
+        return (EPOCH + timedelta(days=rng.randrange(730))).isoformat()
+
+    def _reference(self, rng, table, share=1.0):
+        """ A random key of table (keys are 1..volume), or None for the other 1 - share of rows. """
+        count = self.volumes.get(table, 0)
+        if not count or rng.random() >= share:
+            return None
+        return rng.randint(1, count)
+
+    def drawings(self):
+        rng = self.random("Drawings")
+        for drawing_id in range(1, self.volumes.get("Drawings", 0) + 1):
+            yield {
+                "DrawingID": drawing_id,
+                "DrawingName": f"DWG-{drawing_id:06d}",
+                "DrawingPath": f"drawings/{drawing_id // 1000:03d}/DWG-{drawing_id:06d}.pdf",
+                "Type": rng.choice(DRAWING_TYPES),
+                "Date": self._date(rng),
+                "Size": rng.randint(20_000, 5_000_000),
+                "Status": rng.choice(STATUSES),
+                "Revision": rng.randint(0, 9),
+                "RelatedItemID": None,
+            }
+
+    def parts(self, start=1, count=None, stream="Parts"):
+        """
+        Yields Parts rows.
+
+        Args:
+            start (int): PartID of the first row.
+            count (int, optional): Rows to generate. Defaults to the Parts volume.
+            stream (str): Random stream; use another one for rows that should differ from the table's.
+        """
+        rng = self.random(stream)
+        count = self.volumes.get("Parts", 0) if count is None else count
+        for part_id in range(start, start + count):
+            adjective, noun, maker = rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(MAKERS)
+            yield {
+                "PartID": part_id,
+                "PartName": f"{adjective.title()} {noun} {part_id}",
+                "Model": f"{noun[:3].upper()}-{rng.randint(100, 9999)}",
+                "Make": maker,
+                "Dimensions": f"{rng.randint(2, 500)}x{rng.randint(2, 500)}x{rng.randint(1, 100)} mm",
+                "Notes": f"{adjective} {noun} for the {rng.choice(NOUNS)} {rng.choice(['mount', 'frame', 'gantry', 'bed'])}",
+                "Manufacturer": maker,
+                "ImageRef": None,
+                "DrawingID": self._reference(rng, "Drawings", share=0.8),
+                "ManPartNum": f"{maker[:2].upper()}{rng.randint(10000, 99999)}",
+                "ProcurementType": rng.choice(PROCUREMENT_TYPES),
+                "PartWeight": round(rng.uniform(0.001, 25.0), 3),
+                "PartMaterial": rng.choice(MATERIALS),
+            }
+
+    def suppliers(self):
+        rng = self.random("Suppliers")
+        for supplier_id in range(1, self.volumes.get("Suppliers", 0) + 1):
+            maker = rng.choice(MAKERS)
+            yield {
+                "SupplierID": supplier_id,
+                "SupplierName": rng.choice(MAKERS),
+                "PartID": self._reference(rng, "Parts"),
+                "UnitOfOrder": rng.choice(UNITS),
+                "PricePerUnit": round(rng.uniform(0.05, 400.0), 2),
+                "WebRef": f"https://example.com/catalogue/{supplier_id}",
+                "Manuf": maker,
+                "ManPartNum": f"{maker[:2].upper()}{rng.randint(10000, 99999)}",
+            }
+
+    def images(self):
+        rng = self.random("Images")
+        for image_id in range(1, self.volumes.get("Images", 0) + 1):
+            yield {
+                "ImageID": image_id,
+                "ImageName": f"{rng.choice(NOUNS)}_{image_id}.png",
+                "ImageData": rng.randbytes(self.image_bytes),
+            }
+
+    def assembly_levels(self):
+        """
+        Returns the AssemblyIDs of each hierarchy level, top level first.
+
+        IDs run from 1, skipping ROOT_ASSEMBLY_ID, and fill the levels in order.
+        """
+        count = self.volumes.get("Assemblies", 0)
+        ids = [assembly_id for assembly_id in range(1, count + 2) if assembly_id != ROOT_ASSEMBLY_ID][:count]
+        depth = min(self.depth, count) or 1
+        levels = [[] for _ in range(depth)]
+        for index, assembly_id in enumerate(ids):
+            levels[index * depth // count].append(assembly_id)
+        return levels
+
+    def assembly_parents(self):
+        """ Returns AssemblyID -> parent AssemblyID (ROOT_ASSEMBLY_ID for the top level). """
+        rng = self.random("Hierarchy")
+        parents = {}
+        above = [ROOT_ASSEMBLY_ID]
+        for level in self.assembly_levels():
+            for assembly_id in level:
+                parents[assembly_id] = rng.choice(above)
+            above = level
+        return parents
+
+    def assemblies(self):
+        rng = self.random("Assemblies")
+        created = self._date(rng)
+        yield {"AssemblyID": ROOT_ASSEMBLY_ID, "AssemName": "Root", "ParentAssemblyID": ROOT_ASSEMBLY_ID,
+               "AssemDwgID": None, "AssemHoursAssembly": 0, "AssemFocus": "Medium", "AssemStatus": "Released",
+               "AssemNotes": None, "CreationDate": created, "LastUpdatedDate": created}
+        for assembly_id, parent_id in self.assembly_parents().items():
+            created = self._date(rng)
+            yield {
+                "AssemblyID": assembly_id,
+                "AssemName": f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} assembly {assembly_id}",
+                "ParentAssemblyID": parent_id,
+                "AssemDwgID": self._reference(rng, "Drawings", share=0.5),
+                "AssemHoursAssembly": round(rng.uniform(0, 4), 2),
+                "AssemFocus": rng.choice(FOCUS),
+                "AssemStatus": rng.choice(STATUSES),
+                "AssemNotes": f"Builds the {rng.choice(NOUNS)} {rng.choice(['mount', 'frame', 'gantry', 'bed'])}",
+                "CreationDate": created,
+                "LastUpdatedDate": created,
+            }
+
+    def assembly_links(self):
+        """ Yields Assemblies_Parts rows: a few parts per assembly, and one link from each assembly to its parent. """
+        rng = self.random("Assemblies_Parts")
+        link = {"ParentAssemblyID": None, "PartID": None, "HoursParts": 0, "HoursAssembly": 0, "deleteFlag": 0}
+        for assembly_id, parent_id in self.assembly_parents().items():
+            for _ in range(rng.randint(2, 6) if self.volumes.get("Parts") else 0):
+                yield dict(link, EntityType="Part", ProcurementType=rng.choice(PROCUREMENT_TYPES), AssemblyID=assembly_id,
+                           PartID=self._reference(rng, "Parts"), Quantity=rng.randint(1, 10),
+                           HoursParts=round(rng.uniform(0, 2), 2), AssemFocus=rng.choice(FOCUS))
+            if parent_id != ROOT_ASSEMBLY_ID:
+                yield dict(link, EntityType="Assembly", ProcurementType="Manufacture", ParentAssemblyID=parent_id,
+                           AssemblyID=assembly_id, Quantity=rng.randint(1, 3),
+                           HoursAssembly=round(rng.uniform(0, 1), 2), AssemFocus=rng.choice(FOCUS))
+
+    def tables(self):
+        """ Returns (table, rows) pairs in insert order. """
+        return [
+            ("Drawings", self.drawings()),
+            ("Parts", self.parts()),
+            ("Suppliers", self.suppliers()),
+            ("Images", self.images()),
+            ("Assemblies", self.assemblies()),
+            ("Assemblies_Parts", self.assembly_links()),
+        ]
+
+
+def insert_rows(manager, table, rows):
+    """
+    Inserts row dicts with execute_many; every row must have the same keys.
+
+    Returns:
+        int: Rows inserted.
+
+    Raises:
+        RuntimeError: If any row was rejected.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    columns = list(first)
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(f':{col}' for col in columns)})"
+
+    def all_rows():
+        yield first
+        yield from rows
+
+    result = manager.execute_many(query, all_rows(), debug=False)
+    if result["failed"]:
+        index, params, error = result["failed"][0]
+        raise RuntimeError(f"{len(result['failed'])} {table} rows were rejected, e.g. row {index}: {error}")
+    return result["succeeded"]
+
+
+def generate_dataset(path, dataset=None, schema=SCHEMA_SOURCE):
+    """
+    Creates a scratch database with the farmbot.db schema and fills it with synthetic rows.
+
+    The application's startup steps run afterwards, so the closure table,
+    search indexes and undo journal are in place as they would be in the app.
+
+    Args:
+        path (str): New database file. It must not exist yet.
+        dataset (SyntheticDataset, optional): What to generate. Defaults to BENCHMARK_VOLUMES.
+        schema (str): Database file whose schema is copied.
+
+    Returns:
+        DatabaseTransactionManager: Manager of the new database; close it when done.
+
+    Raises:
+        FileExistsError: If path exists, so a real database is never overwritten.
+    """
+    from core.database_transactions import DatabaseTransactionManager
+    from core.journal import ensure_journal
+    from core.search import ensure_search_index
+    from domain.hierarchy import ensure_closure
+
+    if os.path.exists(path):
+        raise FileExistsError(f"Refusing to overwrite {path}; benchmarks need a new scratch database.")
+    dataset = dataset or SyntheticDataset()
+
+    manager = DatabaseTransactionManager(path)
+    try:
+        with manager.pool.writer_connection():
+            copy_schema(schema, manager.connection)
+        manager.use_pragma_profile("bulk-load")
+        for table, rows in dataset.tables():
+            insert_rows(manager, table, rows)
+        manager.use_pragma_profile("interactive")
+
+        ensure_closure(manager, debug=False)
+        ensure_search_index(manager, debug=False)
+        ensure_journal(manager, debug=False)
+    except Exception:
+        manager.close()
+        raise
+    return manager
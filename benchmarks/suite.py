@@ -0,0 +1,478 @@
+"""
+Headless benchmark suite for the data layer, run on a seeded synthetic database.
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --parts 50000 --depth 12 --output after.json --compare before.json
+
+Each run fills a new scratch database with the farmbot.db schema (see
+benchmarks.dataset). It then times the code paths behind the UI, each once to
+warm up and then --repeat times:
+
+    query_generator   building (cold) and looking up (cached) every context's queries
+    fetch             a datasheet load: the fetch query streamed as the background loader does
+    page              walking a table page by page with KeysetPager
+    sort              client-side multi-column sort, and the sorted key query of the virtual datasheet
+    fk                batch foreign key validation, with cold and cached key sets
+    hierarchy, bom    closure lookups and rebuild, and full BOM rollups over the deep hierarchy
+    crud              a journaled add, edit and delete with rollups, as the data entry forms do them
+    import            a CSV file through core.importer
+
+The results are printed (or written) as JSON, keyed by case name, together
+with the dataset parameters, the git commit and the hottest statements from
+core.metrics. A case that fails is reported with its error instead of
+timings, and one that cannot run on the schema as skipped. --compare prints
+the change in median time against an earlier run and exits with 1 if any
+case got slower than --threshold allows.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from config.config_data import (
+    BENCHMARK_DEPTH, BENCHMARK_IMAGE_BYTES, BENCHMARK_IMPORT_ROWS, BENCHMARK_REPEAT, BENCHMARK_SEED,
+    BENCHMARK_VOLUMES, COLUMN_DEFINITIONS, PAGE_SIZE, ROOT_ASSEMBLY_ID,
+)
+from benchmarks.dataset import PROJECT_ROOT, SCHEMA_SOURCE, SyntheticDataset, generate_dataset
+from core.config_utils import get_primary_key, is_list_column
+
+# Version of the result format
+RESULT_FORMAT = 1
+
+# Multi-column sorts to time, per context
+SORT_KEYS = {
+    "Parts": [("Make", "ASC"), ("PartWeight", "DESC")],
+    "Suppliers": [("SupplierName", "ASC"), ("PricePerUnit", "DESC")],
+    "Assemblies": [("AssemStatus", "ASC"), ("AssemName", "ASC")],
+}
+
+# Rollup input bumped by the edit of each CRUD round trip
+CRUD_EDITS = {"Parts": "PartWeight", "Suppliers": "PricePerUnit", "Assemblies": "AssemHoursAssembly"}
+
+# Contexts whose foreign keys are validated in batches
+FK_CONTEXTS = ["Parts", "Suppliers"]
+
+# Cached query_generator lookups per timed run
+CACHED_LOOKUPS = 1000
+
+
+class SkipCase(Exception):
+    """ Raised by a case's setup when the case cannot run on this schema. """
+
+
+def measure(func, repeat=BENCHMARK_REPEAT, warmup=1, ops=1):
+    """
+    Times a callable.
+
+    Args:
+        func (callable): The work to time. An int it returns is reported as "rows".
+        repeat (int): Timed runs.
+        warmup (int): Untimed runs first.
+        ops (int): Operations per run, for ops_per_second.
+
+    Returns:
+        dict: runs, min_ms, median_ms, mean_ms, max_ms, ops, ops_per_second and rows.
+    """
+    for _ in range(warmup):
+        func()
+    times, rows = [], None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+        if isinstance(result, int) and not isinstance(result, bool):
+            rows = result
+    median = statistics.median(times)
+    return {
+        "runs": len(times),
+        "min_ms": min(times) * 1000,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.fmean(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "ops": ops,
+        "ops_per_second": ops / median if median else None,
+        "rows": rows,
+    }
+
+
+def form_record(context, row):
+    """ Turns a generated row into data entry form values: every list column as text, no primary key. """
+    primary_key = get_primary_key(context)
+    return {
+        col: "" if row.get(col) is None else str(row[col])
+        for col, details in COLUMN_DEFINITIONS[context]["columns"].items()
+        if is_list_column(details) and col != primary_key
+    }
+
+
+def crud_round_trip(context, record, manager):
+    """
+    Adds, edits and deletes one row the way the data entry forms do.
+
+    Each step validates and runs the query_generator query in its own
+    journaled action, with the rollups it affects. The main-thread reads
+    of the forms are included: the old row before the edit, and the
+    refresh_rows read of the row after the add and the edit.
+
+    Args:
+        context (str): The context (e.g., "Parts").
+        record (dict): Form values (see form_record).
+        manager (DatabaseTransactionManager): The scratch database.
+    """
+    from core.database_utils import delete_saved_item, fetch_item, save_new_item
+    from core.journal import journaled
+    from core.query_builder import generate_fetch_query_parts, query_generator
+    from domain.bom import recalculate_for_edit
+    from forms.validation import coerce_record, validate_foreign_keys
+
+    columns = COLUMN_DEFINITIONS[context]["columns"]
+    primary_key = get_primary_key(context)
+    queries = query_generator(context)
+    refresh_query = generate_fetch_query_parts("Where", context, columns, where_conditions={primary_key: None})
+
+    form_data = coerce_record(context, record)
+    validate_foreign_keys(form_data, columns, manager=manager)
+    new_id = save_new_item(context, queries["insert_query"], form_data, f"Add {context}", manager=manager)
+    manager.execute_query(refresh_query, {primary_key: new_id}, debug=False)
+
+    old_row = fetch_item(context, new_id, manager)
+    edited = dict(form_data, **{primary_key: new_id})
+    field = CRUD_EDITS.get(context)
+    if field:
+        # Numeric form fields stay text, as typed
+        edited[field] = float(edited.get(field) or 0) + 1
+    with journaled(f"Edit {context}", manager):
+        manager.execute_non_query(queries["update_query"], edited, debug=False)
+        recalculate_for_edit(context, old_row, edited, manager=manager, debug=False)
+    manager.execute_query(refresh_query, {primary_key: new_id}, debug=False)
+
+    delete_saved_item(context, queries["delete_query"], new_id, manager=manager)
+
+
+def benchmark_cases(manager, dataset, workdir, import_rows=BENCHMARK_IMPORT_ROWS):
+    """
+    Lists the benchmark cases in run order; cases that write come last.
+
+    Args:
+        manager (DatabaseTransactionManager): The scratch database.
+        dataset (SyntheticDataset): The dataset it was filled with.
+        workdir (str): Directory for files the cases write.
+        import_rows (int): Rows in the imported file.
+
+    Returns:
+        list: (name, setup) pairs. setup() prepares the case and returns (func, ops).
+    """
+    from core.background import stream_query
+    from core.foreign_keys import get_resolver
+    from core.importer import import_file
+    from core.pagination import KeysetPager
+    from core.query_builder import invalidate_query_cache, query_generator
+    from core.row_source import RowSource
+    from core.sorting import sort_rows
+    from domain.bom import rollup_assemblies
+    from domain.hierarchy import rebuild_closure, subtree
+    from forms.validation import validate_foreign_keys_batch
+
+    contexts = list(COLUMN_DEFINITIONS)
+    cases = []
+
+    def generate_cold():
+        for context in contexts:
+            invalidate_query_cache(context)
+            query_generator(context)
+
+    def generate_cached():
+        for _ in range(CACHED_LOOKUPS):
+            for context in contexts:
+                query_generator(context)
+
+    cases.append(("query_generator.cold", lambda: (generate_cold, len(contexts))))
+    cases.append(("query_generator.cached", lambda: (generate_cached, CACHED_LOOKUPS * len(contexts))))
+
+    def check_columns(context):
+        # The config can name list columns the schema lacks (Assemblies_Parts.ChildAssemblyID)
+        with manager.pool.reader() as connection:
+            present = {row[1] for row in connection.execute(f"PRAGMA table_info({context})")}
+        missing = [
+            col for col, details in COLUMN_DEFINITIONS[context]["columns"].items()
+            if is_list_column(details) and col not in present
+        ]
+        if missing:
+            raise SkipCase(f"{context} has no column {', '.join(missing)}")
+
+    def fetch(context):
+        check_columns(context)
+        query = query_generator(context)["fetch_query"]
+        return lambda: sum(len(rows) for rows in stream_query(query, chunk_size=PAGE_SIZE, manager=manager)), 1
+
+    def page_through(context, sort_column=None, sort_direction="ASC"):
+        check_columns(context)
+
+        def run():
+            # Pages are read on a pooled reader, as a background worker would
+            pager = KeysetPager(context, sort_column=sort_column, sort_direction=sort_direction, manager=manager)
+            while not pager.exhausted:
+                query, params = pager.page_request()
+                pager.accept_page(manager.execute_read(query, params, debug=False))
+            return pager.loaded
+        return run, 1
+
+    for context in contexts:
+        cases.append((f"fetch.{context}", lambda context=context: fetch(context)))
+    for context in contexts:
+        cases.append((f"page.{context}", lambda context=context: page_through(context)))
+
+    def client_sort(context, sort_keys):
+        columns = COLUMN_DEFINITIONS[context]["columns"]
+        types = {col: details.get("type", "string") for col, details in columns.items()}
+        rows = manager.execute_read(query_generator(context)["fetch_query"], debug=False)
+        return lambda: len(sort_rows(rows, sort_keys, types, lambda row, col: row.get(col))), len(rows)
+
+    def key_sort(context, sort_keys):
+        source = RowSource(context, manager=manager)
+        return lambda: len(source.load_keys(sort_keys=sort_keys)), 1
+
+    for context, sort_keys in SORT_KEYS.items():
+        cases.append((f"sort.client.{context}", lambda context=context, sort_keys=sort_keys: client_sort(context, sort_keys)))
+        cases.append((f"sort.keys.{context}", lambda context=context, sort_keys=sort_keys: key_sort(context, sort_keys)))
+        cases.append((
+            f"sort.page.{context}",
+            lambda context=context, sort_keys=sort_keys: page_through(context, *sort_keys[0]),
+        ))
+
+    def foreign_keys(context, cold):
+        columns = COLUMN_DEFINITIONS[context]["columns"]
+        records = list(dataset.suppliers() if context == "Suppliers" else dataset.parts())
+        resolver = get_resolver(manager)
+
+        def run():
+            if cold:
+                resolver.invalidate()
+            validate_foreign_keys_batch(records, columns, manager=manager)
+            return len(records)
+        return run, len(records)
+
+    for context in FK_CONTEXTS:
+        cases.append((f"fk.{context}.cold", lambda context=context: foreign_keys(context, True)))
+        cases.append((f"fk.{context}.cached", lambda context=context: foreign_keys(context, False)))
+
+    top_level = dataset.assembly_levels()[0] if dataset.volumes.get("Assemblies") else []
+
+    def subtrees():
+        return lambda: sum(len(subtree(assembly_id, manager)) for assembly_id in top_level), max(len(top_level), 1)
+
+    cases.append(("hierarchy.subtree", subtrees))
+    cases.append(("hierarchy.rebuild", lambda: (lambda: rebuild_closure(manager, debug=False), 1)))
+    cases.append(("bom.rollup", lambda: (lambda: rollup_assemblies(manager, debug=False)["computed"], 1)))
+
+    def crud(context):
+        rows = {"Parts": dataset.parts, "Suppliers": dataset.suppliers, "Assemblies": dataset.assemblies}[context]()
+        # The first generated Assemblies row is the root placeholder
+        row = next(row for row in rows if row[get_primary_key(context)] != ROOT_ASSEMBLY_ID)
+        record = form_record(context, row)
+        return lambda: crud_round_trip(context, record, manager), 1
+
+    for context in CRUD_EDITS:
+        cases.append((f"crud.{context}", lambda context=context: crud(context)))
+
+    def import_parts():
+        path = os.path.join(workdir, "parts.csv")
+        fields = [col for col in form_record("Parts", {})]
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=fields)
+            writer.writeheader()
+            # Rows without a PartID, so every run inserts them anew
+            for row in dataset.parts(count=import_rows, stream="Import"):
+                writer.writerow(form_record("Parts", row))
+
+        def run():
+            report = import_file("Parts", path, manager=manager)
+            if report["rejected"] or report["failed"]:
+                raise RuntimeError(f"Import rejected {report['rejected']} and failed {report['failed']} rows: {report['errors'][:1]}")
+            return report["inserted"]
+        return run, import_rows
+
+    cases.append(("import.Parts", import_parts))
+    return cases
+
+
+def git_commit():
+    """ Returns the short commit hash of the working tree, or None outside a git checkout. """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def table_counts(manager, tables):
+    """ Returns table -> row count. """
+    return {table: manager.execute_read(f"SELECT COUNT(*) AS n FROM {table}", debug=False)[0]["n"] for table in tables}
+
+
+def run_suite(manager, dataset, workdir, repeat=BENCHMARK_REPEAT, only=None, import_rows=BENCHMARK_IMPORT_ROWS):
+    """
+    Runs the benchmark cases against a database filled by generate_dataset.
+
+    A case that raises is reported with its error instead of timings, and
+    one that cannot run on this schema (see SkipCase) as skipped.
+
+    Args:
+        manager (DatabaseTransactionManager): The scratch database.
+        dataset (SyntheticDataset): The dataset it was filled with.
+        workdir (str): Directory for files the cases write.
+        repeat (int): Timed runs per case.
+        only (list, optional): Run only the cases whose names start with one of these prefixes.
+        import_rows (int): Rows in the imported file.
+
+    Returns:
+        dict: JSON-serializable results (see the module docstring).
+    """
+    from core.metrics import query_metrics
+
+    tables = [table for table, _ in dataset.tables()]
+    output = {
+        "format": RESULT_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "dataset": {
+            "seed": dataset.seed,
+            "depth": dataset.depth,
+            "volumes": dataset.volumes,
+            "image_bytes": dataset.image_bytes,
+            "import_rows": import_rows,
+            "rows": table_counts(manager, tables),
+        },
+        "repeat": repeat,
+        "results": {},
+    }
+
+    query_metrics.reset()
+    for name, setup in benchmark_cases(manager, dataset, workdir, import_rows):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        try:
+            func, ops = setup()
+            output["results"][name] = measure(func, repeat, ops=ops)
+        except SkipCase as e:
+            output["results"][name] = {"skipped": str(e)}
+        except Exception as e:
+            if manager.in_transaction:
+                manager.rollback_transaction(debug=False)
+            output["results"][name] = {"error": f"{type(e).__name__}: {e}"}
+
+    output["statements"] = [
+        {key: item[key] for key in ("shape", "calls", "total_ms", "avg_ms", "max_ms", "rows", "plan")}
+        for item in query_metrics.snapshot(limit=10)
+    ]
+    return output
+
+
+def compare_results(baseline, current, threshold=0.2):
+    """
+    Compares the median times of two runs case by case.
+
+    Args:
+        baseline (dict): Earlier output of run_suite.
+        current (dict): Later output of run_suite.
+        threshold (float): Relative slowdown that counts as a regression (0.2 = 20%).
+
+    Returns:
+        list: (case, baseline ms, current ms, ratio, regressed) for the cases timed in both.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name, {})
+        if "median_ms" not in result or "median_ms" not in before:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        rows.append((name, before["median_ms"], result["median_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_comparison(baseline, current, rows):
+    """ Formats compare_results() for the console. """
+    lines = [f"Median times: {baseline.get('commit') or 'baseline'} -> {current.get('commit') or 'current'}"]
+    if baseline.get("dataset", {}).get("volumes") != current["dataset"]["volumes"] or \
+            baseline.get("dataset", {}).get("seed") != current["dataset"]["seed"]:
+        lines.append("  Warning: the runs used different datasets; times are not comparable.")
+    width = max((len(row[0]) for row in rows), default=10)
+    for name, before, after, ratio, regressed in rows:
+        marker = "  SLOWER" if regressed else ""
+        lines.append(f"  {name:<{width}}  {before:10.2f} ms  {after:10.2f} ms  {(ratio - 1) * 100:+7.1f}%{marker}")
+    for name, result in current["results"].items():
+        if "error" in result:
+            lines.append(f"  {name}: {result['error']}")
+        elif "skipped" in result:
+            lines.append(f"  {name}: skipped ({result['skipped']})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the FarmBot data layer on a seeded synthetic database.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown that fails --compare (0.2 = 20%%).")
+    parser.add_argument("--only", help="Comma-separated case name prefixes to run (e.g. fetch,sort.keys).")
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT, help="Timed runs per case.")
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED, help="Random seed of the dataset.")
+    parser.add_argument("--depth", type=int, default=BENCHMARK_DEPTH, help="Levels of the assembly hierarchy.")
+    for table, count in BENCHMARK_VOLUMES.items():
+        parser.add_argument(f"--{table.lower()}", type=int, default=count, help=f"{table} rows to generate.")
+    parser.add_argument("--image-bytes", type=int, default=BENCHMARK_IMAGE_BYTES, help="Bytes per generated image.")
+    parser.add_argument("--import-rows", type=int, default=BENCHMARK_IMPORT_ROWS, help="Rows in the imported file.")
+    parser.add_argument("--schema", default=SCHEMA_SOURCE, help="Database whose schema is copied.")
+    parser.add_argument("--database", help="Scratch database to create and keep (must not exist). Defaults to a temporary file.")
+    args = parser.parse_args(argv)
+
+    volumes = {table: getattr(args, table.lower()) for table in BENCHMARK_VOLUMES}
+    dataset = SyntheticDataset(volumes, depth=args.depth, seed=args.seed, image_bytes=args.image_bytes)
+    workdir = tempfile.mkdtemp(prefix="farmbot-bench-")
+    try:
+        manager = generate_dataset(args.database or os.path.join(workdir, "bench.db"), dataset, schema=args.schema)
+        try:
+            results = run_suite(
+                manager, dataset, workdir, repeat=args.repeat,
+                only=args.only.split(",") if args.only else None, import_rows=args.import_rows,
+            )
+        finally:
+            manager.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    rows = compare_results(baseline, results, args.threshold)
+    # Without --output the comparison goes to stderr so stdout stays valid JSON
+    print(format_comparison(baseline, results, rows), file=sys.stdout if args.output else sys.stderr)
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
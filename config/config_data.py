@@ -1,7 +1,127 @@
-DEBUG = True
+# Logging (see core.log). LOG_LEVEL applies to every module unless LOG_LEVELS
+# names a more specific module or package, e.g. {"core.database_transactions": "DEBUG"}.
+# LOG_JSON_FILE, when set, also writes one JSON object per record to that file,
+# rotated at LOG_JSON_MAX_BYTES with LOG_JSON_BACKUPS old files kept.
+LOG_LEVEL = "WARNING"
+LOG_LEVELS = {}
+LOG_JSON_FILE = None
+LOG_JSON_MAX_BYTES = 5 * 1024 * 1024
+LOG_JSON_BACKUPS = 3
+
+# Default of the debug flag that turns on detailed diagnostics (logged at DEBUG level).
+DEBUG = LOG_LEVEL == "DEBUG"
 
 DATABASE = "D:\FarmbotPythonV2\Farmbot.db"
 
+# Connection pool: read connections handed out to worker threads, and how long
+# (seconds) a checkout may wait for a free reader or for the writer.
+POOL_MAX_READERS = 4
+POOL_TIMEOUT = 10
+
+# PRAGMAs applied to every connection at open. "interactive" is the default for
+# the UI; "bulk-load" trades durability on power loss for import throughput.
+# cache_size is negative to mean KiB rather than pages.
+PRAGMA_PROFILES = {
+    "interactive": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "busy_timeout": 30000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+    },
+}
+PRAGMA_PROFILE = "interactive"
+
+# Prepared statements kept per connection by sqlite3; sized for the fetch,
+# insert, update, delete and sort queries of every context.
+STATEMENT_CACHE_SIZE = 256
+
+# Datasheet tabs that load rows a page at a time as the user scrolls,
+# instead of fetching the whole table up front.
+PAGE_SIZE = 500
+PAGINATED_CONTEXTS = ["Parts", "Drawings"]
+# Columns of the paginated tabs given an index on their sort order (see
+# core.pagination.ensure_sort_indexes), so sorting a paged tab by them seeks
+# instead of scanning. Each index slows inserts and updates a little.
+SORT_INDEXES = {"Parts": ["PartName", "Make", "Manufacturer"], "Drawings": ["DrawingName", "Status"]}
+
+# Tables with more rows than this are shown in a virtual datasheet that only
+# holds the visible rows (plus VIRTUAL_OVERSCAN above and below) as Treeview
+# items. VIRTUAL_CACHE_ROWS caps the rows kept in memory for scrolling back.
+VIRTUAL_ROW_THRESHOLD = 20000
+VIRTUAL_OVERSCAN = 20
+VIRTUAL_CACHE_ROWS = 2000
+
+# Build each datasheet tab on first selection instead of all at startup,
+# prefetching the next tab's rows in the background.
+LAZY_TABS = True
+
+# Rows per transaction for execute_many / bulk_upsert.
+BATCH_CHUNK_SIZE = 500
+
+# Placeholder assembly that top-level assemblies name as their parent.
+# BOM rollups treat it as "no parent" and never write totals to it.
+ROOT_ASSEMBLY_ID = 40
+
+# Actions kept in the undo journal (see core.journal); starting a new action
+# prunes the oldest beyond this. None keeps the whole history.
+UNDO_HISTORY_LIMIT = 200
+
+# Bytes per chunk when streaming a single BLOB value (see core.blobs).
+BLOB_CHUNK_SIZE = 65536
+
+# Query instrumentation (see core.metrics): time every statement, and log
+# statements slower than SLOW_QUERY_MS (the last SLOW_QUERY_LOG_SIZE of them)
+# with their query plan.
+QUERY_METRICS = True
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG_SIZE = 200
+
+# External blob store (see core.blob_store): values of these BLOB columns can
+# be moved to content-addressed files, leaving only their hash and size in the
+# database. BLOB_STORE_DIR None means a "blobs" folder next to the database.
+# With BLOB_STORE_ENABLED, values saved through core.blobs.write_blob go to the
+# store too; otherwise they stay inline until the migration is run.
+BLOB_STORE_DIR = None
+BLOB_STORE_ENABLED = False
+EXTERNAL_BLOB_COLUMNS = {"Images": ["ImageData"], "Assemblies": ["AssemImage"]}
+# Values moved per transaction by the blob store migration.
+BLOB_MIGRATION_BATCH = 50
+
+# Image previews (see core.thumbnails): thumbnails fit within THUMBNAIL_SIZE
+# pixels, the on-disk cache is trimmed to THUMBNAIL_CACHE_BYTES and the last
+# THUMBNAIL_MEMORY_ITEMS are also kept in memory. THUMBNAIL_DIR None means a
+# "thumbnails" folder next to the database.
+THUMBNAIL_DIR = None
+THUMBNAIL_SIZE = (160, 160)
+THUMBNAIL_CACHE_BYTES = 32 * 1024 * 1024
+THUMBNAIL_MEMORY_ITEMS = 64
+
+# Contexts with an FTS5 search index over their text columns, and the most
+# results a search returns.
+SEARCH_CONTEXTS = ["Assemblies", "Parts", "Images", "Drawings", "Suppliers"]
+SEARCH_LIMIT = 500
+
+# Benchmark suite (see benchmarks.suite): rows generated per table on a scratch
+# copy of the schema, levels of the generated assembly hierarchy, random seed,
+# bytes per generated image, rows per benchmarked file import, and timed runs
+# per case (after one warm-up run).
+BENCHMARK_VOLUMES = {"Drawings": 2000, "Parts": 10000, "Suppliers": 5000, "Images": 200, "Assemblies": 1000}
+BENCHMARK_DEPTH = 8
+BENCHMARK_SEED = 1
+BENCHMARK_IMAGE_BYTES = 16384
+BENCHMARK_IMPORT_ROWS = 2000
+BENCHMARK_REPEAT = 5
+
 COLUMN_DEFINITIONS = {
     "Assemblies": {
         "columns": {
@@ -35,7 +155,7 @@ COLUMN_DEFINITIONS = {
             "Notes": {"display_name": "Notes", "width": 100, "type": "string", "parts": True},
             "Manufacturer": {"display_name": "Manufacturer", "width": 100, "type": "string", "parts": True},
             "ImageRef": {"display_name": "ImageRef", "width": 100, "type": "string"},
-            "DrawingID": {"display_name": "DrawingID", "width": 100, "type": "int", "foreign_key": True, "default": 266},
+            "DrawingID": {"display_name": "DrawingID", "width": 100, "type": "int", "foreign_key": True, "references": "Drawings", "default": 266},
             "ManPartNum": {"display_name": "ManPartNum", "width": 100, "type": "string", "parts": True},
             "ProcurementType": {"display_name": "ProcurementType", "width": 100, "type": "string", "default": "Purchase"},
             "PartWeight": {"display_name": "Weight", "width": 80, "type": "float", "default": 0},
@@ -47,7 +167,7 @@ COLUMN_DEFINITIONS = {
             "SupplierID": {"display_name": "ID", "width": 60, "type": "int", "is_primary_key": True},
             "SupplierName": {"display_name": "Name", "width": 200, "type": "string"},
             "PricePerUnit": {"display_name": "Price/Unit", "width": 100, "type": "float", "default": 0.0},
-            "PartID": {"display_name": "PartID", "width": 50, "type": "int", "foreign_key": True, "default": 50},
+            "PartID": {"display_name": "PartID", "width": 50, "type": "int", "foreign_key": True, "references": "Parts", "default": 50},
             "UnitOfOrder": {"display_name": "Unit of Order", "width": 100, "type": "string"},
             "WebRef": {"display_name": "Web URL", "width": 200, "type": "string"},
             "Manuf": {"display_name": "Manufacturer", "width": 100, "type": "string"},
@@ -64,7 +184,7 @@ COLUMN_DEFINITIONS = {
             "Size": {"display_name": "Size", "width": 80, "type": "numeric"},
             "Status": {"display_name": "Status", "width": 100, "type": "string"},
             "Revision": {"display_name": "Revision", "width": 80, "type": "int"},
-            "RelatedItemID": {"display_name": "Related PartID", "width": 100, "type": "int", "foreign_key": True, "default": 50}
+            "RelatedItemID": {"display_name": "Related PartID", "width": 100, "type": "int", "foreign_key": True, "references": "Parts", "to": "PartID", "default": 50}
         }
     },
     "Images": {
@@ -80,7 +200,7 @@ COLUMN_DEFINITIONS = {
             "ParentAssemblyID": {"display_name": "ParentAssemblyID", "width": 50, "type": "int"},
             "EntityType": {"display_name": "Entity Type", "width": 150, "type": "string"},
             "ProcurementType": {"display_name": "Procurement Type", "width": 100, "default": "Purchase"},
-            "ChildAssemblyID": {"display_name": "ChildAssembly ID", "width": 60, "type": "int", "foreign_key": True },
+            "ChildAssemblyID": {"display_name": "ChildAssembly ID", "width": 60, "type": "int", "foreign_key": True, "references": "Assemblies", "to": "AssemblyID"},
             "PartID": {"display_name": "Part ID", "width": 60, "type": "int"},
             "Quantity": {"display_name": "Quantity", "width": 60, "type": "real"},
             "HoursParts": {"display_name": "Hours for Parts", "width": 60, "type": "real"},
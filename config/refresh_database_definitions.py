@@ -1,5 +1,10 @@
 import sqlite3
-from config_data import COLUMN_DEFINITIONS, DEBUG
+from config.config_data import COLUMN_DEFINITIONS
+from core.database_transactions import apply_pragmas
+from core.query_builder import invalidate_query_cache
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 
 
@@ -20,6 +25,7 @@ def refresh_column_definitions(table_name, debug=False):
     table_name="Assemblies"
     query = f"PRAGMA table_info({table_name});"
     connection = sqlite3.connect("D:\FarmbotPythonV2\Farmbot.db")
+    apply_pragmas(connection)
     try:
         cursor = connection.cursor()
         cursor.execute(query)
@@ -44,5 +50,6 @@ COLUMN_DEFINITIONS["Assemblies"]["columns"] = refresh_column_definitions("Assemb
 
 # Dynamically refresh column definitions for the Assemblies table
 COLUMN_DEFINITIONS["Assemblies"]["columns"] = refresh_column_definitions("Assemblies")
+invalidate_query_cache("Assemblies")  # Regenerate queries from the refreshed definitions
 
-print(f"DEBUG: Updated COLUMN_DEFINITIONS for Assemblies: {COLUMN_DEFINITIONS['Assemblies']['columns']}")
\ No newline at end of file
+log.debug("Updated COLUMN_DEFINITIONS for Assemblies: %s", COLUMN_DEFINITIONS['Assemblies']['columns'])
\ No newline at end of file
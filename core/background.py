@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config_data import POOL_MAX_READERS
+from core.metrics import query_metrics
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# SQLite VM instructions between cancellation checks while a statement runs
+CANCEL_CHECK_INSTRUCTIONS = 10000
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared between a job and whoever started it.
+
+    Workers check `cancelled` between chunks and stop early; stream_query
+    also aborts a statement that is still running when its token is cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class BackgroundExecutor:
+    """
+    Worker pool for database reads that must not block the Tk main thread.
+
+    Jobs can be submitted under a key (e.g. a Treeview's widget path); a new
+    job under the same key cancels the previous one, so re-sorting or
+    reloading a tab supersedes a load that is still running.
+
+    Workers must never touch Tk widgets; results go back to the main thread
+    through ui.background_loader.TkDispatcher.
+    """
+
+    def __init__(self, max_workers=POOL_MAX_READERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="farmbot-bg")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """
+        Run func(*args, token=..., **kwargs) on a worker thread.
+
+        Args:
+            func (callable): The job. Receives the job's CancelToken as `token`.
+            key (str, optional): Job key; a running job under the same key is cancelled.
+
+        Returns:
+            tuple: (concurrent.futures.Future, CancelToken)
+        """
+        token = CancelToken()
+        if key is not None:
+            with self._lock:
+                previous = self.jobs.get(key)
+                self.jobs[key] = token
+            if previous:
+                previous.cancel()
+
+        def run():
+            try:
+                return func(*args, token=token, **kwargs)
+            finally:
+                if key is not None:
+                    with self._lock:
+                        if self.jobs.get(key) is token:
+                            del self.jobs[key]
+
+        return self.executor.submit(run), token
+
+    def cancel(self, key):
+        """ Cancel the running job submitted under key, if any. """
+        with self._lock:
+            token = self.jobs.pop(key, None)
+        if token:
+            token.cancel()
+            log.debug("Cancelled background job '%s'", key)
+
+    def cancel_matching(self, predicate):
+        """ Cancel every running job whose key satisfies predicate(key). """
+        with self._lock:
+            keys = [key for key in self.jobs if predicate(key)]
+        for key in keys:
+            self.cancel(key)
+
+    def shutdown(self):
+        with self._lock:
+            tokens = list(self.jobs.values())
+            self.jobs.clear()
+        for token in tokens:
+            token.cancel()
+        self.executor.shutdown(wait=False)
+
+
+def stream_query(query, params=None, chunk_size=500, token=None, manager=None):
+    """
+    Yields the rows of a SELECT in chunks from the calling thread's pooled read connection.
+
+    Stops early (without error) once the token is cancelled, including while
+    SQLite is still executing the statement (e.g. sorting a large filtered table).
+
+    Args:
+        query (str): SELECT statement.
+        params (dict or tuple, optional): Query parameters.
+        chunk_size (int): Rows per chunk.
+        token (CancelToken, optional): Cancellation flag checked between chunks.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Yields:
+        list: Rows as dictionaries.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    waited = time.perf_counter()
+    with manager.pool.reader() as connection:
+        wait = time.perf_counter() - waited
+        if token is not None:
+            # Returning non-zero from the handler interrupts the running statement
+            connection.set_progress_handler(lambda: 1 if token.cancelled else 0, CANCEL_CHECK_INSTRUCTIONS)
+        cursor = None
+        # Time spent in SQLite only, not while the caller handles a chunk
+        elapsed, row_count, failed = 0.0, 0, False
+        try:
+            started = time.perf_counter()
+            cursor = connection.execute(query, params or ())
+            while not (token and token.cancelled):
+                rows = cursor.fetchmany(chunk_size)
+                elapsed += time.perf_counter() - started
+                if not rows:
+                    break
+                row_count += len(rows)
+                yield [dict(row) for row in rows]
+                started = time.perf_counter()
+        except sqlite3.OperationalError:
+            failed = True
+            if not (token and token.cancelled):
+                raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if token is not None:
+                connection.set_progress_handler(None, 0)
+            query_metrics.record(query, elapsed, row_count, 0, wait, connection, params, error=failed)
+
+
+background_executor = BackgroundExecutor()
@@ -0,0 +1,417 @@
+"""
+Content-addressed store for large BLOB values, outside the database file.
+
+    python -m core.blob_store migrate --vacuum
+    python -m core.blob_store restore
+    python -m core.blob_store collect-garbage
+
+Each value is written once to a file named by the SHA-256 of its bytes, so
+identical images share one file. The BLOB column then holds only a short
+reference, "sha256:<hash>:<size>", instead of the bytes. core.blobs resolves
+references transparently, and the files are read through a read-only mmap,
+so reads go straight from the OS page cache without copying into Python.
+
+Files are never changed in place. A replaced value gets a new file; the old
+one is removed by collect_garbage() once no row and no undo journal entry
+refers to it.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from config.config_data import BLOB_CHUNK_SIZE, BLOB_MIGRATION_BATCH, BLOB_STORE_DIR, DEBUG, EXTERNAL_BLOB_COLUMNS
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+REFERENCE_PATTERN = re.compile(r"^sha256:([0-9a-f]{64}):(\d+)$")
+
+
+def make_reference(digest, size):
+    """ Returns the text stored in the database in place of a value. """
+    return f"sha256:{digest}:{size}"
+
+
+def parse_reference(value):
+    """
+    Splits a stored reference into its hash and size.
+
+    Returns:
+        tuple: (digest, size), or None if value is not a reference (e.g. inline bytes).
+    """
+    if not isinstance(value, str):
+        return None
+    match = REFERENCE_PATTERN.match(value)
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+class MappedBlob:
+    """
+    A stored file mapped read-only, with the read()/len() interface of sqlite3.Blob.
+
+    read() returns memoryview slices of the mapping rather than copies.
+
+    Attributes:
+        view (memoryview): The whole value.
+    """
+
+    def __init__(self, mapping, view):
+        self.mapping = mapping
+        self.view = view
+        self.position = 0
+
+    def __len__(self):
+        return len(self.view)
+
+    def read(self, length=-1):
+        end = len(self.view) if length < 0 else min(self.position + length, len(self.view))
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+    def close(self):
+        self.view.release()
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                pass  # A caller still holds a slice; the mapping closes when it is released
+
+
+class BlobStore:
+    """
+    A folder of immutable files named by the SHA-256 of their content.
+
+    Files live in 256 sub-folders (the first two hex digits of the hash) to
+    keep directories small.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path_for(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def put_stream(self, chunks):
+        """
+        Stores a value given as an iterable of byte chunks.
+
+        The file is flushed to disk before this returns, so a reference to it
+        can be committed safely. Storing a value that is already present only
+        hashes it.
+
+        Returns:
+            tuple: (digest, size, added) where added is False for a duplicate.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = os.path.join(self.directory, f".incoming-{os.getpid()}-{threading.get_ident()}")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temporary, "wb") as blob_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += blob_file.write(chunk)
+                blob_file.flush()
+                os.fsync(blob_file.fileno())
+            digest = digest.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                return digest, size, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+            return digest, size, True
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def put(self, data):
+        """ Stores a bytes value. Returns (digest, size, added) as put_stream(). """
+        return self.put_stream([data])
+
+    @contextmanager
+    def open(self, reference):
+        """
+        Maps a stored value read-only.
+
+        Args:
+            reference (str): The stored reference (see make_reference).
+
+        Yields:
+            MappedBlob: The value.
+
+        Raises:
+            FileNotFoundError: If the file is missing from the store.
+            ValueError: If the reference is malformed or the file size does not match.
+        """
+        parsed = parse_reference(reference)
+        if parsed is None:
+            raise ValueError(f"Not a blob store reference: {reference!r}")
+        digest, size = parsed
+        path = self.path_for(digest)
+        try:
+            blob_file = open(path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Blob {digest} is missing from the store at {self.directory}")
+        with blob_file:
+            actual = os.fstat(blob_file.fileno()).st_size
+            if actual != size:
+                raise ValueError(f"Blob {digest} is {actual} bytes in the store, expected {size}")
+            # mmap cannot map an empty file
+            mapping = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        blob = MappedBlob(mapping, memoryview(mapping if mapping is not None else b""))
+        try:
+            yield blob
+        finally:
+            blob.close()
+
+    def digests(self):
+        """ Yields the hash of every stored file. """
+        if not os.path.isdir(self.directory):
+            return
+        for folder in os.scandir(self.directory):
+            if folder.is_dir() and len(folder.name) == 2:
+                for entry in os.scandir(folder.path):
+                    if entry.is_file() and len(entry.name) == 64:
+                        yield entry.name
+
+    def remove(self, digest):
+        try:
+            os.remove(self.path_for(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+# One store per DatabaseTransactionManager
+stores = {}
+
+
+def get_blob_store(manager=None):
+    """ Returns the blob store of a manager's database (BLOB_STORE_DIR, or "blobs" next to the database). """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    store = stores.get(manager)
+    if store is None:
+        directory = BLOB_STORE_DIR or os.path.join(os.path.dirname(os.path.abspath(manager.db_path)), "blobs")
+        store = BlobStore(directory)
+        stores[manager] = store
+    return store
+
+
+def stored_reference(connection, table_name, column, key):
+    """ Returns the reference held by a row's column, or None if it holds inline bytes, NULL or nothing. """
+    row = connection.execute(
+        f"SELECT {column} FROM {table_name} WHERE rowid = ? AND typeof({column}) = 'text'", (int(key),)
+    ).fetchone()
+    if row is None or parse_reference(row[0]) is None:
+        return None
+    return row[0]
+
+
+def _iter_inline(connection, table_name, column, key, chunk_size=BLOB_CHUNK_SIZE):
+    blob = connection.blobopen(table_name, column, key, readonly=True)
+    try:
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        blob.close()
+
+
+def _move_batch(manager, store, table_name, column, after_key, batch_size, outward):
+    """
+    Moves up to batch_size values of one column, in rowid order after after_key, in one transaction.
+
+    Values are read and their references written under the writer lock, so a
+    concurrent edit cannot be overwritten by a stale copy.
+
+    Returns:
+        tuple: (last rowid seen or None when done, values moved, bytes moved, files added)
+    """
+    kind = "blob" if outward else "text"
+    with manager.pool.writer_connection():
+        connection = manager.connection
+        keys = [
+            row[0] for row in connection.execute(
+                f"SELECT rowid FROM {table_name} WHERE rowid > ? AND typeof({column}) = ? ORDER BY rowid LIMIT ?",
+                (after_key, kind, batch_size),
+            )
+        ]
+        if not keys:
+            return None, 0, 0, 0
+
+        updates, moved_bytes, added = [], 0, 0
+        for key in keys:
+            if outward:
+                digest, size, is_new = store.put_stream(_iter_inline(connection, table_name, column, key))
+                updates.append((make_reference(digest, size), key))
+                added += is_new
+            else:
+                reference = stored_reference(connection, table_name, column, key)
+                if reference is None:
+                    continue  # Ordinary text, not a reference
+                with store.open(reference) as blob:
+                    size = len(blob)
+                    updates.append((bytes(blob.view), key))
+            moved_bytes += size
+
+        manager.begin_transaction(debug=False)
+        try:
+            connection.executemany(f"UPDATE {table_name} SET {column} = ? WHERE rowid = ?", updates)
+        except Exception:
+            manager.rollback_transaction()
+            raise
+        manager.notify_write(table_name)
+        manager.commit_transaction(debug=False)
+        return keys[-1], len(updates), moved_bytes, added
+
+
+def migrate_blobs(manager=None, store=None, columns=None, batch_size=BLOB_MIGRATION_BATCH, outward=True, debug=DEBUG):
+    """
+    Moves stored values between the database and the blob store, a batch at a time.
+
+    Each value is streamed in chunks, so memory use is bounded by the batch
+    (and, when restoring, by the values of one batch). Interrupted runs can be
+    repeated: moved values are skipped.
+
+    Args:
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        store (BlobStore, optional): Defaults to get_blob_store(manager).
+        columns (dict, optional): Table -> list of columns. Defaults to EXTERNAL_BLOB_COLUMNS.
+        batch_size (int): Values per transaction.
+        outward (bool): True moves inline values to the store; False restores them inline.
+
+    Returns:
+        dict: {"moved": int, "bytes": int, "files_added": int, "elapsed": float}
+
+    Raises:
+        RuntimeError: If the manager has a transaction open.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    if manager.in_transaction:
+        raise RuntimeError("Commit or roll back the open transaction before moving blobs.")
+    if store is None:
+        store = get_blob_store(manager)
+    if columns is None:
+        columns = EXTERNAL_BLOB_COLUMNS
+
+    started = time.perf_counter()
+    report = {"moved": 0, "bytes": 0, "files_added": 0}
+    for table_name, table_columns in columns.items():
+        for column in table_columns:
+            after_key = 0
+            while after_key is not None:
+                after_key, moved, moved_bytes, added = _move_batch(
+                    manager, store, table_name, column, after_key, max(batch_size, 1), outward
+                )
+                report["moved"] += moved
+                report["bytes"] += moved_bytes
+                report["files_added"] += added
+                if debug and moved:
+                    log.debug("Moved %s values of %s.%s (%s bytes)", moved, table_name, column, moved_bytes)
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def journal_references(connection, columns):
+    """
+    Returns the hashes referenced by the undo journal's row images of the given columns.
+
+    Undoing or redoing an action writes those references back, so their files must stay.
+    """
+    from core.journal import JOURNAL_TABLE, decode_value
+
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (JOURNAL_TABLE,)).fetchone() is None:
+        return set()
+    referenced = set()
+    for table_name, table_columns in columns.items():
+        for before, after in connection.execute(
+            f"SELECT Before, After FROM {JOURNAL_TABLE} WHERE TableName = ?", (table_name,)
+        ):
+            for image in (before, after):
+                if image is None:
+                    continue
+                image = json.loads(image)
+                for column in table_columns:
+                    parsed = parse_reference(decode_value(image.get(column)))
+                    if parsed:
+                        referenced.add(parsed[0])
+    return referenced
+
+
+def collect_garbage(manager=None, store=None, columns=None, debug=DEBUG):
+    """
+    Deletes stored files that no row, and no undo journal entry, refers to any more.
+
+    Returns:
+        int: Number of files deleted.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    if store is None:
+        store = get_blob_store(manager)
+    if columns is None:
+        columns = EXTERNAL_BLOB_COLUMNS
+
+    with manager.pool.writer_connection():
+        referenced = set()
+        for table_name, table_columns in columns.items():
+            for column in table_columns:
+                for (value,) in manager.connection.execute(
+                    f"SELECT {column} FROM {table_name} WHERE typeof({column}) = 'text'"
+                ):
+                    parsed = parse_reference(value)
+                    if parsed:
+                        referenced.add(parsed[0])
+        referenced |= journal_references(manager.connection, columns)
+        removed = sum(store.remove(digest) for digest in list(store.digests()) if digest not in referenced)
+    if debug:
+        log.debug("Removed %s unreferenced blob files", removed)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move BLOB values between the database and the external blob store.")
+    parser.add_argument("command", choices=["migrate", "restore", "collect-garbage"],
+                        help="migrate: database to store; restore: store to database; collect-garbage: delete unreferenced files.")
+    parser.add_argument("--batch-size", type=int, default=BLOB_MIGRATION_BATCH, help="Values per transaction.")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return the freed pages to the OS.")
+    parser.add_argument("--database", help="Database file (defaults to DATABASE from config_data).")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        from core.database_transactions import DatabaseTransactionManager
+        manager = DatabaseTransactionManager(args.database)
+    else:
+        from core.database_transactions import db_manager as manager
+
+    if args.command == "collect-garbage":
+        print(f"Removed {collect_garbage(manager, debug=False)} unreferenced files.")
+    else:
+        report = migrate_blobs(manager, batch_size=args.batch_size, outward=args.command == "migrate", debug=False)
+        print(f"Moved {report['moved']} values ({report['bytes']} bytes, {report['files_added']} new files) "
+              f"in {report['elapsed']:.2f}s.")
+    if args.vacuum:
+        with manager.pool.writer_connection():
+            manager.connection.execute("VACUUM")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""
+BLOB columns: kept out of list queries and read one value at a time on demand.
+
+Columns typed "blob" in COLUMN_DEFINITIONS are never part of list fetches,
+forms, inserts or updates (see core.config_utils.is_list_column).
+apply_schema_types() also marks columns the schema declares as BLOB when the
+config gives them no type, so a missing type cannot pull binary data into
+every table load. An explicit type (e.g. Parts.ImageRef "string") is kept.
+
+Single values are read with sqlite3.Connection.blobopen, a chunk at a time,
+straight from the database page cache without loading the whole value. Values
+moved to the external blob store (see core.blob_store) are read from their
+memory-mapped file instead; callers see no difference.
+"""
+import sqlite3
+from contextlib import contextmanager
+
+from config.config_data import BLOB_CHUNK_SIZE, BLOB_STORE_ENABLED, COLUMN_DEFINITIONS, DEBUG, EXTERNAL_BLOB_COLUMNS
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
+def declared_blob_columns(connection, table_name):
+    """ Returns the columns of a table whose declared type has BLOB affinity. """
+    return [
+        row[1] for row in connection.execute(f"PRAGMA table_info({table_name})")
+        if "BLOB" in (row[2] or "").upper()
+    ]
+
+
+def apply_schema_types(manager=None, debug=DEBUG):
+    """
+    Marks the untyped columns the schema declares as BLOB as type "blob" in COLUMN_DEFINITIONS.
+
+    Columns the config types explicitly keep their type, and with it their
+    place in forms, inserts and updates. Changing the definitions regenerates the cached queries (see query_generator).
+
+    Args:
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Returns:
+        list: (context, column) pairs that were re-typed.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    changed = []
+    with manager.pool.reader() as connection:
+        for context_name, context_data in COLUMN_DEFINITIONS.items():
+            columns = context_data.get("columns", {})
+            for col in declared_blob_columns(connection, context_name):
+                details = columns.get(col)
+                if details is None or details.get("type") == "blob":
+                    continue
+                if "type" in details:
+                    if debug:
+                        log.debug("%s.%s is declared BLOB but typed %r in the config; kept", context_name, col, details["type"])
+                    continue
+                details["type"] = "blob"
+                changed.append((context_name, col))
+                if debug:
+                    log.debug("%s.%s is declared BLOB; excluded from list queries", context_name, col)
+    return changed
+
+
+def _check_column(context_name, column):
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    if column not in columns:
+        raise ValueError(f"Unknown column {context_name}.{column}")
+
+
+@contextmanager
+def open_blob(context_name, column, key, manager=None):
+    """
+    Opens one stored value read-only on the calling thread's pooled read connection.
+
+    The key is the row's primary key, which must be its rowid (an INTEGER
+    PRIMARY KEY). Only committed data is visible. A value held in the
+    external blob store is mapped from its file; read() then returns
+    memoryview slices instead of bytes.
+
+    Args:
+        context_name (str): The table (e.g., "Images").
+        column (str): The BLOB column (e.g., "ImageData").
+        key (int): The row's primary key.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Yields:
+        sqlite3.Blob or MappedBlob: The open value, or None if the row does not exist or the value is NULL.
+
+    Raises:
+        ValueError: If the column is not defined for the context.
+        FileNotFoundError: If the value's file is missing from the blob store.
+    """
+    from core.blob_store import get_blob_store, stored_reference
+
+    _check_column(context_name, column)
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.reader() as connection:
+        reference = stored_reference(connection, context_name, column, key)
+    if reference is not None:
+        with get_blob_store(manager).open(reference) as blob:
+            yield blob
+        return
+
+    with manager.pool.reader() as connection:
+        blob = None
+        try:
+            blob = connection.blobopen(context_name, column, int(key), readonly=True)
+        except sqlite3.OperationalError:
+            pass  # No such row, or a NULL value
+        try:
+            yield blob
+        finally:
+            if blob is not None:
+                blob.close()
+
+
+def blob_size(context_name, column, key, manager=None):
+    """ Returns the size in bytes of a stored value, or None if it is NULL or missing. """
+    with open_blob(context_name, column, key, manager) as blob:
+        return None if blob is None else len(blob)
+
+
+def iter_blob(context_name, column, key, chunk_size=BLOB_CHUNK_SIZE, manager=None):
+    """
+    Yields a stored value a chunk at a time, so the whole value is never in memory at once.
+
+    Yields:
+        bytes or memoryview: The next chunk (up to chunk_size bytes). Only valid
+            until the next chunk is requested.
+    """
+    with open_blob(context_name, column, key, manager) as blob:
+        if blob is None:
+            return
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def read_blob(context_name, column, key, manager=None):
+    """ Returns a whole stored value as bytes (or None). Prefer iter_blob for large values. """
+    with open_blob(context_name, column, key, manager) as blob:
+        return None if blob is None else bytes(blob.read())
+
+
+def copy_blob(context_name, column, key, stream, chunk_size=BLOB_CHUNK_SIZE, manager=None):
+    """
+    Writes a stored value to a binary stream (e.g. an open file) chunk by chunk.
+
+    Returns:
+        int: Bytes written, or None if the value is NULL or missing.
+    """
+    with open_blob(context_name, column, key, manager) as blob:
+        if blob is None:
+            return None
+        written = 0
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                return written
+            written += stream.write(chunk)
+
+
+def write_blob(context_name, column, key, data, manager=None, external=None, debug=DEBUG):
+    """
+    Saves a value, in the external blob store or inline.
+
+    Args:
+        context_name (str): The table (e.g., "Images").
+        column (str): The BLOB column.
+        key (int): The row's primary key (its rowid).
+        data (bytes): The value, or None to clear it.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        external (bool, optional): Use the blob store. Defaults to BLOB_STORE_ENABLED
+            for the columns in EXTERNAL_BLOB_COLUMNS.
+
+    Raises:
+        ValueError: If the column is not defined for the context.
+    """
+    from core.blob_store import get_blob_store, make_reference
+
+    _check_column(context_name, column)
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    if external is None:
+        external = BLOB_STORE_ENABLED and column in EXTERNAL_BLOB_COLUMNS.get(context_name, [])
+
+    value = data
+    if data is not None and external:
+        digest, size, _ = get_blob_store(manager).put(data)
+        value = make_reference(digest, size)
+    manager.execute_non_query(
+        f"UPDATE {context_name} SET {column} = :value WHERE rowid = :key", {"value": value, "key": int(key)},
+        commit=True, debug=debug,
+    )
@@ -1,4 +1,7 @@
-from config.config_data import COLUMN_DEFINITIONS, DEBUG
+from config.config_data import COLUMN_DEFINITIONS
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 def get_column_attribute_for_context(context, attribute):
     """
@@ -40,9 +43,24 @@ def get_primary_key(context):
             return column_name
     return None  # No primary key found
 
+def is_list_column(details):
+    """
+    Whether a column is shown in datasheets, forms and list queries.
+
+    Admin columns and BLOB columns (see core.blobs) are left out.
+
+    Args:
+        details (dict): The column's COLUMN_DEFINITIONS entry.
+
+    Returns:
+        bool: True for regular columns.
+    """
+    return not details.get("admin", False) and details.get("type") != "blob"
+
+
 def get_visible_columns(context):
     """
-    Returns a filtered view of COLUMN_DEFINITIONS, excluding admin fields.
+    Returns a filtered view of COLUMN_DEFINITIONS, excluding admin and BLOB fields.
 
     Args:
         context (str): The table context (e.g., "Assemblies").
@@ -52,7 +70,7 @@ def get_visible_columns(context):
     """
     columns = COLUMN_DEFINITIONS.get(context, {}).get("columns", {})
     visible_columns = {
-        col: details for col, details in columns.items() if not details.get("admin", False)
+        col: details for col, details in columns.items() if is_list_column(details)
     }
-    print(f"DEBUG: Visible columns for context '{context}': {visible_columns}")
+    log.debug("Visible columns for context '%s': %s", context, visible_columns)
     return visible_columns
\ No newline at end of file
@@ -1,6 +1,9 @@
 from core.database_transactions import DatabaseTransactionManager
 
 from config.config_data import DEBUG, DATABASE, COLUMN_DEFINITIONS
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 db_manager = DatabaseTransactionManager(DATABASE)
 
@@ -34,8 +37,8 @@ def save_data(context, data, is_add, column_definitions):
         params = data  # Include everything, including the primary key
 
     # Debugging output
-    print(f"Executing query: {query}")
-    print(f"With params: {params}")
+    log.debug("Executing query: %s", query)
+    log.debug("With params: %s", params)
 
     # Execute the query
     db_manager.execute_query(query, params)
@@ -1,100 +1,466 @@
-
+import queue
+import re
 import sqlite3
+import threading
+import time
 import tkinter as tk
+from contextlib import contextmanager
 from tkinter import messagebox, StringVar
 from tkinter import ttk, Frame  # Consolidated imports
-from config.config_data import DEBUG, DATABASE, COLUMN_DEFINITIONS
+from config.config_data import (
+    DEBUG, DATABASE, COLUMN_DEFINITIONS, POOL_MAX_READERS, POOL_TIMEOUT, PRAGMA_PROFILES, PRAGMA_PROFILE,
+    STATEMENT_CACHE_SIZE, BATCH_CHUNK_SIZE,
+)
+from core.metrics import query_metrics
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
+def apply_pragmas(connection, profile=PRAGMA_PROFILE, debug=DEBUG):
+    """
+    Apply a named PRAGMA profile from PRAGMA_PROFILES to a connection.
+
+    journal_mode and synchronous cannot change inside a transaction, so call
+    this right after opening the connection or between transactions.
+
+    Args:
+        connection (sqlite3.Connection): The connection to configure.
+        profile (str): Profile name (e.g., "interactive", "bulk-load").
+
+    Raises:
+        ValueError: If the profile is not defined.
+    """
+    pragmas = PRAGMA_PROFILES.get(profile)
+    if pragmas is None:
+        raise ValueError(f"Unknown PRAGMA profile '{profile}'. Valid profiles are: {list(PRAGMA_PROFILES)}")
+
+    for name, value in pragmas.items():
+        # journal_mode returns a row; fetch it so the statement completes
+        connection.execute(f"PRAGMA {name} = {value};").fetchall()
+    if debug:
+        log.debug("Applied PRAGMA profile '%s': %s", profile, pragmas)
 
 class ConnectionTracker:
     def __init__(self):
         self.open_connections = []
+        self.pools = []
 
     def add_connection(self, connection):
-        print("DEBUG: add_connection called")  # Add debug
         self.open_connections.append(connection)
-        print(f"DEBUG: Connection opened. Total connections: {len(self.open_connections)}")
+        log.debug("Connection opened. Total connections: %s", len(self.open_connections))
 
     def remove_connection(self, connection):
-        print("DEBUG: remove_connection called")  # Add debug
         if connection in self.open_connections:
             self.open_connections.remove(connection)
-            print(f"DEBUG: Connection closed. Total connections: {len(self.open_connections)}")
+            log.debug("Connection closed. Total connections: %s", len(self.open_connections))
         else:
-            print(f"DEBUG: Attempted to close a connection that was not tracked.")
+            log.debug("Attempted to close a connection that was not tracked.")
+
+    def register_pool(self, pool):
+        """ Track a ConnectionPool so its occupancy shows up in pool_status() """
+        if pool not in self.pools:
+            self.pools.append(pool)
+
+    def unregister_pool(self, pool):
+        if pool in self.pools:
+            self.pools.remove(pool)
+
+    def pool_status(self):
+        """
+        Report occupancy for every registered connection pool.
+
+        Returns:
+            dict: Pool status dictionaries keyed by database path.
+        """
+        return {pool.db_path: pool.status() for pool in self.pools}
 
     def force_close_all(self):
         """ Force close all connections to avoid leaks """
+        for pool in self.pools.copy():
+            pool.close()
         for conn in self.open_connections.copy():
-            print(f"DEBUG: Force closing lingering connection {conn}")
+            log.debug("Force closing lingering connection %s", conn)
             conn.close()
             self.remove_connection(conn)
 
+
+class ConnectionPool:
+    """
+    Bounded pool of read connections around one serialized writer connection.
+
+    Each thread that checks out a reader gets its own sqlite3 connection, so
+    background fetches never share a cursor with the Tk main thread. Writes
+    go through the single writer connection, one thread at a time.
+    """
+
+    def __init__(self, db_path, writer, max_readers=POOL_MAX_READERS, timeout=POOL_TIMEOUT, tracker=None):
+        self.db_path = db_path
+        self.writer = writer
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.tracker = tracker
+        self.profile = PRAGMA_PROFILE
+        self.closed = False
+        self._slots = threading.BoundedSemaphore(max_readers)
+        self._idle = queue.LifoQueue()
+        self._readers = []
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        self._local = threading.local()
+
+    def _open_reader(self):
+        connection = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        connection.row_factory = sqlite3.Row
+        apply_pragmas(connection, self.profile)
+        connection.execute("PRAGMA query_only = ON;")
+        with self._lock:
+            self._readers.append(connection)
+        if self.tracker:
+            self.tracker.add_connection(connection)
+        return connection
+
+    def checkout_reader(self, timeout=None):
+        """
+        Check out a read connection for the calling thread.
+
+        A thread that already holds a reader gets the same connection back, so
+        nested checkouts never deadlock on the pool bound.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free slot. Defaults to the pool timeout.
+
+        Returns:
+            sqlite3.Connection: A read-only connection owned by the calling thread.
+
+        Raises:
+            TimeoutError: If every reader stays busy for the whole timeout.
+        """
+        if self.closed:
+            raise RuntimeError(f"Connection pool for {self.db_path} is closed.")
+
+        held = getattr(self._local, "reader", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(
+                f"No read connection available for {self.db_path} within {timeout}s "
+                f"({self.max_readers} in use)."
+            )
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._open_reader()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+        self._local.reader = connection
+        self._local.depth = 1
+        return connection
+
+    def checkin_reader(self, connection):
+        """ Return a read connection checked out by the calling thread. """
+        if getattr(self._local, "reader", None) is not connection:
+            raise ValueError("Read connection was not checked out by this thread.")
+
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+
+        self._local.reader = None
+        with self._lock:
+            self._in_use -= 1
+        if self.closed:
+            connection.close()
+            if self.tracker:
+                self.tracker.remove_connection(connection)
+        else:
+            self._idle.put(connection)
+        self._slots.release()
+
+    def checkout_writer(self, timeout=None):
+        """
+        Acquire exclusive use of the writer connection.
+
+        Returns:
+            sqlite3.Connection: The writer connection.
+
+        Raises:
+            TimeoutError: If another thread holds the writer for the whole timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not self._writer_lock.acquire(timeout=timeout):
+            raise TimeoutError(f"Writer connection for {self.db_path} busy for more than {timeout}s.")
+        self._writer_depth += 1
+        return self.writer
+
+    def checkin_writer(self):
+        """ Release the writer connection acquired by checkout_writer(). """
+        self._writer_depth -= 1
+        self._writer_lock.release()
+
+    @contextmanager
+    def reader(self, timeout=None):
+        connection = self.checkout_reader(timeout)
+        try:
+            yield connection
+        finally:
+            self.checkin_reader(connection)
+
+    @contextmanager
+    def writer_connection(self, timeout=None):
+        connection = self.checkout_writer(timeout)
+        try:
+            yield connection
+        finally:
+            self.checkin_writer()
+
+    def status(self):
+        """
+        Snapshot of pool occupancy.
+
+        Returns:
+            dict: Reader counts, the configured bound and whether the writer is held.
+        """
+        with self._lock:
+            readers_open = len(self._readers)
+            readers_in_use = self._in_use
+        return {
+            "max_readers": self.max_readers,
+            "readers_open": readers_open,
+            "readers_in_use": readers_in_use,
+            "readers_idle": readers_open - readers_in_use,
+            "writer_busy": self._writer_depth > 0,
+        }
+
+    def close(self):
+        """ Close idle readers now; readers still checked out close on checkin. """
+        self.closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            if self.tracker:
+                self.tracker.remove_connection(connection)
+            with self._lock:
+                self._readers.remove(connection)
+        if self.tracker:
+            self.tracker.unregister_pool(self)
+
+
+_WRITE_TARGET = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"'`\[]?(\w+)",
+    re.IGNORECASE,
+)
+_write_targets = {}
+
+
+def written_table(query):
+    """ Returns the table an INSERT, UPDATE, DELETE or REPLACE statement writes to, else None. """
+    table = _write_targets.get(query)
+    if table is None and query not in _write_targets:
+        match = _WRITE_TARGET.match(query)
+        table = match.group(1) if match else None
+        _write_targets[query] = table
+    return table
+
+
+def _resolve_params(params):
+    """ Replace StringVar parameters with their current values. """
+    if isinstance(params, dict):
+        return {k: (v.get() if isinstance(v, StringVar) else v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return tuple((v.get() if isinstance(v, StringVar) else v) for v in params)
+    return params
+
+
 class DatabaseTransactionManager:
-    _instance = None  # Singleton instance
+    _instances = {}  # One manager (and one pool) per database file
     connection_tracker = ConnectionTracker()
 
     def __new__(cls, db_path):
-        if cls._instance is None:
-            cls._instance = super(DatabaseTransactionManager, cls).__new__(cls)
-            cls._instance._init(db_path)
-        return cls._instance
+        if db_path not in cls._instances:
+            instance = super(DatabaseTransactionManager, cls).__new__(cls)
+            instance._init(db_path)
+            cls._instances[db_path] = instance
+        return cls._instances[db_path]
 
     def _init(self, db_path):
         """ Initialize database connection only once """
-        self.connection = sqlite3.connect(db_path, timeout=10)
+        self.db_path = db_path
+        # The writer is shared across threads, serialized by the pool's writer lock
+        self.connection = sqlite3.connect(
+            db_path, timeout=10, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
         self.connection.row_factory = sqlite3.Row
+        apply_pragmas(self.connection)
         self.cursor = self.connection.cursor()
         self.in_transaction = False
+        self._changes_at_begin = 0
+        self._write_listeners = []
+        self._written_tables = set()
         self.connection_tracker.add_connection(self.connection)
+        self.pool = ConnectionPool(db_path, self.connection, tracker=self.connection_tracker)
+        self.connection_tracker.register_pool(self.pool)
         
     def close(self):
         """ Close the database connection and reset the singleton """
+        self.pool.close()
         self.cursor.close()
         self.connection.close()
         self.connection_tracker.remove_connection(self.connection)
-        DatabaseTransactionManager._instance = None
+        DatabaseTransactionManager._instances.pop(self.db_path, None)
+
+    def use_pragma_profile(self, profile):
+        """
+        Switch the writer, and readers opened from now on, to another PRAGMA profile.
+
+        Args:
+            profile (str): Profile name from PRAGMA_PROFILES.
+
+        Raises:
+            RuntimeError: If a transaction is open on the writer.
+        """
+        with self.pool.writer_connection():
+            if self.in_transaction:
+                raise RuntimeError("Cannot change PRAGMA profile while a transaction is open.")
+            apply_pragmas(self.connection, profile)
+            self.pool.profile = profile
+
+    def add_write_listener(self, callback):
+        """
+        Register callback(table_name), called after every write to a table.
+
+        Writes are reported when the statement runs, and the same tables are
+        reported again if the transaction is rolled back, so caches of table
+        contents can drop their copy either way.
+        """
+        if callback not in self._write_listeners:
+            self._write_listeners.append(callback)
+
+    def remove_write_listener(self, callback):
+        if callback in self._write_listeners:
+            self._write_listeners.remove(callback)
+
+    def notify_write(self, table_name):
+        """ Report a write to table_name made outside execute_query / execute_non_query / execute_many. """
+        if not table_name:
+            return
+        if self.in_transaction:
+            self._written_tables.add(table_name)
+        for callback in list(self._write_listeners):
+            callback(table_name)
+
+    def has_uncommitted_writes(self):
+        """
+        Whether the open transaction has written anything yet.
+
+        Pooled readers cannot see those rows, so callers that must show them
+        (e.g. a table refresh while an edit awaits confirmation) should read
+        through the writer instead.
+        """
+        return self.in_transaction and self.connection.total_changes != self._changes_at_begin
+
+    def execute_read(self, query, params=None, timeout=None, debug=DEBUG):
+        """
+        Execute a SELECT on a pooled read connection owned by the calling thread.
+
+        Safe to call from worker threads. Reads only see committed data, never
+        the writer's open transaction.
+
+        Returns:
+            list: Rows as dictionaries.
+        """
+        if debug:
+            log.debug("Query: %s", query)
+            log.debug("Params: %s", params)
+        params = _resolve_params(params) or ()
+        waited = time.perf_counter()
+        with self.pool.reader(timeout) as connection:
+            started = time.perf_counter()
+            rows, cursor = None, None
+            try:
+                cursor = connection.execute(query, params)
+                rows = [dict(row) for row in cursor.fetchall()]
+                return rows
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                query_metrics.record(
+                    query, time.perf_counter() - started, len(rows or ()), 0, started - waited,
+                    connection, params, error=rows is None,
+                )
 
     def begin_transaction(self, debug=DEBUG):
         if debug:
-            print(f"DEBUG: Checking if transaction is active: {self.in_transaction}")  # Debugging
+            log.debug("Checking if transaction is active: %s", self.in_transaction)
         """
         Start a transaction for the current operation.
         """
-        if not self.in_transaction:
-            self.connection.execute("BEGIN TRANSACTION;")
-            self.in_transaction = True
-            if debug:
-                print("DEBUG: Transaction started inside begin_transaction()")  # Debugging
+        with self.pool.writer_connection():
+            if not self.in_transaction:
+                self.connection.execute("BEGIN TRANSACTION;")
+                self.in_transaction = True
+                self._changes_at_begin = self.connection.total_changes
+                if debug:
+                    log.debug("Transaction started inside begin_transaction()")
 
     def commit_transaction(self, debug=DEBUG):
         """
         Commit the current transaction and finalize the changes.
         """
-        if self.in_transaction:
-            self.connection.commit()
-            self.in_transaction = False
-            if debug:
-                print("DEBUG: Transaction committed.")
+        with self.pool.writer_connection():
+            if self.in_transaction:
+                self.connection.commit()
+                self.in_transaction = False
+                self._written_tables.clear()
+                if debug:
+                    log.debug("Transaction committed.")
 
     def execute_query(self, query, params=None, transactional=True, debug=DEBUG):
         """
         Execute a query on the SQLite database and return results as dictionaries.
+
+        SELECTs issued from a worker thread are served by that thread's pooled
+        read connection; everything else runs on the serialized writer. A
+        SELECT on the writer sees an open transaction but never starts one,
+        since nothing would commit it and journaled actions need none open.
         """
+        is_select = query.strip().lower().startswith("select")
+        if is_select and threading.current_thread() is not threading.main_thread():
+            return self.execute_read(query, params, debug=debug)
+        transactional = transactional and not is_select
+
+        waited = time.perf_counter()
+        self.pool.checkout_writer()
+        started = time.perf_counter()
+        rows, changes, failed = None, 0, True
         try:
             if debug:
-                print(f"DEBUG EXECUTE: Query type: {type(query)}, Query: {query}")
-                print(f"DEBUG EXECUTE: Params: {params}")# Preprocess params to handle StringVar objects
+                log.debug("Query type: %s, Query: %s", type(query), query)
+                log.debug("Params: %s", params)
+            # Preprocess params to handle StringVar objects
             if params:
-                if isinstance(params, dict):
-                    params = {k: (v.get() if isinstance(v, StringVar) else v) for k, v in params.items()}
-                elif isinstance(params, (list, tuple)):
-                    params = tuple((v.get() if isinstance(v, StringVar) else v) for v in params)
+                params = _resolve_params(params)
 
             # Start transaction if needed
             if transactional:
                 self.begin_transaction()
                 if debug:
-                    print("DEBUG: Transaction started.")
+                    log.debug("Transaction started.")
 
             # Execute the query
             if params:
@@ -103,121 +469,337 @@ class DatabaseTransactionManager:
                 self.cursor.execute(query)
 
             # Fetch results for SELECT queries
-            if query.strip().lower().startswith("select"):
-                return [dict(row) for row in self.cursor.fetchall()]
+            if is_select:
+                rows = [dict(row) for row in self.cursor.fetchall()]
+                failed = False
+                return rows
+            changes = self.cursor.rowcount
+            failed = False
+            self.notify_write(written_table(query))
 
             # Commit the transaction if transactional
             if transactional:
                 self.commit_transaction()
                 if debug:
-                    print("DEBUG: Transaction committed.")
+                    log.debug("Transaction committed.")
 
         except Exception as e:
             # Rollback transaction on error
             if transactional:
                 self.rollback_transaction()
                 if debug:
-                    print("DEBUG: Transaction rolled back due to error.")
-            print(f"Unexpected error: {e}")
+                    log.debug("Transaction rolled back due to error.")
+            log.error("Unexpected error: %s", e)
             raise e
         finally:
-            print(f"DEBUG: Closing connection in execute_query")
-            #self.close()  # Ensure connection is closed
+            query_metrics.record(
+                query, time.perf_counter() - started, len(rows or ()), changes, started - waited,
+                self.connection, params, error=failed,
+            )
+            self.pool.checkin_writer()
 
     def execute_non_query(self, query, params=None, transactional=True, commit=False, debug=DEBUG):
         """
         Execute a non-query SQL statement (e.g., INSERT, UPDATE, DELETE).
+
+        Returns:
+            int: The rowid of the last inserted row (for INSERT statements).
         """
+        waited = time.perf_counter()
+        self.pool.checkout_writer()
+        started = time.perf_counter()
+        changes, failed = 0, True
         try:
             if debug:
-                print(f"DEBUG EXECUTE_NON_QUERY: Query type: {type(query)}, Query: {query}")
-                print(f"DEBUG EXECUTE_NON_QUERY: Params: {params}")# Preprocess params to handle StringVar objects
+                log.debug("Query type: %s, Query: %s", type(query), query)
+                log.debug("Params: %s", params)
             # Preprocess params to handle StringVar objects
             if params:
-                if isinstance(params, dict):
-                    params = {k: (v.get() if isinstance(v, StringVar) else v) for k, v in params.items()}
-                elif isinstance(params, (list, tuple)):
-                    params = tuple((v.get() if isinstance(v, StringVar) else v) for v in params)
+                params = _resolve_params(params)
 
             # Start transaction if needed
             if transactional and not self.in_transaction:
                 self.begin_transaction()
                 if debug:
-                    print("DEBUG EXECUTE NON: Transaction started.")
+                    log.debug("Transaction started.")
 
             # Execute the query
             if params:
                 self.cursor.execute(query, params)
             else:
                 self.cursor.execute(query)
+            changes = self.cursor.rowcount
+            failed = False
+            self.notify_write(written_table(query))
 
             # Explicitly commit if requested
             if commit:
                 self.commit_transaction()
                 if debug:
-                    print("DEBUG: Transaction committed after non-query execution.")
+                    log.debug("Transaction committed after non-query execution.")
             else:
                 if debug:
-                    print("DEBUG: Transaction left open for potential rollback.")     
+                    log.debug("Transaction left open for potential rollback.")
+
+            return self.cursor.lastrowid
                     
         except Exception as e:
             # Rollback transaction on error
             if transactional:
                 self.rollback_transaction()
                 if debug:
-                    print(f"DEBUG: Transaction rolled back due to error. Unexpected error: {e} ")
+                    log.debug("Transaction rolled back due to error. Unexpected error: %s ", e)
             raise e
+        finally:
+            query_metrics.record(
+                query, time.perf_counter() - started, 0, changes, started - waited, self.connection, params, error=failed
+            )
+            self.pool.checkin_writer()
 
+    def _execute_chunk(self, query, chunk, wait=0.0):
+        """
+        Run one chunk of parameter sets inside a savepoint on the writer.
 
+        The whole chunk goes through executemany first. If any row fails, the
+        chunk is rolled back to the savepoint and replayed row by row, so good
+        rows still apply and only the bad ones are reported.
 
-    def rollback_transaction(self, debug=DEBUG):
+        Args:
+            wait (float): Seconds the caller waited for the writer, for the query metrics.
+
+        Returns:
+            list: (offset within chunk, error message) for every failed row.
         """
-        Rollback the current transaction, undoing all changes made since it started.
+        started = time.perf_counter()
+        changes_before = self.connection.total_changes
+        failures = []
+        self.connection.execute("SAVEPOINT batch_chunk;")
+        try:
+            self.cursor.executemany(query, chunk)
+        except sqlite3.Error:
+            self.connection.execute("ROLLBACK TO SAVEPOINT batch_chunk;")
+            for offset, params in enumerate(chunk):
+                self.connection.execute("SAVEPOINT batch_row;")
+                try:
+                    self.cursor.execute(query, params)
+                except sqlite3.Error as e:
+                    self.connection.execute("ROLLBACK TO SAVEPOINT batch_row;")
+                    failures.append((offset, str(e)))
+                self.connection.execute("RELEASE SAVEPOINT batch_row;")
+        self.connection.execute("RELEASE SAVEPOINT batch_chunk;")
+        query_metrics.record(
+            query, time.perf_counter() - started, 0, self.connection.total_changes - changes_before, wait,
+            self.connection, chunk[0] if chunk else None,
+        )
+        return failures
+
+    def execute_many(self, query, param_rows, chunk_size=BATCH_CHUNK_SIZE, commit=True, debug=DEBUG):
         """
-        if self.in_transaction:
+        Execute one statement for every parameter set, committing in chunks.
+
+        A failing row does not abort the batch: it is reported and the other
+        rows in its chunk still apply.
+
+        Args:
+            query (str): SQL statement with named or positional placeholders.
+            param_rows (iterable): Parameter dicts (or tuples), consumed lazily.
+            chunk_size (int): Rows per transaction.
+            commit (bool): Commit after each chunk. With False, the rows join the
+                open transaction and the caller commits.
+
+        Returns:
+            dict: {"succeeded": int, "failed": [(index, params, error message), ...]}
+        """
+        result = {"succeeded": 0, "failed": []}
+
+        def run(chunk, start):
+            waited = time.perf_counter()
+            with self.pool.writer_connection():
+                wait = time.perf_counter() - waited
+                self.begin_transaction(debug=False)
+                try:
+                    failures = self._execute_chunk(query, chunk, wait)
+                except Exception:
+                    self.rollback_transaction()
+                    raise
+                self.notify_write(written_table(query))
+                if commit:
+                    self.commit_transaction(debug=False)
+            for offset, error in failures:
+                result["failed"].append((start + offset, chunk[offset], error))
+            result["succeeded"] += len(chunk) - len(failures)
             if debug:
-                 print("DEBUG: Rolling back transaction...")
-            self.connection.rollback()
-            self.in_transaction = False
+                log.debug("execute_many chunk of %s rows, %s failed", len(chunk), len(failures))
+
+        chunk, start = [], 0
+        for index, params in enumerate(param_rows):
+            chunk.append(_resolve_params(params))
+            if len(chunk) >= chunk_size:
+                run(chunk, start)
+                chunk, start = [], index + 1
+        if chunk:
+            run(chunk, start)
+        return result
+
+    def bulk_upsert(self, context_name, rows, chunk_size=BATCH_CHUNK_SIZE, commit=True, debug=DEBUG):
+        """
+        Insert or update many rows of a context using the query_generator queries.
+
+        Rows whose primary key already exists are updated; missing columns keep
+        their stored values. Other rows are inserted, keeping an explicit primary
+        key when one is given, and missing columns fall back to the column
+        "default" from COLUMN_DEFINITIONS. Existence is checked with one query
+        per chunk, and each chunk commits on its own.
+
+        Args:
+            context_name (str): The context/table name (e.g., "Parts").
+            rows (iterable): Row dicts keyed by column name, consumed lazily.
+            chunk_size (int): Rows per transaction.
+            commit (bool): Commit after each chunk.
+
+        Returns:
+            dict: {"inserted": int, "updated": int, "failed": [(index, row, error message), ...]}
+        """
+        from core.query_builder import query_generator
+        from core.config_utils import get_primary_key
+
+        queries = query_generator(context_name)
+        primary_key = get_primary_key(context_name)
+        columns = COLUMN_DEFINITIONS[context_name]["columns"]
+
+        insert_query = queries["insert_query"]
+        insert_with_key_query = insert_query.replace(
+            f"INSERT INTO {context_name} (", f"INSERT INTO {context_name} ({primary_key}, ", 1
+        ).replace("VALUES (", f"VALUES (:{primary_key}, ", 1)
+        update_query = queries["update_query"]
+        insert_params = re.findall(r":(\w+)", insert_query)
+        update_params = re.findall(r":(\w+)", update_query)
+        existing_query_prefix = f"SELECT {', '.join(dict.fromkeys(update_params))} FROM {context_name} WHERE {primary_key} IN "
+
+        result = {"inserted": 0, "updated": 0, "failed": []}
+
+        def run(chunk, start):
+            keys = [row.get(primary_key) for row in chunk if row.get(primary_key) not in (None, "")]
+            existing = {}
+            with self.pool.writer_connection():
+                if keys:
+                    placeholders = ", ".join("?" for _ in keys)
+                    cursor = self.connection.execute(f"{existing_query_prefix}({placeholders})", keys)
+                    existing = {str(row[primary_key]): dict(row) for row in cursor.fetchall()}
+
+                batches = {"update": ([], []), "insert": ([], []), "insert_with_key": ([], [])}
+                for offset, row in enumerate(chunk):
+                    key = row.get(primary_key)
+                    if key not in (None, "") and str(key) in existing:
+                        params = {**existing[str(key)], **{k: v for k, v in row.items() if k in update_params}}
+                        kind = "update"
+                    else:
+                        params = {
+                            name: row.get(name, columns.get(name, {}).get("default"))
+                            for name in insert_params
+                        }
+                        kind = "insert"
+                        if key not in (None, ""):
+                            params[primary_key] = key
+                            kind = "insert_with_key"
+                    batches[kind][0].append(params)
+                    batches[kind][1].append(offset)
+
+                self.begin_transaction(debug=False)
+                try:
+                    for kind, query in (("update", update_query), ("insert", insert_query), ("insert_with_key", insert_with_key_query)):
+                        params_list, offsets = batches[kind]
+                        if not params_list:
+                            continue
+                        failures = self._execute_chunk(query, params_list)
+                        for offset, error in failures:
+                            result["failed"].append((start + offsets[offset], chunk[offsets[offset]], error))
+                        count = len(params_list) - len(failures)
+                        result["updated" if kind == "update" else "inserted"] += count
+                except Exception:
+                    self.rollback_transaction()
+                    raise
+                self.notify_write(context_name)
+                if commit:
+                    self.commit_transaction(debug=False)
             if debug:
-                print("DEBUG: Transaction rollback succesfull.")
-            else:
-                print("DEBUG: No active transaction to rollback")
+                log.debug("bulk_upsert chunk of %s rows for %s", len(chunk), context_name)
+
+        chunk, start = [], 0
+        for index, row in enumerate(rows):
+            chunk.append(_resolve_params(row))
+            if len(chunk) >= chunk_size:
+                run(chunk, start)
+                chunk, start = [], index + 1
+        if chunk:
+            run(chunk, start)
+
+        result["failed"].sort(key=lambda failure: failure[0])
+        return result
+
+    def rollback_transaction(self, debug=DEBUG):
+        """
+        Rollback the current transaction, undoing all changes made since it started.
+        """
+        with self.pool.writer_connection():
+            if self.in_transaction:
+                if debug:
+                     log.debug("Rolling back transaction...")
+                self.connection.rollback()
+                self.in_transaction = False
+                written, self._written_tables = self._written_tables, set()
+                for table_name in written:
+                    self.notify_write(table_name)
+                if debug:
+                    log.debug("Transaction rollback succesfull.")
+                else:
+                    log.debug("No active transaction to rollback")
 
      
 db_manager = DatabaseTransactionManager(DATABASE)
 
-def undo_last_action(table, fetch_query, debug=DEBUG):
+def _show_replayed(table, result):
+    """ Refreshes the rows of table that an undo or redo changed. """
+    from ui.shared_utils import get_table_state, refresh_rows
+
+    keys = result["changes"].get(get_table_state(table)["context"], [])
+    if keys:
+        refresh_rows(table, keys)
+
+
+def undo_last_action(table, debug=DEBUG):
     """
-    Undo the last database transaction by rolling it back and refreshing the table.
+    Undo the most recent saved action from the journal and refresh the table.
     """
+    from core.journal import undo
+
     try:
-        if not db_manager.in_transaction:
-            print("DEBUG: No active transaction to rollback.")
-            messagebox.showerror("Undo Failed", "No active transaction to rollback.")
+        result = undo(db_manager, debug=debug)
+        if result is None:
+            messagebox.showinfo("Undo", "Nothing to undo.")
             return
+        _show_replayed(table, result)
+        messagebox.showinfo("Undo", f"Undid: {result['description']}.")
 
-        print("DEBUG: Attempting rollback...")
-        db_manager.rollback_transaction()
-
-        # Fetch updated data from the database
-        print("DEBUG: Fetching data after rollback...")
-        rows = db_manager.execute_query(fetch_query)
+    except Exception as e:
+        log.error("Undo failed: %s", e)
+        messagebox.showerror("Undo Failed", f"Could not undo the last action: {e}")
 
-        if rows:
-            print(f"DEBUG: Data after rollback: {rows}")
-        else:
-            print("DEBUG: No changes detected after rollback.")
 
-        # Clear and repopulate the table
-        table.delete(*table.get_children())
-        for row in rows:
-            table.insert("", "end", values=tuple(row.values()))
+def redo_last_action(table, debug=DEBUG):
+    """
+    Re-apply the most recently undone action and refresh the table.
+    """
+    from core.journal import redo
 
-        messagebox.showinfo("Undo", "Last action has been undone successfully.")
+    try:
+        result = redo(db_manager, debug=debug)
+        if result is None:
+            messagebox.showinfo("Redo", "Nothing to redo.")
+            return
+        _show_replayed(table, result)
+        messagebox.showinfo("Redo", f"Redid: {result['description']}.")
 
     except Exception as e:
-        print(f"DEBUG: Undo failed: {e}")
-        messagebox.showerror("Undo Failed", f"Could not undo the last action: {e}")
-
-
+        log.error("Redo failed: %s", e)
+        messagebox.showerror("Redo Failed", f"Could not redo the action: {e}")
@@ -2,9 +2,13 @@ import sqlite3
 import tkinter as tk
 from tkinter import messagebox, StringVar
 
-from config.config_data import DEBUG, DATABASE, COLUMN_DEFINITIONS
-from core.database_transactions import DatabaseTransactionManager
+from config.config_data import DATABASE, COLUMN_DEFINITIONS
+from core.database_transactions import DatabaseTransactionManager, apply_pragmas
+from core.config_utils import is_list_column
 from ui.ui_helpers import center_window_vertically
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 # Initialize db_manager once
 db_manager = DatabaseTransactionManager(DATABASE)
@@ -19,11 +23,11 @@ def get_connection(db_name=DATABASE):
     try:
         connection = sqlite3.connect(db_name)
         connection.row_factory = sqlite3.Row  # Enable dictionary-based row retrieval
+        apply_pragmas(connection)  # WAL, cache and busy timeout from PRAGMA_PROFILE
         connection.execute("PRAGMA foreign_keys = ON;")  # Enforce foreign key constraints
         return connection
     except sqlite3.Error as e:
-        if DEBUG:
-            print(f"Error connecting to database: {e}")
+        log.warning("Error connecting to database: %s", e)
         return None
     except Exception as e:
         messagebox.showerror("Error", f"Unexpected error: {e}")
@@ -38,8 +42,7 @@ def close_connection(connection):
     try:
         connection.close()
     except sqlite3.Error as e:
-        if DEBUG:
-            print(f"Error closing connection: {e}")
+        log.warning("Error closing connection: %s", e)
     except Exception as e:
         messagebox.showerror("Error", f"Unexpected error: {e}")
 
@@ -64,9 +67,9 @@ def process_column_definitions(context):
     context_config = COLUMN_DEFINITIONS.get(context, {})
     columns = context_config.get("columns", {})
 
-    # Filter out columns with admin: True
+    # Filter out admin and BLOB columns
     filtered_columns = {
-        col: details for col, details in columns.items() if not details.get("admin", False)
+        col: details for col, details in columns.items() if is_list_column(details)
     }
 
     return filtered_columns
@@ -74,6 +77,7 @@ def process_column_definitions(context):
 def get_processed_column_definitions(column_definitions, exclude_hidden=True, debug=False):
     """
     Processes column definitions, optionally filtering out hidden or admin-only columns.
+    BLOB columns are always left out (they are read on demand, see core.blobs).
 
     Args:
         column_definitions (dict): Dictionary of column definitions.
@@ -83,28 +87,28 @@ def get_processed_column_definitions(column_definitions, exclude_hidden=True, de
         list: A list of column names, optionally excluding hidden or admin-only columns.
     """
     if debug:
-        print(f"get_processed_column_definitions called with:")
-        print(f"  column_definitions: {column_definitions} (type: {type(column_definitions)})")
-        print(f"  exclude_hidden: {exclude_hidden}")
+        log.debug("get_processed_column_definitions called with:")
+        log.debug("  column_definitions: %s (type: %s)", column_definitions, type(column_definitions))
+        log.debug("  exclude_hidden: %s", exclude_hidden)
     
     if not isinstance(column_definitions, dict):
         raise TypeError(f"Expected 'column_definitions' to be a dictionary, got {type(column_definitions).__name__}. Value: {column_definitions}")
     
     if debug:
-        print(f"Processing column definitions: {column_definitions}")
+        log.debug("Processing column definitions: %s", column_definitions)
     processed_columns= {
         col: details
         for col, details in column_definitions.items()
-        if details.get("is_primary_key", False) or not (exclude_hidden and details.get("admin", False))
+        if details.get("is_primary_key", False) or (is_list_column(details) if exclude_hidden else details.get("type") != "blob")
     }
     
     return processed_columns
 
 def add_item(context_name, table=None, insert_query=None, fetch_query=None, post_insert_callback=None, debug=False):
     if debug:
-        print(f"Context: {context_name}")
-        print(f"Insert Query: {insert_query}")
-        print(f"Fetch Query: {fetch_query}")
+        log.debug("Context: %s", context_name)
+        log.debug("Insert Query: %s", insert_query)
+        log.debug("Fetch Query: %s", fetch_query)
 
     """
     Opens a window to add a new item and refreshes the table upon success.
@@ -116,7 +120,7 @@ def add_item(context_name, table=None, insert_query=None, fetch_query=None, post
         fetch_query (str, optional): SQL query to fetch updated data. If None, skip fetching.
         post_insert_callback (callable, optional): Function to execute after insertion (e.g., return to build_assembly).
     """
-    from ui.shared_utils import populate_table
+    from ui.shared_utils import refresh_rows
     from forms.data_entry_form import build_form
     from forms.validation import validate_form_data, validate_foreign_keys
    
@@ -138,11 +142,11 @@ def add_item(context_name, table=None, insert_query=None, fetch_query=None, post
     editable_columns = {
         col_name: col_details
         for col_name, col_details in columns.items()
-        if not col_details.get("admin", False) and not col_details.get("is_primary_key", False)
+        if is_list_column(col_details) and not col_details.get("is_primary_key", False)
     }
 
     if debug:
-        print(f"DEBUG: Editable columns for add_item: {editable_columns}")
+        log.debug("Editable columns for add_item: %s", editable_columns)
 
 
     # Build form fields dynamically
@@ -154,34 +158,23 @@ def add_item(context_name, table=None, insert_query=None, fetch_query=None, post
             # Collect data from the form
             form_data = {col_name: var.get() for col_name, var in entry_widgets.items()}
             if debug:
-                print(f"DEBUG: Form data for new item: {form_data}")
-
-            # Insert into the database and commit
-            db_manager.execute_non_query(insert_query, form_data, commit=False)
-
-            # Ask user if they want to finalize the addition
-            confirm = messagebox.askyesno("Confirm Save", "Do you want to save this item permanently?")
-            if confirm:
-                db_manager.commit_transaction()
-                if debug:
-                    print("DEBUG: User confirmed save, transaction committed.")
-            
+                log.debug("Form data for new item: %s", form_data)
+
+            # Insert and commit at once; the Undo button reverts it from the journal
+            new_id = save_new_item(context_name, insert_query, form_data, f"Add {context_name}")
+
             # Refresh the table with updated data
             if debug:
-                print(f"DEBUG: Fetching updated data for {context_name}.")
-            rows = db_manager.execute_query(fetch_query)
-
-            # Clear and repopulate the table
-            table.delete(*table.get_children())
-            for row in rows:
-                table.insert("", "end", values=tuple(row.values()))
+                log.debug("Fetching updated data for %s.", context_name)
+            if table is not None:
+                refresh_rows(table, [new_id])
 
             messagebox.showinfo("Success", f"New {context_name} added successfully.")
             form_window.destroy()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add new {context_name}: {e}")
-            print(f"DEBUG: Error while adding new item: {e}")
+            log.error("Error while adding new item: %s", e)
 
    # Add Save button
     save_button = tk.Button(form_window, text="Save", command=save_item, bg="green", fg="white")
@@ -206,6 +199,8 @@ def update_item_in_db(context, columns, form_data, update_query, debug=False):
     Raises:
         Exception: If the database update fails.
     """
+    from domain.bom import ROLLUP_INPUTS, recalculate_for_edit
+
     try:
         # Extract the primary key and its value
         primary_key = next(
@@ -232,15 +227,27 @@ def update_item_in_db(context, columns, form_data, update_query, debug=False):
         # Add primary key value to parameters
         params["primary_key_value"] = primary_key_value
 
+        # Keep the old values of rollup inputs so only the affected assemblies are recomputed
+        old_row = None
+        if context in ROLLUP_INPUTS:
+            rows = db_manager.execute_query(
+                f"SELECT * FROM {context} WHERE {primary_key} = :primary_key_value",
+                {"primary_key_value": primary_key_value},
+            )
+            old_row = rows[0] if rows else None
+
         # Execute the update query
         db_manager.execute_non_query(update_query, params)
+
+        # Update the assembly rollups in the same transaction
+        recalculate_for_edit(context, old_row, params)
         
         if debug:
-            print(f"DEBUG: Update successful for context: {context}")
+            log.debug("Update successful for context: %s", context)
         
     except Exception as e:
         messagebox.showerror("Error", f"Failed to update the {context}: {e}")
-        print(f"ERROR: {e}")
+        log.error("Error while updating %s: %s", context, e)
         raise
 
 def edit_item(context, table, fetch_query, update_query, debug=False):
@@ -259,6 +266,9 @@ def edit_item(context, table, fetch_query, update_query, debug=False):
     from core.database_transactions import db_manager
     from forms.validation import validate_form_data
     from forms.data_entry_form import build_form
+    from ui.shared_utils import refresh_rows
+    from domain.bom import recalculate_for_edit
+    from core.journal import journaled
 
     
     # Fetch all column definitions
@@ -268,16 +278,16 @@ def edit_item(context, table, fetch_query, update_query, debug=False):
         return
 
     if debug:
-        print(f"DEBUG: All columns for edit_item: {all_columns}")
+        log.debug("All columns for edit_item: %s", all_columns)
 
     # Filter editable columns (exclude admin fields)
     editable_columns = {
         col_name: col_details
         for col_name, col_details in all_columns.items()
-        if not col_details.get("admin", False)
+        if is_list_column(col_details)
     }
     if debug:
-        print(f"DEBUG: Editable columns: {editable_columns}")
+        log.debug("Editable columns: %s", editable_columns)
 
     # Fetch initial data for the form
     selected_item = table.selection()
@@ -287,7 +297,7 @@ def edit_item(context, table, fetch_query, update_query, debug=False):
 
     initial_data = {col_name: table.set(selected_item, col_name) for col_name in editable_columns.keys()}
     if debug:
-        print(f"DEBUG: Initial data for edit form: {initial_data}")
+        log.debug("Initial data for edit form: %s", initial_data)
 
     # Build the form
     form_window, entry_widgets = build_form(context, editable_columns, initial_data)
@@ -297,41 +307,33 @@ def edit_item(context, table, fetch_query, update_query, debug=False):
             # Collect form data
             form_data = {col_name: var.get() for col_name, var in entry_widgets.items()}
             if debug:
-                print(f"DEBUG: Form data collected for {context}: {form_data}")
+                log.debug("Form data collected for %s: %s", context, form_data)
 
             # Validate form data before updating
             validate_form_data(context, form_data)
 
-            # Update the database
-            # Update the database and commit
-            db_manager.execute_non_query(update_query, form_data, commit=False)
-
-            # Ask user if they want to finalize the update
-            confirm = messagebox.askyesno("Confirm Save", "Do you want to save these changes?")
-            if confirm:
-                db_manager.commit_transaction()
-                print("DEBUG: User confirmed edit, transaction committed.")
-                messagebox.showinfo("Success", f"{context} updated successfully.")
-
-            else:
-                print("DEBUG: User did not confirm edit, keeping transaction open for rollback.")  
-                
-            #Fetch updated data and refresh the table
-            if debug:
-                print(f"DEBUG: Fetching updated data for {context}.")
-            rows = db_manager.execute_query(fetch_query)
+            # Update the database and commit at once; the Undo button reverts it from the journal
+            with journaled(f"Edit {context}"):
+                db_manager.execute_non_query(update_query, form_data)
+
+                # Recompute the assembly rollups this edit affects, inside the same transaction
+                recalculate_for_edit(context, initial_data, form_data)
 
-            # Clear the table and repopulate with fresh data
-            table.delete(*table.get_children())
-            for row in rows:
-                table.insert("", "end", values=tuple(row.values()))
+            # Refresh only the edited row (and its old key, if the key was changed)
+            if debug:
+                log.debug("Fetching updated data for %s.", context)
+            primary_key = next(
+                (col_name for col_name, col_details in all_columns.items() if col_details.get("is_primary_key", False)),
+                None
+            )
+            refresh_rows(table, list(selected_item) + [form_data.get(primary_key)])
 
             messagebox.showinfo("Success", f"{context} updated successfully.")
             form_window.destroy()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save changes: {e}")
-            print(f"DEBUG: Error while saving changes: {e}")
+            log.error("Error while saving changes: %s", e)
 
 
     # Add Save button with grid layout
@@ -355,6 +357,9 @@ def insert_item_in_db(context, columns, form_data, insert_query, debug=False):
 
     Raises:
         Exception: If the database insertion fails.
+
+    Returns:
+        int: The rowid of the inserted item.
     """
     import tkinter as tk
     from tkinter import messagebox
@@ -371,18 +376,18 @@ def insert_item_in_db(context, columns, form_data, insert_query, debug=False):
         }
 
         if debug:
-            print(f"DEBUG: Insert parameters for {context}: {params}")
+            log.debug("Insert parameters for %s: %s", context, params)
 
         # Execute the insert query using db_manager
-        db_manager.execute_non_query(insert_query, params)
+        new_id = db_manager.execute_non_query(insert_query, params)
 
         if debug:
-            print(f"DEBUG: Insert successful for context: {context}")
+            log.debug("Insert successful for context: %s", context)
+        return new_id
 
     except Exception as e:
         messagebox.showerror("Error", f"Failed to insert the cloned {context}: {e}")
-        if debug:
-            print(f"DEBUG: Error inserting item: {e}")
+        log.error("Error inserting item: %s", e)
         raise
 
 
@@ -399,6 +404,7 @@ def clone_item(context_name, table, fetch_query, insert_query, debug=False):
     """
     from forms.data_entry_form import build_form
     from forms.validation import validate_form_data
+    from ui.shared_utils import refresh_rows
     # Fetch all column definitions
     
     all_columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
@@ -407,16 +413,16 @@ def clone_item(context_name, table, fetch_query, insert_query, debug=False):
         return
 
     if debug:
-            print(f"DEBUG: All columns for clone_item: {all_columns}")
+            log.debug("All columns for clone_item: %s", all_columns)
 
     # Filter editable columns (exclude admin fields and primary key)
     editable_columns = {
         col_name: col_details
         for col_name, col_details in all_columns.items()
-        if not col_details.get("admin", False) and not col_details.get("is_primary_key", False)
+        if is_list_column(col_details) and not col_details.get("is_primary_key", False)
     }
     if debug:
-            print(f"DEBUG: Editable columns for clone_item: {editable_columns}")
+            log.debug("Editable columns for clone_item: %s", editable_columns)
 
     # Fetch data for the selected item
     selected_item = table.selection()
@@ -426,7 +432,7 @@ def clone_item(context_name, table, fetch_query, insert_query, debug=False):
 
     original_data = {col_name: table.set(selected_item, col_name) for col_name in editable_columns.keys()}
     if debug:
-            print(f"DEBUG: Original data for cloning: {original_data}")
+            log.debug("Original data for cloning: %s", original_data)
 
     # Prepopulate the form with original data for the clone
     form_window, entry_widgets = build_form(context_name, editable_columns, original_data)
@@ -437,32 +443,31 @@ def clone_item(context_name, table, fetch_query, insert_query, debug=False):
             # Collect form data
             form_data = {col_name: var.get() for col_name, var in entry_widgets.items()}
             if debug:
-                print(f"DEBUG: Form data for cloned item: {form_data}")
+                log.debug("Form data for cloned item: %s", form_data)
 
             # Validate form data
             if not validate_form_data(context_name, form_data):
                 raise ValueError(f"Validation failed for cloned form data: {form_data}")
 
             # Insert the cloned record into the database
-            insert_item_in_db(context_name, all_columns, form_data, insert_query)
-
-            # Refresh the table with updated data
+            params = {
+                col_name: form_data.get(col_name, None)
+                for col_name, col_details in all_columns.items()
+                if not col_details.get("is_primary_key", False)
+            }
+            new_id = save_new_item(context_name, insert_query, params, f"Clone {context_name}")
+
+            # Add the clone to the table without reloading the other rows
             if debug:
-                print(f"DEBUG: Fetching updated data for {context_name}.")
-            rows = db_manager.execute_query(fetch_query)
-
-            # Clear and repopulate the table
-            table.delete(*table.get_children())
-            for row in rows:
-                table.insert("", "end", values=tuple(row.values()))
+                log.debug("Fetching updated data for %s.", context_name)
+            refresh_rows(table, [new_id])
 
             messagebox.showinfo("Success", f"{context_name} cloned successfully.")
             form_window.destroy()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to clone the {context_name}: {e}")
-            if debug:
-                print(f"DEBUG: Cloning error: {e}")
+            log.error("Cloning error: %s", e)
 
     # Add Save button with grid layout
     save_button = tk.Button(form_window, text="Save", command=save_clone, bg="green", fg="white")
@@ -485,8 +490,7 @@ def delete_item(context, table, fetch_query, delete_query, debug=False):
         delete_query (str): SQL query to delete the item.
     """
     from forms.validation import validate_table_selection
-    from ui.shared_utils import populate_table
-    from core.database_transactions import db_manager
+    from ui.shared_utils import remove_rows
     from core.config_utils import get_primary_key
 
     primary_key = get_primary_key(context)
@@ -508,7 +512,7 @@ def delete_item(context, table, fetch_query, delete_query, debug=False):
     # Confirm deletion
     confirm = messagebox.askyesno(
         "Confirm Deletion",
-        f"Are you sure you want to delete this {context} item?\n\nThis action cannot be undone."
+        f"Are you sure you want to delete this {context} item?\n\nYou can restore it with Undo."
     )
     if not confirm:
         return
@@ -516,23 +520,89 @@ def delete_item(context, table, fetch_query, delete_query, debug=False):
     # Execute the deletion query
     try:
         if debug:
-            print(f"DEBUG: Executing delete query: {delete_query} with item_id: {item_id}")
+            log.debug("Executing delete query: %s with item_id: %s", delete_query, item_id)
 
         # Execute the delete query
-        db_manager.execute_non_query(delete_query, {primary_key: item_id})
+        delete_saved_item(context, delete_query, item_id)
 
         # Notify user of success
         messagebox.showinfo("Success", f"{context} deleted successfully!")
 
-        # Refresh the table
-        if table and fetch_query:
-            populate_table(table, fetch_query)
+        # Drop the deleted row from the table
+        if table:
+            remove_rows(table, [item_id])
 
     except Exception as e:
-        if debug:
-            print(f"DEBUG: Error during deletion: {e}")
+        log.error("Error during deletion: %s", e)
         messagebox.showerror("Database Error", f"Error deleting {context}: {e}")
 
+def fetch_item(context, item_id, manager=None):
+    """
+    Returns the row of context whose primary key is item_id, or None.
+
+    Runs on the manager's writer, so it sees the writes of an open transaction.
+    """
+    from core.config_utils import get_primary_key
+
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    primary_key = get_primary_key(context)
+    rows = manager.execute_query(f"SELECT * FROM {context} WHERE {primary_key} = :item_id", {"item_id": item_id})
+    return rows[0] if rows else None
+
+
+def save_new_item(context, insert_query, params, description, manager=None):
+    """
+    Inserts a row as one undoable action, with the assembly rollups it feeds.
+
+    Args:
+        context (str): Context of the item.
+        insert_query (str): SQL INSERT query with named parameters.
+        params (dict): Values for the query.
+        description (str): Name of the action in the undo history (e.g., "Add Parts").
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Returns:
+        int: The rowid of the inserted item.
+    """
+    from core.journal import journaled
+    from domain.bom import ROLLUP_INPUTS, recalculate_for_edit
+
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with journaled(description, manager):
+        new_id = manager.execute_non_query(insert_query, params)
+        # Read the row back so defaults (e.g. ParentAssemblyID) count too
+        if context in ROLLUP_INPUTS:
+            recalculate_for_edit(context, None, fetch_item(context, new_id, manager), manager=manager)
+    return new_id
+
+
+def delete_saved_item(context, delete_query, item_id, manager=None):
+    """
+    Deletes a row as one undoable action, with the assembly rollups it fed.
+
+    Args:
+        context (str): Context of the item.
+        delete_query (str): SQL DELETE query taking the primary key as a named parameter.
+        item_id: Primary key value of the row.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+    """
+    from core.config_utils import get_primary_key
+    from core.journal import journaled
+    from domain.bom import ROLLUP_INPUTS, recalculate_for_edit
+
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with journaled(f"Delete {context}", manager):
+        old_row = fetch_item(context, item_id, manager) if context in ROLLUP_INPUTS else None
+        manager.execute_non_query(delete_query, {get_primary_key(context): item_id})
+        if old_row is not None:
+            recalculate_for_edit(context, old_row, None, manager=manager)
+
 def prepare_update_params(columns, form_data):
     """
     Prepares a dictionary of parameters for an SQL UPDATE query.
@@ -546,8 +616,8 @@ def prepare_update_params(columns, form_data):
     """
     params = {}
 
-    print(f"DEBUG: Received columns in prepare_update_params: {columns}")
-    print(f"DEBUG: Received form_data: {form_data}")
+    log.debug("Received columns in prepare_update_params: %s", columns)
+    log.debug("Received form_data: %s", form_data)
 
     for col_name, col_details in columns.items():
         # Ensure primary keys and editable fields are processed
@@ -560,7 +630,7 @@ def prepare_update_params(columns, form_data):
 
             params[col_name] = value
 
-    print(f"DEBUG: Prepared update parameters: {params}")
+    log.debug("Prepared update parameters: %s", params)
     return params
 
 
@@ -571,9 +641,9 @@ def connection_debugger(func):
     @functools.wraps(func)
     
     def wrapper(*args, **kwargs):
-        print(f"DEBUG: {func.__name__} called with args={args}, kwargs={kwargs}")
+        log.debug("%s called with args=%s, kwargs=%s", func.__name__, args, kwargs)
         result = func(*args, **kwargs)
-        print(f"DEBUG: {func.__name__} completed.")
+        log.debug("%s completed.", func.__name__)
         return result
     return wrapper
 
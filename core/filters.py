@@ -0,0 +1,113 @@
+"""
+Per-column datasheet filters, turned into parameterized WHERE clauses.
+
+Text columns match anywhere in the value (case-insensitive LIKE). Numeric
+columns match exactly, or with a leading comparison such as ">= 10".
+"""
+import re
+
+from config.config_data import COLUMN_DEFINITIONS
+
+# Column types in COLUMN_DEFINITIONS compared as numbers
+NUMERIC_TYPES = ("int", "float", "numeric", "real")
+
+# Column types that cannot be filtered
+UNFILTERABLE_TYPES = ("blob",)
+
+# Optional comparison before a numeric filter value
+_NUMERIC_FILTER = re.compile(r"^(<=|>=|<>|!=|=|<|>)?\s*(.*)$")
+
+
+def filterable_columns(column_definitions):
+    """ Returns the names of the columns that can be filtered. """
+    return [
+        col for col, details in column_definitions.items()
+        if details.get("type", "text") not in UNFILTERABLE_TYPES
+    ]
+
+
+def like_pattern(text):
+    """ Returns a LIKE pattern matching text anywhere, with %, _ and \\ matched literally. """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def parse_filters(context_name, values):
+    """
+    Turns filter text typed per column into WHERE conditions and parameters.
+
+    Args:
+        context_name (str): The context being filtered (e.g., "Parts").
+        values (dict): Column name -> filter text. Blank entries are ignored.
+
+    Returns:
+        tuple: (where_conditions, params) for generate_fetch_query_parts
+            or KeysetPager.set_filters.
+
+    Raises:
+        ValueError: If a column cannot be filtered or a numeric filter is not a number.
+    """
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    where_conditions, params = {}, {}
+
+    for col, text in values.items():
+        text = str(text or "").strip()
+        if not text:
+            continue
+        details = columns.get(col)
+        if details is None or details.get("type", "text") in UNFILTERABLE_TYPES:
+            raise ValueError(f"Cannot filter {context_name} by {col}.")
+
+        if details.get("type", "text") in NUMERIC_TYPES:
+            operator, number = _NUMERIC_FILTER.match(text).groups()
+            try:
+                value = int(number) if details.get("type") == "int" else float(number)
+            except ValueError:
+                try:
+                    value = float(number)
+                except ValueError:
+                    raise ValueError(f"{details.get('display_name', col)}: '{text}' is not a number.")
+            where_conditions[col] = "<>" if operator == "!=" else (operator or "=")
+            params[col] = value
+        else:
+            where_conditions[col] = "LIKE"
+            params[col] = like_pattern(text)
+
+    return where_conditions, params
+
+
+def filter_query(context_name, where_conditions, sort_column=None, sort_direction="ASC"):
+    """
+    Builds the datasheet SELECT for a set of filters, in the current sort order.
+
+    Args:
+        context_name (str): The context being filtered.
+        where_conditions (dict): Conditions from parse_filters (may be empty).
+        sort_column (str, optional): Column to sort by.
+        sort_direction (str, optional): "ASC" or "DESC".
+
+    Returns:
+        str: SELECT query; bind the params from parse_filters.
+
+    Raises:
+        ValueError: If the sort column or direction is invalid.
+    """
+    from core.query_builder import generate_fetch_query_parts, generate_sort_query
+
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    order_by = None
+    if sort_column:
+        sort_direction = sort_direction.upper()
+        if sort_column not in columns:
+            raise ValueError(f"Invalid sort column: {sort_column}")
+        if sort_direction not in ("ASC", "DESC"):
+            raise ValueError(f"Invalid sort direction: {sort_direction}")
+        order_by = f"{sort_column} {sort_direction}"
+
+    if where_conditions and order_by:
+        return generate_fetch_query_parts("WhereAndSort", context_name, columns, where_conditions, order_by)
+    if where_conditions:
+        return generate_fetch_query_parts("Where", context_name, columns, where_conditions)
+
+    query = generate_fetch_query_parts("Basic", context_name, columns)
+    return generate_sort_query(query, sort_column, sort_direction, columns) if order_by else query
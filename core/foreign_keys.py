@@ -0,0 +1,130 @@
+import threading
+
+from config.config_data import DEBUG
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
+def foreign_key_columns(columns):
+    """
+    Returns the foreign key columns that name a referenced table.
+
+    Args:
+        columns (dict): Column definitions for one context.
+
+    Returns:
+        dict: Column name -> (referenced table, referenced column).
+    """
+    return {
+        col_name: (col_details["references"], col_details.get("to", col_name))
+        for col_name, col_details in columns.items()
+        if col_details.get("references")
+    }
+
+
+def _key(value):
+    """ Normalizes a key so 50, "50" and " 50 " compare equal. """
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+
+class ForeignKeyResolver:
+    """
+    Checks foreign key values against cached sets of referenced keys.
+
+    Each referenced key column (e.g. Parts.PartID) is read once with a single
+    query and kept in memory until something writes to its table; the
+    manager's write listener drops the cached set. Reads go through the writer
+    connection, so keys added in the open transaction are visible.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.key_sets = {}
+        self._lock = threading.Lock()
+        manager.add_write_listener(self.invalidate)
+
+    def invalidate(self, table_name=None):
+        """ Drop the cached key sets of one table, or of every table when table_name is None. """
+        with self._lock:
+            if table_name is None:
+                self.key_sets.clear()
+            else:
+                for cached in [cached for cached in self.key_sets if cached[0].lower() == table_name.lower()]:
+                    del self.key_sets[cached]
+
+    def key_set(self, table_name, column_name, debug=DEBUG):
+        """
+        Returns every key in table_name.column_name, loading it on first use.
+
+        Returns:
+            frozenset: Normalized key strings.
+        """
+        cache_key = (table_name, column_name)
+        with self._lock:
+            keys = self.key_sets.get(cache_key)
+        if keys is not None:
+            return keys
+
+        with self.manager.pool.writer_connection():
+            cursor = self.manager.connection.execute(
+                f"SELECT {column_name} FROM {table_name} WHERE {column_name} IS NOT NULL"
+            )
+            try:
+                keys = frozenset(_key(row[0]) for row in cursor)
+            finally:
+                cursor.close()
+            with self._lock:
+                self.key_sets[cache_key] = keys
+        if debug:
+            log.debug("Loaded %s keys for %s.%s", len(keys), table_name, column_name)
+        return keys
+
+    def check_records(self, records, columns):
+        """
+        Finds foreign key values that do not exist in their referenced tables.
+
+        Values are grouped per referenced key column, so a batch costs at most
+        one query per referenced table (none when the key sets are cached).
+        Empty values are not checked.
+
+        Args:
+            records (list): Record dicts keyed by column name.
+            columns (dict): Column definitions for the records' context.
+
+        Returns:
+            list: (record index, column name, value, referenced "Table(Column)") for every missing key.
+        """
+        failures = []
+        for col_name, (table_name, column_name) in foreign_key_columns(columns).items():
+            values = [
+                (index, record.get(col_name))
+                for index, record in enumerate(records)
+                if record.get(col_name) not in (None, "")
+            ]
+            if not values:
+                continue
+            keys = self.key_set(table_name, column_name)
+            for index, value in values:
+                if _key(value) not in keys:
+                    failures.append((index, col_name, value, f"{table_name}({column_name})"))
+        failures.sort(key=lambda failure: failure[0])
+        return failures
+
+
+# One resolver per DatabaseTransactionManager
+resolvers = {}
+
+
+def get_resolver(manager=None):
+    """ Returns the resolver for a manager (default: the application manager), creating it on first use. """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    resolver = resolvers.get(manager)
+    if resolver is None:
+        resolver = ForeignKeyResolver(manager)
+        resolvers[manager] = resolver
+    return resolver
@@ -0,0 +1,221 @@
+"""
+Headless CSV / JSON-lines importer for any context in COLUMN_DEFINITIONS.
+
+    python -m core.importer Parts parts.csv --dry-run
+    python -m core.importer Suppliers suppliers.jsonl --batch-size 2000
+
+Rows are streamed from disk, validated with the same rules as the data entry
+form, and written through bulk_upsert in batched transactions, so memory use
+stays flat regardless of file size.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+from config.config_data import COLUMN_DEFINITIONS, BATCH_CHUNK_SIZE
+from core.config_utils import is_list_column
+from forms.validation import coerce_record, validate_foreign_keys_batch
+
+
+def read_records(path, file_format=None):
+    """
+    Streams raw records from a CSV or JSON-lines file.
+
+    Args:
+        path (str): Path to the file.
+        file_format (str, optional): "csv" or "jsonl". Defaults to the file extension.
+
+    Yields:
+        tuple: (line number, record dict)
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if file_format == "csv":
+            reader = csv.DictReader(handle)
+            for record in reader:
+                yield reader.line_num, record
+        elif file_format in ("jsonl", "ndjson", "json"):
+            for line_number, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file format '{file_format}'. Use csv or jsonl.")
+
+
+def build_field_map(context):
+    """
+    Maps lower-cased column names and display names to column names.
+
+    Column names win when a display name collides with another column's name.
+
+    Args:
+        context (str): The context to import into (e.g., "Parts").
+
+    Returns:
+        dict: Lower-cased field name -> column name.
+    """
+    columns = COLUMN_DEFINITIONS.get(context, {}).get("columns", {})
+    if not columns:
+        raise ValueError(f"No column definitions found for context '{context}'.")
+
+    field_map = {}
+    for col_name, col_details in columns.items():
+        if not is_list_column(col_details):
+            continue
+        display_name = col_details.get("display_name", col_name).lower()
+        field_map.setdefault(display_name, col_name)
+    for col_name, col_details in columns.items():
+        if is_list_column(col_details):
+            field_map[col_name.lower()] = col_name
+    return field_map
+
+
+def map_record(record, field_map):
+    """ Renames a raw record's fields to column names, dropping unknown fields. """
+    mapped = {}
+    for field, value in record.items():
+        col_name = field_map.get(str(field).strip().lower())
+        if col_name:
+            mapped[col_name] = value
+    return mapped
+
+
+def import_file(context, path, file_format=None, dry_run=False, batch_size=BATCH_CHUNK_SIZE, manager=None, max_errors=100):
+    """
+    Streams a file into a context's table.
+
+    Args:
+        context (str): The context to import into (e.g., "Parts").
+        path (str): CSV or JSON-lines file.
+        file_format (str, optional): "csv" or "jsonl". Defaults to the file extension.
+        dry_run (bool): Validate every row but write nothing.
+        batch_size (int): Rows per transaction.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        max_errors (int): How many row errors to keep for the report (all are counted).
+
+    Returns:
+        dict: Throughput report with counts, elapsed seconds, rows per second and sample errors.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    columns = COLUMN_DEFINITIONS.get(context, {}).get("columns", {})
+    field_map = build_field_map(context)
+    report = {
+        "context": context,
+        "path": path,
+        "dry_run": dry_run,
+        "read": 0,
+        "valid": 0,
+        "rejected": 0,
+        "inserted": 0,
+        "updated": 0,
+        "failed": 0,
+        "errors": [],
+    }
+
+    def record_error(line_number, message):
+        if len(report["errors"]) < max_errors:
+            report["errors"].append((line_number, message))
+
+    batch, batch_lines = [], []
+
+    def flush():
+        # Foreign keys are checked for the whole batch at once against cached key sets
+        rows, lines = [], []
+        rejected = dict(validate_foreign_keys_batch(batch, columns, manager=manager))
+        for index, row in enumerate(batch):
+            if index in rejected:
+                report["rejected"] += 1
+                record_error(batch_lines[index], rejected[index])
+            else:
+                rows.append(row)
+                lines.append(batch_lines[index])
+        report["valid"] += len(rows)
+        batch.clear()
+        batch_lines.clear()
+        if dry_run or not rows:
+            return
+
+        result = manager.bulk_upsert(context, rows, chunk_size=len(rows), debug=False)
+        report["inserted"] += result["inserted"]
+        report["updated"] += result["updated"]
+        report["failed"] += len(result["failed"])
+        for index, row, error in result["failed"]:
+            record_error(lines[index], error)
+
+    switch_profile = not dry_run and not manager.in_transaction
+    if switch_profile:
+        manager.use_pragma_profile("bulk-load")
+
+    started = time.perf_counter()
+    try:
+        for line_number, record in read_records(path, file_format):
+            report["read"] += 1
+            try:
+                row = coerce_record(context, map_record(record, field_map), keep_primary_key=True)
+            except ValueError as e:
+                report["rejected"] += 1
+                record_error(line_number, str(e))
+                continue
+
+            batch.append(row)
+            batch_lines.append(line_number)
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+    finally:
+        if switch_profile and not manager.in_transaction:
+            manager.use_pragma_profile("interactive")
+
+    report["elapsed"] = time.perf_counter() - started
+    report["rows_per_second"] = report["read"] / report["elapsed"] if report["elapsed"] else 0.0
+    return report
+
+
+def format_report(report):
+    """ Formats an import report for the console. """
+    mode = "Dry run" if report["dry_run"] else "Import"
+    lines = [
+        f"{mode} of {report['path']} into {report['context']}",
+        f"  Rows read:      {report['read']}",
+        f"  Valid:          {report['valid']}",
+        f"  Rejected:       {report['rejected']}",
+        f"  Inserted:       {report['inserted']}",
+        f"  Updated:        {report['updated']}",
+        f"  Failed writes:  {report['failed']}",
+        f"  Elapsed:        {report['elapsed']:.2f}s ({report['rows_per_second']:.0f} rows/s)",
+    ]
+    for line_number, message in report["errors"]:
+        lines.append(f"  line {line_number}: {message}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a CSV or JSON-lines file into a FarmBot table.")
+    parser.add_argument("context", choices=sorted(COLUMN_DEFINITIONS), help="Context (table) to import into.")
+    parser.add_argument("path", help="CSV or JSON-lines file to import.")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "jsonl"], help="Override the format implied by the extension.")
+    parser.add_argument("--dry-run", action="store_true", help="Validate every row without writing.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CHUNK_SIZE, help="Rows per transaction.")
+    parser.add_argument("--database", help="Database file (defaults to DATABASE from config_data).")
+    args = parser.parse_args(argv)
+
+    manager = None
+    if args.database:
+        from core.database_transactions import DatabaseTransactionManager
+        manager = DatabaseTransactionManager(args.database)
+
+    report = import_file(
+        args.context, args.path, args.file_format, dry_run=args.dry_run, batch_size=args.batch_size, manager=manager
+    )
+    print(format_report(report))
+    return 0 if not (report["rejected"] or report["failed"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,382 @@
+"""
+Persistent undo/redo journal of the changes made through the data entry forms.
+
+Each user action (add, edit, clone, delete) runs in journaled(), which commits
+it at once and records every row it changed as before/after images in the
+UndoJournal table. The follow-on writes are recorded too, such as assembly
+rollups and foreign key cascades. Undo and redo are separate, short
+transactions that write the recorded images back. The journal lives in the
+database, so the history survives a restart. It keeps the last
+UNDO_HISTORY_LIMIT actions; prune_history() (or `python -m core.journal
+prune`) trims it further.
+
+Changes are captured by TEMP triggers on the writer connection. They only
+record while an action is open, so imports, migrations and the compensating
+writes of undo/redo themselves are not journaled.
+
+Row images are JSON objects of column values. An insert keeps its full
+after image, a delete its full before image, and an update only the columns
+it changed. BLOB values are stored as ["blob", hex], twice their size, so
+images deleted or replaced inline are only kept as long as their action is.
+Values moved to the blob store (see core.blob_store) are journaled as their
+short reference.
+"""
+import argparse
+import json
+from contextlib import contextmanager
+
+from config.config_data import COLUMN_DEFINITIONS, DEBUG, UNDO_HISTORY_LIMIT
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+GROUP_TABLE = "UndoGroups"
+JOURNAL_TABLE = "UndoJournal"
+
+SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {GROUP_TABLE} (
+        GroupID INTEGER PRIMARY KEY AUTOINCREMENT,
+        Description TEXT NOT NULL,
+        Undone INTEGER NOT NULL DEFAULT 0,
+        CreatedAt TEXT DEFAULT (datetime('now'))
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS {JOURNAL_TABLE} (
+        EntryID INTEGER PRIMARY KEY AUTOINCREMENT,
+        GroupID INTEGER NOT NULL,
+        TableName TEXT NOT NULL,
+        RowKey,
+        Before TEXT,
+        After TEXT
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {JOURNAL_TABLE}_group ON {JOURNAL_TABLE} (GroupID)",
+]
+
+# Managers whose writer connection has the capture triggers
+prepared = set()
+
+
+def journaled_contexts(connection):
+    """ Returns {context: (primary key, [columns], [BLOB columns])} for the context tables that exist. """
+    from core.config_utils import get_primary_key
+
+    contexts = {}
+    for context_name in COLUMN_DEFINITIONS:
+        primary_key = get_primary_key(context_name)
+        info = connection.execute(f"PRAGMA main.table_info({context_name})").fetchall()
+        columns = [row[1] for row in info]
+        if primary_key and primary_key in columns:
+            blobs = [row[1] for row in info if "BLOB" in (row[2] or "").upper()]
+            contexts[context_name] = (primary_key, columns, blobs)
+    return contexts
+
+
+def _image(prefix, columns, blobs):
+    """ json_object(...) of a row's values; BLOB columns keep their type as [typeof, hex]. """
+    pairs = []
+    for col in columns:
+        value = f"json_array(typeof({prefix}.{col}), hex({prefix}.{col}))" if col in blobs else f"{prefix}.{col}"
+        pairs.append(f"'{col}', {value}")
+    return f"json_object({', '.join(pairs)})"
+
+
+def _trigger_sql(context_name, primary_key, columns, blobs):
+    """ CREATE TEMP TRIGGER statements recording a table's changes into the open group. """
+    insert = (
+        f"INSERT INTO {JOURNAL_TABLE} (GroupID, TableName, RowKey, Before, After) "
+        f"SELECT GroupID, '{context_name}', {{key}}, {{before}}, {{after}} FROM temp.journal_group;"
+    )
+    old, new = _image("old", columns, blobs), _image("new", columns, blobs)
+    name = f"journal_{context_name}"
+    return [
+        f"CREATE TEMP TRIGGER {name}_insert AFTER INSERT ON main.{context_name} BEGIN "
+        + insert.format(key=f"new.{primary_key}", before="NULL", after=new) + " END",
+        f"CREATE TEMP TRIGGER {name}_delete AFTER DELETE ON main.{context_name} BEGIN "
+        + insert.format(key=f"old.{primary_key}", before=old, after="NULL") + " END",
+        f"CREATE TEMP TRIGGER {name}_update AFTER UPDATE ON main.{context_name} BEGIN "
+        + insert.format(key=f"old.{primary_key}", before=old, after=new) + " END",
+    ]
+
+
+def ensure_journal(manager=None, debug=DEBUG):
+    """
+    Creates the journal tables and the capture triggers on the manager's writer connection.
+
+    Safe to call repeatedly; the triggers are made once per manager.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.writer_connection():
+        if manager in prepared:
+            return
+        connection = manager.connection
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS journal_group (GroupID INTEGER)")
+        for context_name, (primary_key, columns, blobs) in journaled_contexts(connection).items():
+            for suffix in ("insert", "delete", "update"):
+                connection.execute(f"DROP TRIGGER IF EXISTS temp.journal_{context_name}_{suffix}")
+            for statement in _trigger_sql(context_name, primary_key, columns, blobs):
+                connection.execute(statement)
+            if debug:
+                log.debug("Journaling changes to %s", context_name)
+        connection.commit()
+        prepared.add(manager)
+
+
+def decode_value(value):
+    """ Turns a journaled value back into what SQLite stored. """
+    if not isinstance(value, list):
+        return value
+    value_type, data = value
+    if value_type == "null":
+        return None
+    data = bytes.fromhex(data)
+    if value_type == "blob":
+        return data
+    text = data.decode("utf-8")
+    if value_type == "integer":
+        return int(text)
+    if value_type == "real":
+        return float(text)
+    return text
+
+
+def _compact(connection, group_id):
+    """ Keeps only the changed columns of each update in a group, dropping updates that changed nothing. """
+    entries = connection.execute(
+        f"SELECT EntryID, Before, After FROM {JOURNAL_TABLE} WHERE GroupID = ? AND Before IS NOT NULL AND After IS NOT NULL",
+        (group_id,),
+    ).fetchall()
+    for entry_id, before, after in entries:
+        before, after = json.loads(before), json.loads(after)
+        changed = [col for col in after if before.get(col) != after[col]]
+        if not changed:
+            connection.execute(f"DELETE FROM {JOURNAL_TABLE} WHERE EntryID = ?", (entry_id,))
+        else:
+            connection.execute(
+                f"UPDATE {JOURNAL_TABLE} SET Before = ?, After = ? WHERE EntryID = ?",
+                (json.dumps({col: before[col] for col in changed}), json.dumps({col: after[col] for col in changed}), entry_id),
+            )
+
+
+def _prune(connection, keep):
+    """ Deletes every action but the newest `keep` ones. """
+    old_groups = f"SELECT GroupID FROM {GROUP_TABLE} ORDER BY GroupID DESC LIMIT -1 OFFSET ?"
+    connection.execute(f"DELETE FROM {JOURNAL_TABLE} WHERE GroupID IN ({old_groups})", (keep,))
+    return connection.execute(f"DELETE FROM {GROUP_TABLE} WHERE GroupID IN ({old_groups})", (keep,)).rowcount
+
+
+def prune_history(keep=UNDO_HISTORY_LIMIT, manager=None):
+    """
+    Forgets all but the most recent actions (done or undone); they can no longer be undone or redone.
+
+    Args:
+        keep (int): Actions to keep; 0 clears the history.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Returns:
+        int: Number of actions removed.
+
+    Raises:
+        RuntimeError: If the manager has a transaction open.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    ensure_journal(manager, debug=False)
+    with manager.pool.writer_connection():
+        if manager.in_transaction:
+            raise RuntimeError("Another change is still in progress; save or undo it first.")
+        manager.begin_transaction(debug=False)
+        try:
+            removed = _prune(manager.connection, max(keep, 0))
+        except BaseException:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.commit_transaction(debug=False)
+    return removed
+
+
+@contextmanager
+def journaled(description, manager=None, debug=DEBUG, history_limit=UNDO_HISTORY_LIMIT):
+    """
+    Runs one user action in its own transaction and records it for undo.
+
+    The writes made inside the block (through the manager's writer) are
+    committed together when it ends, or rolled back if it raises. Starting
+    an action clears the redo history.
+
+    Args:
+        description (str): What the action did (e.g., "Edit Parts").
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        history_limit (int, optional): Actions to keep, oldest pruned first. None keeps all.
+
+    Yields:
+        int: The action's GroupID.
+
+    Raises:
+        RuntimeError: If the manager already has a transaction open.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    ensure_journal(manager, debug=False)
+    with manager.pool.writer_connection():
+        if manager.in_transaction:
+            raise RuntimeError("Another change is still in progress; save or undo it first.")
+        connection = manager.connection
+        manager.begin_transaction(debug=False)
+        try:
+            redo_groups = f"SELECT GroupID FROM {GROUP_TABLE} WHERE Undone = 1"
+            connection.execute(f"DELETE FROM {JOURNAL_TABLE} WHERE GroupID IN ({redo_groups})")
+            connection.execute(f"DELETE FROM {GROUP_TABLE} WHERE Undone = 1")
+            group_id = connection.execute(
+                f"INSERT INTO {GROUP_TABLE} (Description) VALUES (?)", (description,)
+            ).lastrowid
+            connection.execute("INSERT INTO temp.journal_group (GroupID) VALUES (?)", (group_id,))
+            try:
+                yield group_id
+            finally:
+                connection.execute("DELETE FROM temp.journal_group")
+            _compact(connection, group_id)
+            if not connection.execute(f"SELECT 1 FROM {JOURNAL_TABLE} WHERE GroupID = ? LIMIT 1", (group_id,)).fetchone():
+                connection.execute(f"DELETE FROM {GROUP_TABLE} WHERE GroupID = ?", (group_id,))
+            if history_limit is not None:
+                _prune(connection, history_limit)
+        except BaseException:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.commit_transaction(debug=False)
+        if debug:
+            log.debug("Journaled action %s: %s", group_id, description)
+
+
+def _apply(connection, context_name, primary_key, key, set_image, delete=False, insert_image=None):
+    """ Writes one compensating change. """
+    if delete:
+        connection.execute(f"DELETE FROM {context_name} WHERE {primary_key} = ?", (key,))
+    elif insert_image is not None:
+        columns = list(insert_image)
+        connection.execute(
+            f"INSERT INTO {context_name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [decode_value(insert_image[col]) for col in columns],
+        )
+    else:
+        assignments = ", ".join(f"{col} = ?" for col in set_image)
+        connection.execute(
+            f"UPDATE {context_name} SET {assignments} WHERE {primary_key} = ?",
+            [decode_value(value) for value in set_image.values()] + [key],
+        )
+
+
+def _replay(manager, undo, debug):
+    """
+    Undoes the newest done action, or redoes the oldest undone one.
+
+    Returns:
+        dict: {"description": str, "changes": {table: [primary keys]}}, or None if there is nothing to do.
+    """
+    from core.config_utils import get_primary_key
+
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    ensure_journal(manager, debug=False)
+    with manager.pool.writer_connection():
+        if manager.in_transaction:
+            raise RuntimeError("Another change is still in progress; save or undo it first.")
+        connection = manager.connection
+        group = connection.execute(
+            f"SELECT GroupID, Description FROM {GROUP_TABLE} WHERE Undone = ? ORDER BY GroupID {'DESC' if undo else 'ASC'} LIMIT 1",
+            (0 if undo else 1,),
+        ).fetchone()
+        if group is None:
+            return None
+        group_id, description = group[0], group[1]
+        entries = connection.execute(
+            f"SELECT TableName, RowKey, Before, After FROM {JOURNAL_TABLE} WHERE GroupID = ? "
+            f"ORDER BY EntryID {'DESC' if undo else 'ASC'}",
+            (group_id,),
+        ).fetchall()
+
+        changes = {}
+        manager.begin_transaction(debug=False)
+        try:
+            for context_name, key, before, after in entries:
+                primary_key = get_primary_key(context_name)
+                before = json.loads(before) if before is not None else None
+                after = json.loads(after) if after is not None else None
+                source, target = (after, before) if undo else (before, after)
+                if source is None:
+                    _apply(connection, context_name, primary_key, key, None, insert_image=target)
+                    key = target.get(primary_key, key)
+                elif target is None:
+                    _apply(connection, context_name, primary_key, key, None, delete=True)
+                else:
+                    # An update that changed the key finds its row under the new key when undone
+                    current = decode_value(after[primary_key]) if undo and primary_key in after else key
+                    _apply(connection, context_name, primary_key, current, target)
+                    key = decode_value(target.get(primary_key, key))
+                changes.setdefault(context_name, []).append(key)
+                manager.notify_write(context_name)
+            connection.execute(f"UPDATE {GROUP_TABLE} SET Undone = ? WHERE GroupID = ?", (1 if undo else 0, group_id))
+        except BaseException:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.commit_transaction(debug=False)
+    if debug:
+        log.debug("%s action %s: %s", 'Undid' if undo else 'Redid', group_id, description)
+    return {"description": description, "changes": changes}
+
+
+def undo(manager=None, debug=DEBUG):
+    """
+    Reverts the most recent action that is not undone yet.
+
+    Returns:
+        dict: {"description": str, "changes": {table: [primary keys]}}, or None if the history is empty.
+    """
+    return _replay(manager, True, debug)
+
+
+def redo(manager=None, debug=DEBUG):
+    """ Re-applies the most recently undone action. Returns the same as undo(), or None if there is nothing to redo. """
+    return _replay(manager, False, debug)
+
+
+def history(manager=None, limit=50):
+    """ Returns the most recent actions, newest first, as dicts with GroupID, Description, Undone and CreatedAt. """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    ensure_journal(manager, debug=False)
+    return manager.execute_read(
+        f"SELECT GroupID, Description, Undone, CreatedAt FROM {GROUP_TABLE} ORDER BY GroupID DESC LIMIT :limit",
+        {"limit": limit}, debug=False,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trim the undo history kept in the database.")
+    parser.add_argument("command", choices=["prune"], help="prune: forget all but the most recent actions.")
+    parser.add_argument("--keep", type=int, default=UNDO_HISTORY_LIMIT or 0, help="Actions to keep (0 clears the history).")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return the freed pages to the OS.")
+    parser.add_argument("--database", help="Database file (defaults to DATABASE from config_data).")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        from core.database_transactions import DatabaseTransactionManager
+        manager = DatabaseTransactionManager(args.database)
+    else:
+        from core.database_transactions import db_manager as manager
+
+    print(f"Removed {prune_history(args.keep, manager)} actions from the undo history.")
+    if args.vacuum:
+        with manager.pool.writer_connection():
+            manager.connection.execute("VACUUM")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
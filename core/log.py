@@ -0,0 +1,98 @@
+"""
+Application logging: one logger per module under the "farmbot" namespace.
+
+    from core.log import get_logger
+    log = get_logger(__name__)
+    log.debug("Fetched %s rows for %s", len(rows), context_name)
+
+Messages use %-style arguments, so nothing is formatted unless the record is
+emitted. A disabled level costs one cached level check. LOG_LEVEL sets the
+default level and LOG_LEVELS overrides it per module or package. When
+LOG_JSON_FILE is set, every record is also written to that file as one JSON
+object per line, rotated by size.
+"""
+import json
+import logging
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from config.config_data import LOG_JSON_BACKUPS, LOG_JSON_FILE, LOG_JSON_MAX_BYTES, LOG_LEVEL, LOG_LEVELS
+
+ROOT_LOGGER = "farmbot"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_configured = False
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """ Formats a record as one JSON object, including any `extra` fields. """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=LOG_LEVEL, levels=LOG_LEVELS, json_file=LOG_JSON_FILE,
+                      max_bytes=LOG_JSON_MAX_BYTES, backups=LOG_JSON_BACKUPS):
+    """
+    Sets up the "farmbot" loggers: levels, a console handler and the optional JSON file.
+
+    Called automatically by the first get_logger(); call it again to change the setup.
+
+    Args:
+        level (str): Default level, e.g. "WARNING".
+        levels (dict): Module or package name -> level, e.g. {"core.database_transactions": "DEBUG"}.
+        json_file (str, optional): Path of the rotating JSON-lines log.
+        max_bytes (int): Size at which the JSON log rotates.
+        backups (int): Rotated JSON logs to keep.
+    """
+    global _configured
+    with _lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.setLevel(level)
+        root.propagate = False
+
+        console = logging.StreamHandler(sys.stderr)
+        console.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+        root.addHandler(console)
+        if json_file:
+            sink = RotatingFileHandler(json_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+            sink.setFormatter(JsonFormatter())
+            root.addHandler(sink)
+
+        for name, module_level in (levels or {}).items():
+            logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(module_level)
+        _configured = True
+
+
+def get_logger(name):
+    """
+    Returns the logger of a module (pass __name__).
+
+    Args:
+        name (str): Module name, e.g. "core.database_transactions". "__main__" becomes "main".
+    """
+    if not _configured:
+        configure_logging()
+    if name == "__main__":
+        name = "main"
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
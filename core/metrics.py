@@ -0,0 +1,163 @@
+"""
+Per-statement timing for every query the application runs.
+
+DatabaseTransactionManager and stream_query report each statement to
+query_metrics. The report covers wall time, rows returned, rows changed and
+the time spent waiting for a connection (the writer lock or a pooled reader).
+Statements are aggregated by their normalized SQL "shape": literals become ?
+and IN lists collapse, so the same query with different values counts once.
+
+A statement slower than SLOW_QUERY_MS also goes to a bounded slow-query log,
+with its EXPLAIN QUERY PLAN captured on the connection that ran it.
+"""
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from config.config_data import DEBUG, QUERY_METRICS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_MS
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Statements EXPLAIN QUERY PLAN can describe
+EXPLAINABLE = ("select", "with", "insert", "update", "delete", "replace")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(query):
+    """
+    Returns the shape of a statement: single-spaced, literals as ?, IN lists as (...).
+
+    Example:
+        "SELECT * FROM Parts WHERE PartID IN (?, ?, ?) AND Name = 'x'"
+        -> "SELECT * FROM Parts WHERE PartID IN (...) AND Name = ?"
+    """
+    shape = _STRING_LITERAL.sub("?", query)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip().rstrip(";")
+
+
+def explain(connection, query, params=None):
+    """
+    Returns the EXPLAIN QUERY PLAN of a statement as indented text, or None if it cannot be explained.
+    """
+    if not query.lstrip().lower().startswith(EXPLAINABLE):
+        return None
+    try:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+    except Exception:
+        return None
+    # Rows are (id, parent, notused, detail); indent each step under its parent
+    depth = {0: -1}
+    lines = []
+    for row in rows:
+        node, parent, detail = row[0], row[1], row[3]
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return "\n".join(lines)
+
+
+class QueryMetrics:
+    """
+    Thread-safe registry of statement timings, aggregated by SQL shape.
+
+    Attributes:
+        slow_ms (float): Statements at least this slow are logged with their plan.
+        enabled (bool): Record anything at all.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_size=SLOW_QUERY_LOG_SIZE, enabled=QUERY_METRICS):
+        self.slow_ms = slow_ms
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._slow = deque(maxlen=log_size)
+
+    def record(self, query, elapsed, rows=0, changes=0, wait=0.0, connection=None, params=None, error=False, debug=DEBUG):
+        """
+        Adds one execution of a statement.
+
+        Args:
+            query (str): The SQL as executed.
+            elapsed (float): Wall time in seconds, excluding the connection wait.
+            rows (int): Rows returned.
+            changes (int): Rows inserted, updated or deleted.
+            wait (float): Seconds spent waiting for the connection.
+            connection (sqlite3.Connection, optional): The connection that ran the
+                statement, still held by the caller, used to explain slow statements.
+            params (dict or tuple, optional): The statement's parameters, for the plan.
+            error (bool): The statement raised.
+        """
+        if not self.enabled:
+            return
+        shape = normalize_sql(query)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = {
+                    "shape": shape, "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "rows": 0, "changes": 0, "wait_ms": 0.0, "plan": None,
+                }
+            stats["calls"] += 1
+            stats["errors"] += bool(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["rows"] += max(rows, 0)
+            stats["changes"] += max(changes, 0)
+            stats["wait_ms"] += wait * 1000
+            plan = stats["plan"]
+
+        if elapsed_ms < self.slow_ms or error:
+            return
+        if plan is None and connection is not None:
+            # Plans rarely differ between runs of one shape, so explain it once
+            plan = explain(connection, query, params) or ""
+            with self._lock:
+                stats["plan"] = plan
+        with self._lock:
+            self._slow.append({
+                "time": time.time(), "shape": shape, "sql": query, "elapsed_ms": elapsed_ms,
+                "rows": rows, "changes": changes, "wait_ms": wait * 1000, "plan": plan,
+            })
+        if debug:
+            log.debug("Slow query (%.1f ms): %s", elapsed_ms, shape)
+
+    def snapshot(self, order_by="total_ms", limit=None):
+        """
+        Returns the aggregated statistics, hottest first.
+
+        Args:
+            order_by (str): "total_ms", "max_ms", "avg_ms", "calls", "rows", "changes" or "wait_ms".
+            limit (int, optional): Most statements to return.
+
+        Returns:
+            list: One dict per shape with calls, errors, total_ms, avg_ms, max_ms,
+                rows, changes, wait_ms and plan (None until it was slow once, "" if it
+                cannot be explained).
+        """
+        with self._lock:
+            stats = [dict(item, avg_ms=item["total_ms"] / item["calls"]) for item in self._stats.values()]
+        stats.sort(key=lambda item: item[order_by], reverse=True)
+        return stats[:limit] if limit else stats
+
+    def slow_queries(self):
+        """ Returns the slow-query log, newest first. """
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+
+query_metrics = QueryMetrics()
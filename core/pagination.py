@@ -0,0 +1,155 @@
+from config.config_data import COLUMN_DEFINITIONS, DEBUG, PAGE_SIZE, SORT_INDEXES
+from core.config_utils import get_primary_key
+from core.query_builder import generate_keyset_page_query, sort_term
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
+class KeysetPager:
+    """
+    Walks a context's table one page at a time using keyset pagination.
+
+    The pager remembers the sort key of the last row it returned, so every
+    next_page() call seeks straight to the following rows.
+    """
+
+    def __init__(self, context_name, page_size=PAGE_SIZE, sort_column=None, sort_direction="ASC", manager=None):
+        self.context_name = context_name
+        self.page_size = page_size
+        self.primary_key = get_primary_key(context_name)
+        if not self.primary_key:
+            raise ValueError(f"No primary key defined for context: {context_name}")
+        if manager is None:
+            from core.database_transactions import db_manager as manager
+        self.manager = manager
+        self.where_conditions = {}
+        self.filter_params = {}
+        self.reset(sort_column, sort_direction)
+
+    def set_filters(self, where_conditions=None, params=None):
+        """
+        Restrict the pages to rows matching the filters and restart from the first page.
+
+        Args:
+            where_conditions (dict, optional): Column -> operator (see generate_where_clause).
+            params (dict, optional): Filter values, keyed by column.
+        """
+        self.where_conditions = dict(where_conditions or {})
+        self.filter_params = dict(params or {})
+        self.reset(self.sort_column, self.sort_direction)
+
+    def reset(self, sort_column=None, sort_direction="ASC"):
+        """
+        Restart from the first page, optionally with a new sort order. Filters are kept.
+
+        Args:
+            sort_column (str, optional): Column to sort by. Defaults to the primary key.
+            sort_direction (str, optional): "ASC" or "DESC".
+        """
+        columns = COLUMN_DEFINITIONS.get(self.context_name, {}).get("columns", {})
+        self.sort_column = sort_column or self.primary_key
+        self.sort_direction = sort_direction.upper()
+        self.first_query = generate_keyset_page_query(
+            self.context_name, columns, self.primary_key, self.sort_column, self.sort_direction,
+            where_conditions=self.where_conditions
+        )
+        self.next_query = generate_keyset_page_query(
+            self.context_name, columns, self.primary_key, self.sort_column, self.sort_direction, after=True,
+            where_conditions=self.where_conditions
+        )
+        self.next_null_query = generate_keyset_page_query(
+            self.context_name, columns, self.primary_key, self.sort_column, self.sort_direction, after=True,
+            where_conditions=self.where_conditions, after_null=True
+        )
+        self.last_row = None
+        self.loaded = 0
+        self.exhausted = False
+
+    def next_page(self, debug=DEBUG):
+        """
+        Fetch the next page of rows.
+
+        Returns:
+            list: Rows as dictionaries; empty once the table is exhausted.
+        """
+        if self.exhausted:
+            return []
+
+        query, params = self.page_request()
+        rows = self.manager.execute_query(query, params)
+        self.accept_page(rows)
+
+        if debug:
+            log.debug("Loaded page of %s rows for %s (%s total)", len(rows), self.context_name, self.loaded)
+        return rows
+
+    def page_request(self):
+        """
+        Returns the query and parameters for the next page, for callers that run it elsewhere
+        (e.g. on a background worker); pass the rows back to accept_page().
+
+        Returns:
+            tuple: (query, params)
+        """
+        params = dict(self.filter_params, page_size=self.page_size)
+        if self.last_row is None:
+            return self.first_query, params
+
+        params["after_pk"] = self.last_row[self.primary_key]
+        if self.sort_column != self.primary_key:
+            sort_value = self.last_row[self.sort_column]
+            if sort_value is None:
+                return self.next_null_query, params
+            params["after_key"] = sort_value
+        return self.next_query, params
+
+    def accept_page(self, rows):
+        """ Advances past a page of rows fetched with page_request(). """
+        if rows:
+            self.last_row = rows[-1]
+            self.loaded += len(rows)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+
+
+def ensure_sort_indexes(indexes=None, manager=None, debug=DEBUG):
+    """
+    Creates an index on the sort term (see core.query_builder.sort_term) of each
+    configured column, matching the order and seeks of KeysetPager.
+
+    Safe to call at every startup; existing indexes are kept.
+
+    Args:
+        indexes (dict, optional): Context -> columns. Defaults to SORT_INDEXES.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Returns:
+        list: Names of the indexes created.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    created = []
+    with manager.pool.writer_connection():
+        connection = manager.connection
+        existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        manager.begin_transaction(debug=False)
+        try:
+            for context_name, sort_columns in (SORT_INDEXES if indexes is None else indexes).items():
+                columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+                present = {row[1] for row in connection.execute(f"PRAGMA table_info({context_name})")}
+                for col in sort_columns:
+                    name = f"idx_{context_name}_{col}_sort"
+                    if name in existing or col not in columns or col not in present:
+                        continue
+                    connection.execute(f"CREATE INDEX {name} ON {context_name} ({sort_term(col, columns[col])})")
+                    created.append(name)
+        except Exception:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.commit_transaction(debug=False)
+
+    if debug and created:
+        log.debug("Created sort indexes: %s", created)
+    return created
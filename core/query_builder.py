@@ -1,33 +1,122 @@
-from config.config_data import COLUMN_DEFINITIONS, DEBUG
+import hashlib
+import json
+import threading
+
+from config.config_data import COLUMN_DEFINITIONS
+from core.config_utils import is_list_column
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Generated query sets keyed by (context name, fingerprint of its column definitions)
+_query_cache = {}
+_query_cache_lock = threading.Lock()
+
+
+def definitions_fingerprint(columns):
+    """
+    Computes a stable fingerprint of a context's column definitions.
+
+    Args:
+        columns (dict): The "columns" entry of a context in COLUMN_DEFINITIONS.
+
+    Returns:
+        str: Hex digest that changes whenever any column or column attribute changes.
+    """
+    payload = json.dumps(columns, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def list_columns(column_definitions, exclude_admin_columns=True):
+    """
+    Returns the columns selected by list (datasheet) queries, in definition order.
+
+    BLOB columns are never listed; read them one value at a time with core.blobs.
+
+    Args:
+        column_definitions (dict): Dictionary of column definitions.
+        exclude_admin_columns (bool, optional): Whether to exclude admin columns too.
+
+    Returns:
+        list: Column names.
+    """
+    return [
+        col for col, details in column_definitions.items()
+        if (is_list_column(details) if exclude_admin_columns else details.get("type") != "blob")
+    ]
+
+
+def invalidate_query_cache(context_name=None):
+    """
+    Drops cached queries for one context, or for every context when none is given.
+
+    Args:
+        context_name (str, optional): The context whose queries should be regenerated.
+    """
+    with _query_cache_lock:
+        if context_name is None:
+            _query_cache.clear()
+        else:
+            for key in [key for key in _query_cache if key[0] == context_name]:
+                del _query_cache[key]
 
 
 def query_generator(context_name, debug=False):
     """
     Generates SQL queries dynamically based on the context name and column definitions.
 
+    Query sets are memoized per context and definitions fingerprint, so repeat
+    calls return the same SQL strings and hit sqlite3's per-connection
+    statement cache instead of being re-parsed.
+
     Args:
         context_name (str): The table or context name (e.g., "Suppliers", "Assemblies").
 
     Returns:
         dict: A dictionary containing SQL queries for fetch, insert, update, and delete operations.
     """
-    from core.database_utils import get_processed_column_definitions
     from config.config_data import COLUMN_DEFINITIONS
 
-    if debug:
-        print(f"Query generator called for context: {context_name}")
-
     # Retrieve column definitions from configuration
     context_data = COLUMN_DEFINITIONS.get(context_name)
     if not context_data:
         raise ValueError(f"No column definitions found for context: {context_name}")
-  
-    columns = context_data["columns"]
+
+    key = (context_name, definitions_fingerprint(context_data["columns"]))
+    queries = _query_cache.get(key)
+    if queries is None:
+        queries = _build_queries(context_name, context_data["columns"], debug=debug)
+        with _query_cache_lock:
+            # Definitions changed at runtime: drop the stale entry for this context
+            for stale in [stale for stale in _query_cache if stale[0] == context_name]:
+                del _query_cache[stale]
+            _query_cache[key] = queries
+    elif debug:
+        log.debug("Query cache hit for context: %s", context_name)
+
+    return dict(queries)
+
+
+def _build_queries(context_name, columns, debug=False):
+    """
+    Builds the fetch, insert, update and delete queries for a context.
+
+    Args:
+        context_name (str): The table or context name.
+        columns (dict): The context's column definitions.
+
+    Returns:
+        dict: A dictionary containing SQL queries for fetch, insert, update, and delete operations.
+    """
+    from core.database_utils import get_processed_column_definitions
+
+    if debug:
+        log.debug("Query generator called for context: %s", context_name)
 
     # Process the column definitions
     all_columns = get_processed_column_definitions(columns, exclude_hidden=True)
     if debug:
-        print(f"Processed column definitions for contextXXXX '{context_name}': {all_columns}")
+        log.debug("Processed column definitions for contextXXXX '%s': %s", context_name, all_columns)
 
     if not isinstance(all_columns, dict):
         raise TypeError(f"'columns' for context '{context_name}' must be a dictionary, got {type(all_columns)}")
@@ -39,34 +128,34 @@ def query_generator(context_name, debug=False):
     if not primary_key:
         raise ValueError(f"No primary key defined for context: {context_name}")
     if debug:
-        print(f"Primary key for context '{context_name}': {primary_key}")
+        log.debug("Primary key for context '%s': %s", context_name, primary_key)
 
     # Generate SQL queries
     def generate_fetch_query():
-        # Exclude admin columns
-        visible_columns = [col for col, details in columns.items() if not details.get("admin", False)]
+        # Exclude admin and BLOB columns
+        visible_columns = list_columns(columns)
         
         query = f"SELECT {', '.join(visible_columns)} FROM {context_name}"
         if debug:
-            print(f"DEBUG: Generated fetch query for {context_name}: {query}")
+            log.debug("Generated fetch query for %s: %s", context_name, query)
         return query
 
         
         """ query = f"SELECT {', '.join(all_columns.keys())} FROM {context_name}"
-        print(f"Generated fetch query for context '{context_name}': {query}")
+        log.debug("Generated fetch query for context '%s': %s", context_name, query)
         return query """
 
     def generate_insert_query(debug=False):
         insertable_columns = [
             col for col, details in all_columns.items()
-            if not details.get("admin", False) and col != primary_key
+            if is_list_column(details) and col != primary_key
         ]
         query = (
             f"INSERT INTO {context_name} ({', '.join(insertable_columns)}) "
             f"VALUES ({', '.join(f':{col}' for col in insertable_columns)})"
         )
         if debug:
-            print(f"Generated insert query for context '{context_name}': {query}")
+            log.debug("Generated insert query for context '%s': %s", context_name, query)
         return query
 
     def generate_update_query(context_name, columns):
@@ -81,13 +170,13 @@ def query_generator(context_name, debug=False):
         set_clause = ", ".join([f"{col} = :{col}" for col in updatable_columns])
         query = f"UPDATE {context_name} SET {set_clause} WHERE {primary_key} = :{primary_key}"
         if debug:
-            print(f"Generated update query for context '{context_name}': {query}")
+            log.debug("Generated update query for context '%s': %s", context_name, query)
         return query
 
     def generate_delete_query():
         query = f"DELETE FROM {context_name} WHERE {primary_key} = :{primary_key}"
         if debug:
-            print(f"Generated delete query for context '{context_name}': {query}")
+            log.debug("Generated delete query for context '%s': %s", context_name, query)
         return query
 
     return {
@@ -101,6 +190,42 @@ def query_generator(context_name, debug=False):
 
 
 
+# Comparison operators allowed as where_conditions values (None means "=")
+WHERE_OPERATORS = ("=", "<>", "<", "<=", ">", ">=", "LIKE")
+
+
+def generate_where_clause(where_conditions, column_definitions):
+    """
+    Generates the body of a parameterized WHERE clause.
+
+    Each condition compares a column with the parameter of the same name
+    (e.g. "PartName LIKE :PartName"). LIKE conditions use backslash as the
+    escape character.
+
+    Args:
+        where_conditions (dict): Column name -> operator from WHERE_OPERATORS (None for "=").
+        column_definitions (dict): Dictionary of column definitions.
+
+    Returns:
+        str: Conditions joined with AND.
+
+    Raises:
+        ValueError: If a column or operator is invalid.
+    """
+    clauses = []
+    for col, operator in where_conditions.items():
+        if col not in column_definitions:
+            raise ValueError(f"Invalid filter column: {col}")
+        operator = (operator or "=").upper()
+        if operator not in WHERE_OPERATORS:
+            raise ValueError(f"Invalid filter operator: {operator}")
+        if operator == "LIKE":
+            clauses.append(f"{col} LIKE :{col} ESCAPE '\\'")
+        else:
+            clauses.append(f"{col} {operator} :{col}")
+    return " AND ".join(clauses)
+
+
 def generate_fetch_query_parts(mode, table_name, column_definitions, where_conditions=None, order_by=None, exclude_admin_columns=True):
     """
     Generates a dynamic SELECT query based on the provided mode and parameters.
@@ -109,18 +234,17 @@ def generate_fetch_query_parts(mode, table_name, column_definitions, where_condi
         mode (str): Query mode - "Basic", "Where", or "WhereAndSort".
         table_name (str): The name of the database table.
         column_definitions (dict): Dictionary of column definitions.
-        where_conditions (dict, optional): Conditions for the WHERE clause.
+        where_conditions (dict, optional): Conditions for the WHERE clause, as column
+            name -> operator (see generate_where_clause). Values are bound by column name.
         order_by (str, optional): Column to sort by.
         exclude_admin_columns (bool, optional): Whether to exclude admin columns.
+            BLOB columns are always excluded.
 
     Returns:
         str: The dynamically generated SELECT query.
     """
     # Filter columns based on exclusion rules
-    columns = [
-        col for col, details in column_definitions.items()
-        if not (exclude_admin_columns and details.get("admin", False))
-    ]
+    columns = list_columns(column_definitions, exclude_admin_columns)
 
     # Base SELECT query
     base_query = f"SELECT {', '.join(columns)} FROM {table_name}"
@@ -133,14 +257,12 @@ def generate_fetch_query_parts(mode, table_name, column_definitions, where_condi
         case "Where":
             if not where_conditions:
                 raise ValueError("WHERE conditions must be provided for mode 'Where'.")
-            where_clauses = [f"{col} = :{col}" for col in where_conditions.keys()]
-            return f"{base_query} WHERE {' AND '.join(where_clauses)}"
+            return f"{base_query} WHERE {generate_where_clause(where_conditions, column_definitions)}"
 
         case "WhereAndSort":
             if not where_conditions or not order_by:
                 raise ValueError("WHERE conditions and ORDER BY must be provided for mode 'WhereAndSort'.")
-            where_clauses = [f"{col} = :{col}" for col in where_conditions.keys()]
-            return f"{base_query} WHERE {' AND '.join(where_clauses)} ORDER BY {order_by}"
+            return f"{base_query} WHERE {generate_where_clause(where_conditions, column_definitions)} ORDER BY {order_by}"
 
         case _:
             raise ValueError(f"Invalid mode '{mode}'. Valid modes are: 'Basic', 'Where', 'WhereAndSort'.")
@@ -148,6 +270,168 @@ def generate_fetch_query_parts(mode, table_name, column_definitions, where_condi
 
 
 
+def sort_term(col, details):
+    """
+    Returns the ORDER BY term of a column: text compares case-insensitively
+    (COLLATE NOCASE), as in the client-side sort of core.sorting; numbers as stored.
+    """
+    from core.filters import NUMERIC_TYPES
+
+    return col if details.get("type") in NUMERIC_TYPES else f"{col} COLLATE NOCASE"
+
+
+def generate_keyset_page_query(table_name, column_definitions, primary_key, sort_column=None, sort_direction="ASC", after=False, where_conditions=None, exclude_admin_columns=True, after_null=False):
+    """
+    Generates a keyset (seek) paginated SELECT built on generate_fetch_query_parts.
+
+    Pages are ordered by the sort column with the primary key as a tie-breaker,
+    and each page starts after the last row of the previous one instead of
+    using OFFSET, so fetching page N costs the same as fetching page 1.
+    A non-key sort column compares like the client-side sort (see sort_term),
+    so an index on that term serves both the seek and the order (see
+    core.pagination.ensure_sort_indexes); NULLs come first ascending and last
+    descending, as SQLite sorts them.
+
+    Args:
+        table_name (str): The name of the database table.
+        column_definitions (dict): Dictionary of column definitions.
+        primary_key (str): The primary key column, used as the tie-breaker.
+        sort_column (str, optional): Column to sort by. Defaults to the primary key.
+        sort_direction (str, optional): "ASC" or "DESC".
+        after (bool, optional): Whether to seek past a previous page. The query then
+            expects :after_key (sort value) and :after_pk parameters.
+        where_conditions (dict, optional): Filter conditions (see generate_where_clause).
+        exclude_admin_columns (bool, optional): Whether to exclude admin columns.
+        after_null (bool, optional): With after, seek past a row whose sort value is
+            NULL; the query then expects only :after_pk.
+
+    Returns:
+        str: SELECT query expecting a :page_size parameter.
+
+    Raises:
+        ValueError: If the sort column or direction is invalid.
+    """
+    sort_column = sort_column or primary_key
+    if sort_column not in column_definitions:
+        raise ValueError(f"Invalid sort column: {sort_column}")
+    sort_direction = sort_direction.upper()
+    if sort_direction not in ("ASC", "DESC"):
+        raise ValueError(f"Invalid sort direction: {sort_direction}")
+
+    base_query = generate_fetch_query_parts("Basic", table_name, column_definitions, exclude_admin_columns=exclude_admin_columns)
+    comparison = ">" if sort_direction == "ASC" else "<"
+
+    conditions = [generate_where_clause(where_conditions, column_definitions)] if where_conditions else []
+
+    if sort_column == primary_key:
+        if after:
+            conditions.append(f"{primary_key} {comparison} :after_pk")
+        order_clause = f"{primary_key} {sort_direction}"
+    else:
+        term = sort_term(sort_column, column_definitions[sort_column])
+        collate = " COLLATE NOCASE" if term != sort_column else ""
+        order_clause = f"{term} {sort_direction}, {primary_key} {sort_direction}"
+        if after:
+            # Each seek is one range of an index on the sort term; a page that
+            # may cross between the NULLs and the other values takes two. The
+            # collation goes on the parameter side, where the index can use it,
+            # and text columns hold no value below '' but NULL.
+            null_seek = f"{sort_column} IS NULL AND {primary_key} {comparison} :after_pk"
+            value_seek = f"({sort_column}, {primary_key}) {comparison} (:after_key{collate}, :after_pk)"
+            not_null = f"{sort_column} >= ''{collate}" if collate else f"{sort_column} IS NOT NULL"
+            if sort_direction == "ASC":
+                seeks = [null_seek, not_null] if after_null else [value_seek]
+            else:
+                seeks = [null_seek] if after_null else [value_seek, f"{sort_column} IS NULL"]
+            if len(seeks) > 1:
+                ranges = [
+                    f"SELECT * FROM ({base_query} WHERE {' AND '.join(conditions + [seek])} "
+                    f"ORDER BY {order_clause} LIMIT :page_size)"
+                    for seek in seeks
+                ]
+                return f"{' UNION ALL '.join(ranges)} ORDER BY {order_clause} LIMIT :page_size"
+            conditions.append(seeks[0])
+
+    where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{base_query}{where_clause} ORDER BY {order_clause} LIMIT :page_size"
+
+
+def generate_key_query(table_name, column_definitions, primary_key, where_conditions=None, sort_keys=None):
+    """
+    Generates a SELECT of just the primary keys of a (filtered) table, in display order.
+
+    Text columns sort case-insensitively and the primary key breaks ties,
+    so the order matches the client-side sort in core.sorting.
+
+    Args:
+        table_name (str): The name of the database table.
+        column_definitions (dict): Dictionary of column definitions.
+        primary_key (str): The primary key column.
+        where_conditions (dict, optional): Filter conditions (see generate_where_clause).
+        sort_keys (list, optional): (column, "ASC" | "DESC") pairs, most significant first.
+
+    Returns:
+        str: SELECT query returning one primary key column.
+
+    Raises:
+        ValueError: If a sort column or direction is invalid.
+    """
+    order_clauses = []
+    for col, direction in sort_keys or []:
+        if col not in column_definitions:
+            raise ValueError(f"Invalid sort column: {col}")
+        direction = direction.upper()
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Invalid sort direction: {direction}")
+        order_clauses.append(f"{sort_term(col, column_definitions[col])} {direction}")
+    order_clauses.append(f"{primary_key} ASC")
+
+    where_clause = f" WHERE {generate_where_clause(where_conditions, column_definitions)}" if where_conditions else ""
+    return f"SELECT {primary_key} FROM {table_name}{where_clause} ORDER BY {', '.join(order_clauses)}"
+
+
+def generate_rows_by_key_query(table_name, column_definitions, primary_key, count, exclude_admin_columns=True):
+    """
+    Generates a SELECT of the rows with any of count primary keys (bound as positional parameters).
+
+    Args:
+        table_name (str): The name of the database table.
+        column_definitions (dict): Dictionary of column definitions.
+        primary_key (str): The primary key column.
+        count (int): Number of keys to bind.
+        exclude_admin_columns (bool, optional): Whether to exclude admin columns.
+
+    Returns:
+        str: The SELECT query. Rows come back in no particular order.
+    """
+    base_query = generate_fetch_query_parts("Basic", table_name, column_definitions, exclude_admin_columns=exclude_admin_columns)
+    return f"{base_query} WHERE {primary_key} IN ({', '.join('?' * count)})"
+
+
+def generate_search_query(table_name, column_definitions, primary_key, fts_table, exclude_admin_columns=True):
+    """
+    Generates a ranked full-text search built on generate_fetch_query_parts.
+
+    The FTS5 table is matched in a subquery and joined back on the primary
+    key, so the selected columns are exactly those of the datasheet.
+
+    Args:
+        table_name (str): The name of the database table.
+        column_definitions (dict): Dictionary of column definitions.
+        primary_key (str): The primary key column (the FTS rowid).
+        fts_table (str): The FTS5 table indexing table_name.
+        exclude_admin_columns (bool, optional): Whether to exclude admin columns.
+
+    Returns:
+        str: SELECT query expecting :match (an FTS5 query) and :limit parameters, best matches first.
+    """
+    base_query = generate_fetch_query_parts("Basic", table_name, column_definitions, exclude_admin_columns=exclude_admin_columns)
+    hits = (
+        f"SELECT rowid AS fts_rowid, bm25({fts_table}) AS fts_rank FROM {fts_table} "
+        f"WHERE {fts_table} MATCH :match ORDER BY fts_rank LIMIT :limit"
+    )
+    return f"{base_query} JOIN ({hits}) AS hits ON hits.fts_rowid = {table_name}.{primary_key} ORDER BY hits.fts_rank"
+
 
 def generate_delete_query_parts(table_name, primary_key):
     """
@@ -183,4 +467,4 @@ def generate_sort_query(base_query, sort_column, sort_direction, column_definiti
     if sort_column not in column_definitions:
         raise ValueError(f"Invalid sort column: {sort_column}")
 
-    return f"{base_query} ORDER BY {sort_column} {sort_direction}"
+    return f"{base_query} ORDER BY {sort_term(sort_column, column_definitions[sort_column])} {sort_direction}"
@@ -0,0 +1,194 @@
+"""
+Row source for virtual datasheets: the display order of a (filtered, sorted)
+table as a list of primary keys, with rows fetched by key only when shown.
+
+Only the keys are held for the whole table; full rows are read a window at a
+time and kept in a bounded LRU cache.
+"""
+from collections import OrderedDict
+
+from config.config_data import COLUMN_DEFINITIONS, DEBUG, VIRTUAL_CACHE_ROWS
+from core.config_utils import get_primary_key
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Most keys bound in one "IN (...)" lookup
+KEY_BATCH_SIZE = 500
+
+
+class RowSource:
+    """
+    Maps row positions to rows of a context's table.
+
+    Attributes:
+        keys (list): Primary keys in display order.
+        cache (OrderedDict): Primary key -> row, least recently used first.
+    """
+
+    def __init__(self, context_name, manager=None, cache_rows=VIRTUAL_CACHE_ROWS):
+        self.context_name = context_name
+        self.columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+        self.primary_key = get_primary_key(context_name)
+        if not self.primary_key:
+            raise ValueError(f"No primary key defined for context: {context_name}")
+        if manager is None:
+            from core.database_transactions import db_manager as manager
+        self.manager = manager
+        self.cache_rows = cache_rows
+        self.keys = []
+        self.positions = None
+        self.cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key_query(self, where_conditions=None, sort_keys=None):
+        """ Returns the SELECT of the display-order keys (see generate_key_query). """
+        from core.query_builder import generate_key_query
+        return generate_key_query(self.context_name, self.columns, self.primary_key, where_conditions, sort_keys)
+
+    def load_keys(self, where_conditions=None, params=None, sort_keys=None, token=None, through_writer=False):
+        """
+        Reads the display-order keys from committed data. Safe on worker threads;
+        pass the result to set_keys() on the main thread.
+
+        Args:
+            where_conditions (dict, optional): Filter conditions (see core.filters.parse_filters).
+            params (dict, optional): Filter values.
+            sort_keys (list, optional): (column, direction) pairs.
+            token (CancelToken, optional): Stops the read early when cancelled.
+            through_writer (bool): Read on the writer instead (main thread only), to
+                include the open transaction's changes.
+
+        Returns:
+            list: Primary keys, or None if the token was cancelled.
+        """
+        from core.background import stream_query
+
+        if through_writer:
+            rows = self.manager.execute_query(self.key_query(where_conditions, sort_keys), params, debug=False)
+            return [row[self.primary_key] for row in rows]
+
+        keys = []
+        for rows in stream_query(self.key_query(where_conditions, sort_keys), params, 5000, token, self.manager):
+            keys.extend(row[self.primary_key] for row in rows)
+        if token and token.cancelled:
+            return None
+        return keys
+
+    def set_keys(self, keys):
+        """ Replaces the display order. Cached rows stay valid. """
+        self.keys = list(keys)
+        self.positions = None
+
+    def set_rows(self, rows):
+        """ Shows exactly these rows, in this order (e.g. search results). """
+        self.set_keys(row[self.primary_key] for row in rows)
+        for row in rows:
+            self._remember(row)
+
+    def index_of(self, key):
+        """ Returns the display position of a primary key, or None. """
+        if self.positions is None:
+            self.positions = {str(k): index for index, k in enumerate(self.keys)}
+        return self.positions.get(str(key))
+
+    def invalidate(self, keys=None):
+        """ Drops cached rows (all of them if keys is None) so they are re-read when shown. """
+        if keys is None:
+            self.cache.clear()
+            return
+        wanted = {str(key) for key in keys}
+        for key in [key for key in self.cache if str(key) in wanted]:
+            del self.cache[key]
+
+    def remove(self, keys):
+        """ Removes rows from the display order (e.g. after a delete). """
+        wanted = {str(key) for key in keys}
+        self.set_keys(key for key in self.keys if str(key) not in wanted)
+        self.invalidate(keys)
+
+    def rows(self, start, stop, debug=DEBUG):
+        """
+        Returns the rows shown at positions start..stop-1.
+
+        Rows missing from the cache are read by primary key; rows deleted
+        since the keys were loaded are skipped.
+
+        Returns:
+            list: Rows as dictionaries, in display order.
+        """
+        window = self.keys[max(0, start):max(0, stop)]
+        missing = [key for key in window if key not in self.cache]
+        for offset in range(0, len(missing), KEY_BATCH_SIZE):
+            batch = missing[offset:offset + KEY_BATCH_SIZE]
+            for row in self._read(batch):
+                self._remember(row)
+            if debug:
+                log.debug("Read %s rows of %s for the virtual datasheet", len(batch), self.context_name)
+
+        rows = []
+        for key in window:
+            row = self.cache.get(key)
+            if row is not None:
+                self.cache.move_to_end(key)
+                rows.append(row)
+        return rows
+
+    def sort_cached(self, sort_keys, column_types):
+        """
+        Sorts the display order in memory when every row is cached (e.g. search results).
+
+        Returns:
+            bool: False if some rows are not cached and the keys must be reloaded instead.
+        """
+        from core.sorting import sort_rows
+
+        if any(key not in self.cache for key in self.keys):
+            return False
+        self.set_keys(sort_rows(self.keys, sort_keys, column_types, lambda key, col: self.cache[key].get(col)))
+        return True
+
+    def _read(self, keys):
+        from core.query_builder import generate_rows_by_key_query
+
+        query = generate_rows_by_key_query(self.context_name, self.columns, self.primary_key, len(keys))
+        # Pooled readers cannot see the writer's open transaction
+        if self.manager.has_uncommitted_writes():
+            return self.manager.execute_query(query, tuple(keys), debug=False)
+        return self.manager.execute_read(query, tuple(keys), debug=False)
+
+    def _remember(self, row):
+        key = row[self.primary_key]
+        self.cache[key] = row
+        self.cache.move_to_end(key)
+        while len(self.cache) > max(self.cache_rows, 1):
+            self.cache.popitem(last=False)
+
+
+def count_rows(context_name, manager=None):
+    """ Returns the number of rows in a context's table. """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    return manager.execute_read(f"SELECT COUNT(*) AS row_count FROM {context_name}", debug=False)[0]["row_count"]
+
+
+def estimate_rows(context_name, manager=None):
+    """
+    Returns a cheap estimate of the number of rows in a context's table, without scanning it.
+
+    Uses the ANALYZE statistics in sqlite_stat1 when the table has any, else
+    its largest rowid, which is an upper bound once rows have been deleted.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    has_stats = manager.execute_read(
+        "SELECT 1 AS found FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'", debug=False
+    )
+    if has_stats:
+        stats = manager.execute_read("SELECT stat FROM sqlite_stat1 WHERE tbl = ?", (context_name,), debug=False)
+        if stats:
+            # The first number of each entry is the table's row count
+            return max(int(row["stat"].split()[0]) for row in stats)
+    return manager.execute_read(f"SELECT MAX(rowid) AS row_count FROM {context_name}", debug=False)[0]["row_count"] or 0
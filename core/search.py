@@ -0,0 +1,169 @@
+"""
+FTS5 full-text search over the text columns of the datasheet contexts.
+
+Each context in SEARCH_CONTEXTS gets an external-content FTS5 table
+(<Table>_fts) over its text columns, kept in sync by triggers so every write
+path updates it. Searches are ranked with bm25.
+"""
+import re
+
+from config.config_data import COLUMN_DEFINITIONS, DEBUG, SEARCH_CONTEXTS, SEARCH_LIMIT
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Column types in COLUMN_DEFINITIONS that hold searchable text
+TEXT_TYPES = ("string", "text", "options")
+
+
+def fts_table_name(context_name):
+    return f"{context_name}_fts"
+
+
+def searchable_columns(connection, context_name):
+    """
+    Returns the context's text columns that exist in the table and are not BLOBs.
+
+    Args:
+        connection (sqlite3.Connection): Connection to read the table schema from.
+        context_name (str): The context (e.g., "Parts").
+
+    Returns:
+        list: Column names, in COLUMN_DEFINITIONS order.
+    """
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    declared = {row[1]: (row[2] or "").upper() for row in connection.execute(f"PRAGMA table_info({context_name})")}
+    return [
+        col_name
+        for col_name, col_details in columns.items()
+        if col_details.get("type", "text") in TEXT_TYPES
+        and not col_details.get("admin", False)
+        and not col_details.get("is_primary_key", False)
+        and col_name in declared
+        and "BLOB" not in declared[col_name]
+    ]
+
+
+def _index_sql(context_name, primary_key, columns):
+    """ CREATE statements for a context's FTS table and its sync triggers. """
+    fts = fts_table_name(context_name)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    insert_new = f"INSERT INTO {fts} (rowid, {column_list}) VALUES (new.{primary_key}, {new_values});"
+    delete_old = f"INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.{primary_key}, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, content='{context_name}', "
+        f"content_rowid='{primary_key}', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {context_name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {context_name} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {primary_key}, {column_list} ON {context_name} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def ensure_search_index(manager=None, contexts=SEARCH_CONTEXTS, debug=DEBUG):
+    """
+    Creates (or recreates, when the searchable columns changed) the FTS tables and triggers.
+
+    A new or recreated index is filled from its table. Safe to call at every startup.
+
+    Args:
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        contexts (list): Contexts to index.
+
+    Returns:
+        list: Contexts whose index was (re)built.
+    """
+    from core.config_utils import get_primary_key
+
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    rebuilt = []
+    with manager.pool.writer_connection():
+        connection = manager.connection
+        for context_name in contexts:
+            primary_key = get_primary_key(context_name)
+            columns = searchable_columns(connection, context_name)
+            if not primary_key or not columns:
+                continue
+
+            statements = _index_sql(context_name, primary_key, columns)
+            fts = fts_table_name(context_name)
+            existing = connection.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+            ).fetchone()
+            if existing and existing[0] == statements[0]:
+                continue
+
+            manager.begin_transaction(debug=False)
+            try:
+                for suffix in ("insert", "delete", "update"):
+                    connection.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+                connection.execute(f"DROP TABLE IF EXISTS {fts}")
+                for statement in statements:
+                    connection.execute(statement)
+                connection.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+            except Exception:
+                manager.rollback_transaction(debug=False)
+                raise
+            manager.commit_transaction(debug=False)
+            rebuilt.append(context_name)
+            if debug:
+                log.debug("Built search index %s over %s", fts, columns)
+    return rebuilt
+
+
+def match_expression(text):
+    """
+    Turns free text into an FTS5 query: every word must match, as a prefix.
+
+    Quoting each word keeps FTS5 operators and punctuation in the input from
+    being parsed as query syntax.
+
+    Returns:
+        str: The FTS5 query, or None if the text has no words.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_query(context_name):
+    """
+    Returns the ranked search SELECT for a context (expects :match and :limit).
+
+    Raises:
+        ValueError: If the context is not searchable.
+    """
+    from core.config_utils import get_primary_key
+    from core.query_builder import generate_search_query
+
+    if context_name not in SEARCH_CONTEXTS:
+        raise ValueError(f"No search index for context: {context_name}")
+    columns = COLUMN_DEFINITIONS[context_name]["columns"]
+    return generate_search_query(context_name, columns, get_primary_key(context_name), fts_table_name(context_name))
+
+
+def search(context_name, text, limit=SEARCH_LIMIT, manager=None):
+    """
+    Full-text search of a context, best matches first.
+
+    Args:
+        context_name (str): The context to search (e.g., "Parts").
+        text (str): Free text; each word matches as a prefix.
+        limit (int): Most rows to return.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+
+    Returns:
+        list: Matching rows as dictionaries, with the datasheet's columns.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    match = match_expression(text)
+    if match is None:
+        return []
+    return manager.execute_read(search_query(context_name), {"match": match, "limit": limit}, debug=False)
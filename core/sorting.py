@@ -0,0 +1,94 @@
+"""
+Client-side sorting of already loaded rows, typed by COLUMN_DEFINITIONS.
+
+Sort keys are a list of (column, direction) pairs, most significant first.
+Sorting is stable, so rows that tie on every key keep their current order.
+"""
+from core.filters import NUMERIC_TYPES, UNFILTERABLE_TYPES
+
+
+def typed_key(column_type):
+    """
+    Returns a sort key function for values of a column type.
+
+    Blank values sort first (as NULLs do in SQLite). Numeric columns compare
+    as numbers, with any non-numeric text after them; other columns compare
+    as case-insensitive text.
+
+    Args:
+        column_type (str): The column's COLUMN_DEFINITIONS type (e.g. "int").
+
+    Returns:
+        callable: value -> comparable key.
+    """
+    numeric = column_type in NUMERIC_TYPES
+
+    def key(value):
+        if value is None or value == "":
+            return (0, 0)
+        if numeric:
+            if isinstance(value, (int, float)):
+                return (1, value)
+            try:
+                return (1, float(value))
+            except (TypeError, ValueError):
+                pass
+        return (2, str(value).casefold())
+
+    return key
+
+
+def is_sortable(column_type):
+    """ Whether rows can be sorted client-side by a column of this type. """
+    return column_type not in UNFILTERABLE_TYPES
+
+
+def sort_rows(rows, sort_keys, column_types, value_of):
+    """
+    Stable multi-column sort.
+
+    Args:
+        rows (iterable): Rows in their current order (dicts, item ids, ...).
+        sort_keys (list): (column, "ASC" | "DESC") pairs, most significant first.
+        column_types (dict): Column name -> COLUMN_DEFINITIONS type.
+        value_of (callable): (row, column) -> value.
+
+    Returns:
+        list: The rows in sorted order.
+    """
+    ordered = list(rows)
+    # Sorting by the least significant key first relies on sort stability
+    for column, direction in reversed(sort_keys):
+        key = typed_key(column_types.get(column, "string"))
+        ordered.sort(key=lambda row: key(value_of(row, column)), reverse=direction == "DESC")
+    return ordered
+
+
+def next_sort_keys(sort_keys, column, add=False):
+    """
+    Returns the sort keys after a click on a column heading.
+
+    A plain click on the primary sort column flips its direction; on any
+    other column it sorts by that column alone, ascending. With add (e.g.
+    Shift+click) the column is appended as a further key, or flipped if it
+    is already one.
+
+    Args:
+        sort_keys (list): Current (column, direction) pairs.
+        column (str): The clicked column.
+        add (bool): Add or flip the column instead of replacing the keys.
+
+    Returns:
+        list: New (column, direction) pairs.
+    """
+    def flipped(direction):
+        return "DESC" if direction == "ASC" else "ASC"
+
+    if add:
+        if any(col == column for col, _ in sort_keys):
+            return [(col, flipped(direction) if col == column else direction) for col, direction in sort_keys]
+        return list(sort_keys) + [(column, "ASC")]
+
+    if sort_keys and sort_keys[0][0] == column:
+        return [(column, flipped(sort_keys[0][1]))] + list(sort_keys[1:])
+    return [(column, "ASC")]
@@ -0,0 +1,218 @@
+"""
+Thumbnails of the images stored in Images.ImageData.
+
+Each image is decoded and downscaled once. The result is kept as a PNG file in
+an on-disk cache keyed by ImageID and the SHA-1 of the stored bytes, plus a
+small in-memory LRU. A changed blob hashes differently, so its old thumbnail is
+never reused and is deleted when the new one is written. The disk cache is
+trimmed to THUMBNAIL_CACHE_BYTES, least recently used files first.
+
+Decoding needs Pillow, which is optional: without it previews_available()
+is False and the preview panel says so.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from config.config_data import DEBUG, THUMBNAIL_CACHE_BYTES, THUMBNAIL_DIR, THUMBNAIL_MEMORY_ITEMS, THUMBNAIL_SIZE
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_TABLE = "Images"
+IMAGE_COLUMN = "ImageData"
+
+
+def previews_available():
+    """ Whether thumbnails can be made (Pillow is installed). """
+    return Image is not None
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """
+    Decodes image bytes and downscales them to fit within size, keeping the aspect ratio.
+
+    Args:
+        data (bytes): The stored image (any format Pillow reads).
+        size (tuple): (width, height) bound.
+
+    Returns:
+        bytes: The thumbnail as PNG.
+
+    Raises:
+        RuntimeError: If Pillow is not installed.
+        ValueError: If the bytes are not a readable image.
+    """
+    if Image is None:
+        raise RuntimeError("Image previews need Pillow (pip install Pillow).")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # draft() lets JPEG decode straight at a reduced scale
+            image.draft("RGB", size)
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                image = image.convert("RGBA")
+            output = io.BytesIO()
+            image.save(output, format="PNG", optimize=True)
+            return output.getvalue()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Not a readable image: {e}")
+
+
+class ThumbnailCache:
+    """
+    Disk and memory cache of image thumbnails.
+
+    get() is blocking and safe on worker threads; the UI calls it from the
+    background executor.
+
+    Attributes:
+        directory (str): Folder holding the cached PNG files.
+        memory (OrderedDict): ImageID -> PNG bytes, least recently used first.
+    """
+
+    def __init__(self, manager, directory=None, max_bytes=THUMBNAIL_CACHE_BYTES,
+                 memory_items=THUMBNAIL_MEMORY_ITEMS, size=THUMBNAIL_SIZE, render=make_thumbnail):
+        self.manager = manager
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(manager.db_path)), "thumbnails")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.size = size
+        self.render = render
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+        manager.add_write_listener(self.invalidate)
+
+    def invalidate(self, table_name=None):
+        """ Drops the in-memory thumbnails after a write to Images; disk entries are keyed by content. """
+        if table_name is None or table_name.lower() == IMAGE_TABLE.lower():
+            with self._lock:
+                self.memory.clear()
+
+    def content_hash(self, image_id):
+        """ Returns the SHA-1 of an image's stored bytes, or None if it has none. Streams the blob. """
+        from core.blobs import iter_blob
+
+        digest = hashlib.sha1()
+        empty = True
+        for chunk in iter_blob(IMAGE_TABLE, IMAGE_COLUMN, image_id, manager=self.manager):
+            digest.update(chunk)
+            empty = False
+        return None if empty else digest.hexdigest()
+
+    def path_for(self, image_id, content_hash):
+        return os.path.join(self.directory, f"{int(image_id)}-{content_hash}.png")
+
+    def get(self, image_id, debug=DEBUG):
+        """
+        Returns the thumbnail of an image, making it on first use.
+
+        Args:
+            image_id (int): The image's ImageID.
+
+        Returns:
+            bytes: PNG thumbnail, or None if the image has no data.
+
+        Raises:
+            RuntimeError: If previews are unavailable (no Pillow).
+            ValueError: If the stored bytes are not a readable image.
+        """
+        image_id = int(image_id)
+        with self._lock:
+            cached = self.memory.get(image_id)
+            if cached is not None:
+                self.memory.move_to_end(image_id)
+                return cached
+
+        content_hash = self.content_hash(image_id)
+        if content_hash is None:
+            return None
+
+        path = self.path_for(image_id, content_hash)
+        try:
+            with open(path, "rb") as thumbnail_file:
+                thumbnail = thumbnail_file.read()
+            os.utime(path)  # Mark as recently used for trimming
+        except FileNotFoundError:
+            from core.blobs import read_blob
+
+            thumbnail = self.render(read_blob(IMAGE_TABLE, IMAGE_COLUMN, image_id, self.manager), self.size)
+            self._store(image_id, path, thumbnail)
+            if debug:
+                log.debug("Made thumbnail for image %s (%s bytes)", image_id, len(thumbnail))
+
+        with self._lock:
+            self.memory[image_id] = thumbnail
+            self.memory.move_to_end(image_id)
+            while len(self.memory) > max(self.memory_items, 0):
+                self.memory.popitem(last=False)
+        return thumbnail
+
+    def _store(self, image_id, path, thumbnail):
+        """ Writes a thumbnail, removes the image's stale ones and trims the folder. """
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as thumbnail_file:
+            thumbnail_file.write(thumbnail)
+        os.replace(temporary, path)
+
+        prefix = f"{image_id}-"
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".png") and os.path.join(self.directory, name) != path:
+                self._remove(os.path.join(self.directory, name))
+        self.trim()
+
+    def trim(self):
+        """
+        Deletes the least recently used thumbnails until the folder fits in max_bytes.
+
+        Returns:
+            int: Number of files deleted.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False  # Removed by another worker, or in use
+
+
+# One cache per DatabaseTransactionManager
+caches = {}
+
+
+def get_thumbnail_cache(manager=None):
+    """ Returns the thumbnail cache for a manager (default: the application manager), creating it on first use. """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    cache = caches.get(manager)
+    if cache is None:
+        cache = ThumbnailCache(manager, directory=THUMBNAIL_DIR)
+        caches[manager] = cache
+    return cache
@@ -0,0 +1,532 @@
+"""
+Bill-of-materials rollups for the Assemblies table.
+
+An assembly's cost, weight and hours come from:
+    - Part lines: Assemblies_Parts rows with EntityType 'Part' (AssemblyID
+      contains PartID) and AssemblyComponents rows with Type 'Part'.
+    - Subassemblies: Assemblies_Parts rows with EntityType 'Assembly'
+      (ParentAssemblyID contains AssemblyID), AssemblyComponents rows with
+      Type 'Assembly', and Assemblies.ParentAssemblyID (quantity 1 unless a
+      link row already gives the quantity).
+
+    AssemCost          = sum(qty * cheapest Suppliers.PricePerUnit) + sum(qty * child AssemCost)
+    AssemWeight        = sum(qty * Parts.PartWeight) + sum(qty * child AssemWeight)
+    AssemHoursParts    = sum(line TotalHours) + sum(qty * child AssemTotalHours)
+    AssemTotalHours    = AssemHoursParts + AssemHoursAssembly (entered by the user)
+    AssemCostFlag      = 1 if any part in the subtree has no price
+    AssemWeightFlag    = 1 if any part in the subtree has no weight
+
+Every assembly is computed once, children before parents, so shared
+subassemblies are never walked twice.
+"""
+import argparse
+import math
+from collections import defaultdict, deque
+
+from config.config_data import DEBUG, ROOT_ASSEMBLY_ID
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+ROLLUP_FIELDS = ("AssemCost", "AssemWeight", "AssemHoursParts", "AssemTotalHours", "AssemCostFlag", "AssemWeightFlag")
+
+UPDATE_ROLLUP_QUERY = (
+    "UPDATE Assemblies SET AssemCost = :AssemCost, AssemWeight = :AssemWeight, "
+    "AssemHoursParts = :AssemHoursParts, AssemTotalHours = :AssemTotalHours, "
+    "AssemCostFlag = :AssemCostFlag, AssemWeightFlag = :AssemWeightFlag "
+    "WHERE AssemblyID = :AssemblyID"
+)
+
+
+def _number(value):
+    """ Returns value as a float, or None when it is empty or not numeric. """
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _key(value):
+    """ Returns an integer id, or None for empty / non-numeric ids. """
+    number = _number(value)
+    return int(number) if number is not None else None
+
+
+class BomGraph:
+    """
+    The assembly hierarchy and part data needed for rollups, loaded in a handful of queries.
+
+    Attributes:
+        assemblies (dict): AssemblyID -> stored Assemblies row (rollup fields and AssemHoursAssembly).
+        children (dict): Parent AssemblyID -> {child AssemblyID: quantity}.
+        parents (dict): Child AssemblyID -> set of parent AssemblyIDs.
+        part_lines (dict): AssemblyID -> [(PartID, quantity, line hours), ...].
+        part_costs (dict): PartID -> cheapest numeric PricePerUnit.
+        part_weights (dict): PartID -> numeric PartWeight.
+    """
+
+    def __init__(self):
+        self.assemblies = {}
+        self.children = defaultdict(dict)
+        self.parents = defaultdict(set)
+        self.part_lines = defaultdict(list)
+        self.part_costs = {}
+        self.part_weights = {}
+
+    def add_child(self, parent_id, child_id, quantity, replace=True):
+        if parent_id is None or child_id is None or parent_id == child_id or parent_id == ROOT_ASSEMBLY_ID:
+            return
+        if child_id in self.children[parent_id]:
+            if not replace:
+                return
+            self.children[parent_id][child_id] += quantity
+        else:
+            self.children[parent_id][child_id] = quantity
+        self.parents[child_id].add(parent_id)
+
+    @classmethod
+    def load(cls, connection, assembly_ids=None, part_data=True):
+        """
+        Reads the hierarchy, part lines, weights and prices.
+
+        Args:
+            connection (sqlite3.Connection): Connection to read from.
+            assembly_ids (iterable, optional): Only load what is needed to compute
+                these assemblies: their rows, part lines and direct children.
+            part_data (bool): Also load part weights and prices (only the structure otherwise).
+
+        Returns:
+            BomGraph: The loaded graph.
+        """
+        graph = cls()
+        ids = None if assembly_ids is None else sorted(set(assembly_ids))
+        id_set = set(ids or ())
+
+        def where(*columns):
+            """ Restricts a query to ids on any of columns (no restriction for a full load). """
+            if ids is None:
+                return "", []
+            placeholders = ", ".join("?" for _ in ids)
+            return " AND (" + " OR ".join(f"{column} IN ({placeholders})" for column in columns) + ")", ids * len(columns)
+
+        assembly_query = (
+            "SELECT AssemblyID, ParentAssemblyID, AssemHoursAssembly, " + ", ".join(ROLLUP_FIELDS)
+            + " FROM Assemblies WHERE 1 = 1"
+        )
+        clause, params = where("AssemblyID", "ParentAssemblyID")
+        for row in connection.execute(assembly_query + clause, params):
+            row = dict(row)
+            if row["AssemblyID"] != ROOT_ASSEMBLY_ID:
+                graph.assemblies[row["AssemblyID"]] = row
+
+        link_edges = set()
+        # Part lines belong to AssemblyID, subassembly lines to ParentAssemblyID
+        clause, params = where("AssemblyID", "ParentAssemblyID")
+        for row in connection.execute(
+            "SELECT ParentAssemblyID, EntityType, AssemblyID, PartID, Quantity, HoursParts, HoursAssembly "
+            "FROM Assemblies_Parts WHERE COALESCE(deleteFlag, 0) = 0" + clause,
+            params,
+        ):
+            quantity = _number(row["Quantity"]) or 0.0
+            if row["EntityType"] == "Part":
+                if ids is not None and row["AssemblyID"] not in id_set:
+                    continue
+                hours = (_number(row["HoursParts"]) or 0.0) + (_number(row["HoursAssembly"]) or 0.0)
+                graph.part_lines[row["AssemblyID"]].append((_key(row["PartID"]), quantity, hours))
+            else:
+                parent_id, child_id = _key(row["ParentAssemblyID"]), row["AssemblyID"]
+                graph.add_child(parent_id, child_id, quantity)
+                link_edges.add((parent_id, child_id))
+
+        clause, params = where("AssemblyID")
+        for row in connection.execute(
+            "SELECT AssemblyID, ComponentID, Type, Quantity FROM AssemblyComponents WHERE 1 = 1" + clause, params
+        ):
+            quantity = _number(row["Quantity"]) or 0.0
+            if row["Type"] == "Part":
+                graph.part_lines[row["AssemblyID"]].append((row["ComponentID"], quantity, 0.0))
+            else:
+                graph.add_child(row["AssemblyID"], row["ComponentID"], quantity)
+                link_edges.add((row["AssemblyID"], row["ComponentID"]))
+
+        # ParentAssemblyID on the assembly itself counts once, unless a link row already sets the quantity
+        for assembly_id, row in graph.assemblies.items():
+            parent_id = _key(row["ParentAssemblyID"])
+            if (parent_id, assembly_id) not in link_edges:
+                graph.add_child(parent_id, assembly_id, 1.0, replace=False)
+
+        if ids is not None:
+            # Children linked only through the link tables still need their stored totals
+            missing = sorted({child for parent in ids for child in graph.children.get(parent, {})} - set(graph.assemblies))
+            if missing:
+                placeholders = ", ".join("?" for _ in missing)
+                for row in connection.execute(
+                    "SELECT AssemblyID, ParentAssemblyID, AssemHoursAssembly, " + ", ".join(ROLLUP_FIELDS)
+                    + f" FROM Assemblies WHERE AssemblyID IN ({placeholders})",
+                    missing,
+                ):
+                    graph.assemblies[row["AssemblyID"]] = dict(row)
+
+        if not part_data:
+            return graph
+
+        part_ids = None
+        if ids is not None:
+            part_ids = sorted({part_id for lines in graph.part_lines.values() for part_id, _, _ in lines if part_id is not None})
+            if not part_ids:
+                return graph
+        part_clause = "" if part_ids is None else f" AND PartID IN ({', '.join('?' for _ in part_ids)})"
+        part_params = part_ids or []
+
+        for row in connection.execute("SELECT PartID, PartWeight FROM Parts WHERE 1 = 1" + part_clause, part_params):
+            weight = _number(row["PartWeight"])
+            if weight is not None:
+                graph.part_weights[row["PartID"]] = weight
+
+        for row in connection.execute(
+            "SELECT PartID, PricePerUnit FROM Suppliers WHERE PartID IS NOT NULL" + part_clause, part_params
+        ):
+            price = _number(row["PricePerUnit"])
+            part_id = _key(row["PartID"])
+            if price is not None and (part_id not in graph.part_costs or price < graph.part_costs[part_id]):
+                graph.part_costs[part_id] = price
+
+        return graph
+
+    def topological_order(self, assembly_ids=None):
+        """
+        Orders assemblies so every child comes before its parents (Kahn's algorithm).
+
+        Args:
+            assembly_ids (iterable, optional): Restrict the order to these assemblies.
+                Children outside the set are treated as already computed.
+
+        Returns:
+            list: AssemblyIDs, children first.
+
+        Raises:
+            ValueError: If the hierarchy contains a cycle.
+        """
+        nodes = set(self.assemblies) if assembly_ids is None else set(assembly_ids) & set(self.assemblies)
+        pending = {node: sum(1 for child in self.children.get(node, ()) if child in nodes) for node in nodes}
+        ready = deque(sorted(node for node, count in pending.items() if count == 0))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for parent in self.parents.get(node, ()):
+                if parent in pending:
+                    pending[parent] -= 1
+                    if pending[parent] == 0:
+                        ready.append(parent)
+
+        if len(order) != len(nodes):
+            cycle = sorted(node for node in nodes if pending[node] > 0)
+            raise ValueError(f"Assembly hierarchy contains a cycle involving assemblies {cycle}.")
+        return order
+
+    def compute(self, order):
+        """
+        Computes rollup totals for the assemblies in order (children first).
+
+        Children that are not in order contribute their stored totals.
+
+        Returns:
+            dict: AssemblyID -> {rollup field: value}.
+        """
+        totals = {}
+        for assembly_id in order:
+            cost = weight = hours = 0.0
+            cost_flag = weight_flag = 0
+
+            for part_id, quantity, line_hours in self.part_lines.get(assembly_id, ()):
+                price = self.part_costs.get(part_id)
+                part_weight = self.part_weights.get(part_id)
+                if price is None:
+                    cost_flag = 1
+                else:
+                    cost += quantity * price
+                if part_weight is None:
+                    weight_flag = 1
+                else:
+                    weight += quantity * part_weight
+                hours += line_hours
+
+            for child_id, quantity in self.children.get(assembly_id, {}).items():
+                child = totals.get(child_id) or self.assemblies.get(child_id)
+                if child is None:
+                    continue
+                cost += quantity * (_number(child["AssemCost"]) or 0.0)
+                weight += quantity * (_number(child["AssemWeight"]) or 0.0)
+                hours += quantity * (_number(child["AssemTotalHours"]) or 0.0)
+                cost_flag |= 1 if _number(child["AssemCostFlag"]) else 0
+                weight_flag |= 1 if _number(child["AssemWeightFlag"]) else 0
+
+            own_hours = _number(self.assemblies[assembly_id]["AssemHoursAssembly"]) or 0.0
+            totals[assembly_id] = {
+                "AssemCost": cost,
+                "AssemWeight": weight,
+                "AssemHoursParts": hours,
+                "AssemTotalHours": hours + own_hours,
+                "AssemCostFlag": cost_flag,
+                "AssemWeightFlag": weight_flag,
+            }
+        return totals
+
+    def changed_rows(self, totals):
+        """ Returns update parameters for the totals that differ from the stored values. """
+        rows = []
+        for assembly_id, values in totals.items():
+            stored = self.assemblies[assembly_id]
+            if all(
+                _number(stored[field]) is not None and math.isclose(_number(stored[field]), value, abs_tol=1e-9)
+                for field, value in values.items()
+            ):
+                continue
+            rows.append({"AssemblyID": assembly_id, **values})
+        return rows
+
+
+def write_rollups(manager, rows, commit=True):
+    """ Writes rollup rows with one batched UPDATE in a single transaction. """
+    if not rows:
+        return {"succeeded": 0, "failed": []}
+    return manager.execute_many(UPDATE_ROLLUP_QUERY, rows, chunk_size=len(rows), commit=commit, debug=False)
+
+
+def rollup_assemblies(manager=None, commit=True, debug=DEBUG):
+    """
+    Recomputes the rollup fields of every assembly and writes back the ones that changed.
+
+    Args:
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        commit (bool): Commit the update. With False, it joins the open transaction.
+
+    Returns:
+        dict: {"computed": assemblies computed, "updated": rows written}
+
+    Raises:
+        ValueError: If the assembly hierarchy contains a cycle.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.writer_connection():
+        graph = BomGraph.load(manager.connection)
+        order = graph.topological_order()
+        rows = graph.changed_rows(graph.compute(order))
+        result = write_rollups(manager, rows, commit=commit)
+
+    if result["failed"]:
+        raise RuntimeError(f"Failed to write rollups: {result['failed'][0][2]}")
+    if debug:
+        log.debug("BOM rollup computed %s assemblies, updated %s", len(order), len(rows))
+    return {"computed": len(order), "updated": len(rows)}
+
+
+# Columns whose changes affect rollups, per edited context
+ROLLUP_INPUTS = {
+    "Parts": ("PartWeight",),
+    "Suppliers": ("PartID", "PricePerUnit"),
+    "Assemblies_Parts": ("ParentAssemblyID", "EntityType", "AssemblyID", "PartID", "Quantity", "HoursParts", "HoursAssembly", "deleteFlag"),
+    "AssemblyComponents": ("AssemblyID", "ComponentID", "Type", "Quantity"),
+    "Assemblies": ("ParentAssemblyID", "AssemHoursAssembly"),
+}
+
+
+def rollup_inputs_changed(context, old_row, new_row):
+    """
+    Whether an edit touched a column that feeds the rollups.
+
+    Args:
+        context (str): The edited context (e.g., "Parts").
+        old_row (dict or None): Values before the edit (None for an insert).
+        new_row (dict or None): Values after the edit (None for a delete).
+            Columns missing from new_row are treated as unchanged.
+    """
+    fields = ROLLUP_INPUTS.get(context)
+    if not fields:
+        return False
+    if old_row is None or new_row is None:
+        return True
+    for field in fields:
+        if field not in new_row:
+            continue
+        old, new = old_row.get(field), new_row.get(field)
+        if _number(old) is not None and _number(new) is not None:
+            if _number(old) != _number(new):
+                return True
+        elif str(old if old is not None else "").strip() != str(new if new is not None else "").strip():
+            return True
+    return False
+
+
+def affected_assemblies(connection, context, rows):
+    """
+    Returns the assemblies whose own totals depend directly on the given rows.
+
+    Args:
+        connection (sqlite3.Connection): Connection to read from.
+        context (str): The rows' context (e.g., "Suppliers").
+        rows (iterable): Row dicts, typically the values before and after an edit.
+
+    Returns:
+        set: AssemblyIDs (ancestors not included).
+    """
+    rows = [row for row in rows if row]
+    seeds = set()
+
+    if context in ("Parts", "Suppliers"):
+        part_ids = sorted({_key(row.get("PartID")) for row in rows} - {None})
+        if part_ids:
+            placeholders = ", ".join("?" for _ in part_ids)
+            for row in connection.execute(
+                "SELECT AssemblyID FROM Assemblies_Parts WHERE EntityType = 'Part' "
+                f"AND COALESCE(deleteFlag, 0) = 0 AND PartID IN ({placeholders}) "
+                "UNION SELECT AssemblyID FROM AssemblyComponents "
+                f"WHERE Type = 'Part' AND ComponentID IN ({placeholders})",
+                part_ids * 2,
+            ):
+                seeds.add(row[0])
+    elif context == "Assemblies_Parts":
+        for row in rows:
+            seeds.add(_key(row.get("AssemblyID") if row.get("EntityType") == "Part" else row.get("ParentAssemblyID")))
+    elif context == "AssemblyComponents":
+        seeds.update(_key(row.get("AssemblyID")) for row in rows)
+    elif context == "Assemblies":
+        for row in rows:
+            seeds.add(_key(row.get("AssemblyID")))
+            seeds.add(_key(row.get("ParentAssemblyID")))
+
+    seeds.discard(None)
+    seeds.discard(ROOT_ASSEMBLY_ID)
+    return seeds
+
+
+def assembly_ancestors(connection, assembly_ids):
+    """
+    Returns assembly_ids plus every assembly that contains them, directly or indirectly.
+
+    Uses the AssemblyClosure table (domain.hierarchy) when it exists: one
+    indexed query. Otherwise walks up one level per round with one query, so
+    the cost follows the depth of the affected paths rather than the size of
+    the hierarchy.
+    """
+    from domain.hierarchy import CLOSURE_TABLE, closure_exists
+
+    found = set(assembly_ids)
+    if found and closure_exists(connection):
+        ids = sorted(found)
+        placeholders = ", ".join("?" for _ in ids)
+        for row in connection.execute(
+            f"SELECT DISTINCT AncestorID FROM {CLOSURE_TABLE} WHERE DescendantID IN ({placeholders})", ids
+        ):
+            found.add(row[0])
+        found.discard(ROOT_ASSEMBLY_ID)
+        return found
+
+    frontier = sorted(found)
+    while frontier:
+        placeholders = ", ".join("?" for _ in frontier)
+        parents = set()
+        for row in connection.execute(
+            f"SELECT ParentAssemblyID FROM Assemblies WHERE AssemblyID IN ({placeholders}) "
+            "UNION SELECT ParentAssemblyID FROM Assemblies_Parts WHERE EntityType = 'Assembly' "
+            f"AND COALESCE(deleteFlag, 0) = 0 AND AssemblyID IN ({placeholders}) "
+            "UNION SELECT AssemblyID FROM AssemblyComponents WHERE Type = 'Assembly' "
+            f"AND ComponentID IN ({placeholders})",
+            frontier * 3,
+        ):
+            parent_id = _key(row[0])
+            if parent_id is not None and parent_id != ROOT_ASSEMBLY_ID and parent_id not in found:
+                parents.add(parent_id)
+        found |= parents
+        frontier = sorted(parents)
+    found.discard(ROOT_ASSEMBLY_ID)
+    return found
+
+
+def recalculate_ancestors(assembly_ids, manager=None, commit=False, debug=DEBUG):
+    """
+    Recomputes the given assemblies and all their ancestors, children first.
+
+    Only the affected paths are loaded; untouched subassemblies contribute
+    their stored totals. The updates run in one transaction which, with
+    commit=False, is the caller's open transaction.
+
+    Args:
+        assembly_ids (iterable): Assemblies whose inputs changed.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        commit (bool): Commit the update.
+
+    Returns:
+        dict: {"computed": assemblies computed, "updated": rows written}
+
+    Raises:
+        ValueError: If the affected hierarchy contains a cycle.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.writer_connection():
+        targets = assembly_ancestors(manager.connection, assembly_ids)
+        if not targets:
+            return {"computed": 0, "updated": 0}
+        graph = BomGraph.load(manager.connection, targets)
+        order = graph.topological_order(targets)
+        rows = graph.changed_rows(graph.compute(order))
+        result = write_rollups(manager, rows, commit=commit)
+
+    if result["failed"]:
+        raise RuntimeError(f"Failed to write rollups: {result['failed'][0][2]}")
+    if debug:
+        log.debug("Incremental BOM rollup computed %s assemblies, updated %s", len(order), len(rows))
+    return {"computed": len(order), "updated": len(rows)}
+
+
+def recalculate_for_edit(context, old_row, new_row, manager=None, commit=False, debug=DEBUG):
+    """
+    Brings rollups up to date after a row of context was inserted, edited or deleted.
+
+    Does nothing unless a rollup input changed. Call it after the write, in
+    the same transaction, so saving or undoing the edit covers the rollups too.
+
+    Args:
+        context (str): The edited context.
+        old_row (dict or None): Values before the edit (None for an insert).
+        new_row (dict or None): Values after the edit (None for a delete).
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        commit (bool): Commit the update.
+
+    Returns:
+        dict: {"computed": assemblies computed, "updated": rows written}
+    """
+    if not rollup_inputs_changed(context, old_row, new_row):
+        return {"computed": 0, "updated": 0}
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.writer_connection():
+        seeds = affected_assemblies(manager.connection, context, [old_row, new_row])
+        return recalculate_ancestors(seeds, manager, commit=commit, debug=debug)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute Assemblies cost, weight and hours rollups.")
+    parser.add_argument("--database", help="Database file (defaults to DATABASE from config_data).")
+    args = parser.parse_args(argv)
+
+    manager = None
+    if args.database:
+        from core.database_transactions import DatabaseTransactionManager
+        manager = DatabaseTransactionManager(args.database)
+
+    result = rollup_assemblies(manager, debug=False)
+    print(f"Computed {result['computed']} assemblies, updated {result['updated']}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,326 @@
+"""
+Materialized closure table for the assembly hierarchy.
+
+AssemblyClosure holds one row per (ancestor, descendant, depth) with the
+number of distinct paths of that length, plus a depth-0 row for every
+assembly. The edges are the same ones the BOM rollups use (see domain.bom):
+Assemblies.ParentAssemblyID, Assemblies_Parts rows with EntityType 'Assembly'
+and AssemblyComponents rows with Type 'Assembly'.
+
+Triggers on those three tables keep the closure current on every insert,
+update and delete, whichever code path makes the write, and abort any write
+that would create a cycle. Subtree and where-used lookups are then a single
+indexed query.
+"""
+from config.config_data import DEBUG, ROOT_ASSEMBLY_ID
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+CLOSURE_TABLE = "AssemblyClosure"
+
+CLOSURE_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {CLOSURE_TABLE} (
+        AncestorID INTEGER NOT NULL,
+        DescendantID INTEGER NOT NULL,
+        Depth INTEGER NOT NULL,
+        PathCount INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (AncestorID, DescendantID, Depth)
+    ) WITHOUT ROWID""",
+    f"CREATE INDEX IF NOT EXISTS idx_closure_descendant ON {CLOSURE_TABLE} (DescendantID, AncestorID)",
+]
+
+CYCLE_MESSAGE = "Assembly hierarchy cycle: an assembly cannot contain itself"
+
+
+def _edge_condition(row, source):
+    """ SQL condition under which a row of source (NEW or OLD) is a hierarchy edge. """
+    if source == "Assemblies":
+        parent, child = f"{row}.ParentAssemblyID", f"{row}.AssemblyID"
+        extra = ""
+    elif source == "Assemblies_Parts":
+        parent, child = f"{row}.ParentAssemblyID", f"{row}.AssemblyID"
+        extra = f" AND {row}.EntityType = 'Assembly' AND COALESCE({row}.deleteFlag, 0) = 0"
+    else:
+        parent, child = f"{row}.AssemblyID", f"{row}.ComponentID"
+        extra = f" AND {row}.Type = 'Assembly'"
+    condition = (
+        f"{parent} IS NOT NULL AND {child} IS NOT NULL AND {parent} != {child} "
+        f"AND {parent} != {ROOT_ASSEMBLY_ID}{extra}"
+    )
+    return parent, child, condition
+
+
+def _add_edge_sql(parent, child, condition):
+    """ Adds every path that runs through the edge parent -> child. """
+    return f"""
+        INSERT INTO {CLOSURE_TABLE} (AncestorID, DescendantID, Depth, PathCount)
+        SELECT a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1, SUM(a.PathCount * d.PathCount)
+        FROM {CLOSURE_TABLE} a JOIN {CLOSURE_TABLE} d ON a.DescendantID = {parent} AND d.AncestorID = {child}
+        WHERE {condition}
+        GROUP BY a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1
+        ON CONFLICT (AncestorID, DescendantID, Depth) DO UPDATE SET PathCount = PathCount + excluded.PathCount;"""
+
+
+def _remove_edge_sql(parent, child, condition):
+    """ Removes every path that runs through the edge parent -> child. """
+    return f"""
+        UPDATE {CLOSURE_TABLE} SET PathCount = {CLOSURE_TABLE}.PathCount - paths.PathCount
+        FROM (
+            SELECT a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1 AS Depth, SUM(a.PathCount * d.PathCount) AS PathCount
+            FROM {CLOSURE_TABLE} a JOIN {CLOSURE_TABLE} d ON a.DescendantID = {parent} AND d.AncestorID = {child}
+            WHERE {condition}
+            GROUP BY a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1
+        ) AS paths
+        WHERE {CLOSURE_TABLE}.AncestorID = paths.AncestorID
+          AND {CLOSURE_TABLE}.DescendantID = paths.DescendantID
+          AND {CLOSURE_TABLE}.Depth = paths.Depth;
+        DELETE FROM {CLOSURE_TABLE}
+        WHERE PathCount <= 0
+          AND AncestorID IN (SELECT AncestorID FROM {CLOSURE_TABLE} WHERE DescendantID = {parent});"""
+
+
+def _incident_edges_sql(assembly_id, end):
+    """ SELECT of the edges (ParentID, ChildID) whose end ("parent" or "child") is assembly_id, once per source row. """
+    selects = []
+    for source in ("Assemblies", "Assemblies_Parts", "AssemblyComponents"):
+        parent, child, condition = _edge_condition(source, source)
+        selects.append(
+            f"SELECT {parent} AS ParentID, {child} AS ChildID FROM {source} "
+            f"WHERE {parent if end == 'parent' else child} = {assembly_id} AND {condition}"
+        )
+    return " UNION ALL ".join(selects)
+
+
+def _add_edges_sql(edges):
+    """ Adds every path that runs through one of the edges selected by edges. """
+    return f"""
+        INSERT INTO {CLOSURE_TABLE} (AncestorID, DescendantID, Depth, PathCount)
+        SELECT a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1, SUM(a.PathCount * d.PathCount)
+        FROM ({edges}) e
+        JOIN {CLOSURE_TABLE} a ON a.DescendantID = e.ParentID
+        JOIN {CLOSURE_TABLE} d ON d.AncestorID = e.ChildID
+        GROUP BY a.AncestorID, d.DescendantID, a.Depth + d.Depth + 1
+        ON CONFLICT (AncestorID, DescendantID, Depth) DO UPDATE SET PathCount = PathCount + excluded.PathCount;"""
+
+
+def _cycle_check_sql(parent, child, condition):
+    """ Aborts the statement if child is already parent or one of its ancestors. """
+    return f"""
+        SELECT RAISE(ABORT, '{CYCLE_MESSAGE}')
+        WHERE {condition}
+          AND EXISTS (SELECT 1 FROM {CLOSURE_TABLE} WHERE AncestorID = {child} AND DescendantID = {parent});"""
+
+
+def _trigger_sql():
+    """ Builds the CREATE TRIGGER statements for the three edge tables. """
+    triggers = []
+    watched = {
+        "Assemblies": "ParentAssemblyID",
+        "Assemblies_Parts": "ParentAssemblyID, EntityType, AssemblyID, deleteFlag",
+        "AssemblyComponents": "AssemblyID, ComponentID, Type",
+    }
+    for source, columns in watched.items():
+        new_edge = _edge_condition("NEW", source)
+        old_edge = _edge_condition("OLD", source)
+        prefix = f"trg_closure_{source.lower()}"
+
+        insert_body = _cycle_check_sql(*new_edge) + _add_edge_sql(*new_edge)
+        if source == "Assemblies":
+            # Restore every path through the assembly, as the delete trigger removes them all:
+            # rows already pointing at it (a child imported first, or an undone delete) count too
+            children = _incident_edges_sql("NEW.AssemblyID", "parent")
+            insert_body = f"""
+        INSERT OR IGNORE INTO {CLOSURE_TABLE} (AncestorID, DescendantID, Depth, PathCount)
+        VALUES (NEW.AssemblyID, NEW.AssemblyID, 0, 1);""" + _add_edges_sql(_incident_edges_sql("NEW.AssemblyID", "child")) + f"""
+        SELECT RAISE(ABORT, '{CYCLE_MESSAGE}')
+        WHERE EXISTS (
+            SELECT 1 FROM ({children}) e
+            JOIN {CLOSURE_TABLE} c ON c.AncestorID = e.ChildID AND c.DescendantID = NEW.AssemblyID
+        );""" + _add_edges_sql(children)
+
+        # Old edge out first, so a re-pointed edge is checked against the hierarchy without it
+        update_body = _remove_edge_sql(*old_edge) + _cycle_check_sql(*new_edge) + _add_edge_sql(*new_edge)
+
+        if source == "Assemblies":
+            # Dropping the assembly removes every path through it, whichever table the edges came from
+            delete_body = f"""
+        UPDATE {CLOSURE_TABLE} SET PathCount = {CLOSURE_TABLE}.PathCount - paths.PathCount
+        FROM (
+            SELECT a.AncestorID, d.DescendantID, a.Depth + d.Depth AS Depth, SUM(a.PathCount * d.PathCount) AS PathCount
+            FROM {CLOSURE_TABLE} a JOIN {CLOSURE_TABLE} d ON a.DescendantID = OLD.AssemblyID AND d.AncestorID = OLD.AssemblyID
+            GROUP BY a.AncestorID, d.DescendantID, a.Depth + d.Depth
+        ) AS paths
+        WHERE {CLOSURE_TABLE}.AncestorID = paths.AncestorID
+          AND {CLOSURE_TABLE}.DescendantID = paths.DescendantID
+          AND {CLOSURE_TABLE}.Depth = paths.Depth;
+        DELETE FROM {CLOSURE_TABLE} WHERE PathCount <= 0;"""
+        else:
+            delete_body = _remove_edge_sql(*old_edge)
+
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns.split(", "))
+        triggers += [
+            f"CREATE TRIGGER IF NOT EXISTS {prefix}_insert AFTER INSERT ON {source} BEGIN{insert_body}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {prefix}_update AFTER UPDATE OF {columns} ON {source} WHEN {changed} BEGIN{update_body}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {source} BEGIN{delete_body}\nEND",
+        ]
+    return triggers
+
+
+def _edges_cte():
+    """ Every hierarchy edge, once per source row, as a CTE named edges(ParentID, ChildID). """
+    selects = []
+    for source, table in (("Assemblies", "Assemblies"), ("Assemblies_Parts", "Assemblies_Parts"), ("AssemblyComponents", "AssemblyComponents")):
+        parent, child, condition = _edge_condition(table, source)
+        selects.append(f"SELECT {parent}, {child} FROM {table} WHERE {condition}")
+    return "edges(ParentID, ChildID) AS (" + " UNION ALL ".join(selects) + ")"
+
+
+def closure_exists(connection):
+    """ Whether the closure table has been created in this database. """
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CLOSURE_TABLE,)
+    ).fetchone() is not None
+
+
+def rebuild_closure(manager=None, commit=True, debug=DEBUG):
+    """
+    Recomputes the closure table from scratch.
+
+    Args:
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
+        commit (bool): Commit the rebuild.
+
+    Returns:
+        int: Number of closure rows.
+
+    Raises:
+        ValueError: If the existing hierarchy contains a cycle.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    with manager.pool.writer_connection():
+        connection = manager.connection
+        assembly_count = connection.execute("SELECT COUNT(*) FROM Assemblies").fetchone()[0]
+        manager.begin_transaction(debug=False)
+        try:
+            connection.execute(f"DELETE FROM {CLOSURE_TABLE}")
+            # Paths can be no longer than the number of assemblies; the bound stops a cycle looping forever
+            connection.execute(f"""
+                INSERT INTO {CLOSURE_TABLE} (AncestorID, DescendantID, Depth, PathCount)
+                WITH RECURSIVE {_edges_cte()},
+                paths(AncestorID, DescendantID, Depth) AS (
+                    SELECT AssemblyID, AssemblyID, 0 FROM Assemblies
+                    UNION ALL
+                    SELECT paths.AncestorID, edges.ChildID, paths.Depth + 1
+                    FROM paths JOIN edges ON edges.ParentID = paths.DescendantID
+                    WHERE paths.Depth < ?
+                )
+                SELECT AncestorID, DescendantID, Depth, COUNT(*) FROM paths
+                GROUP BY AncestorID, DescendantID, Depth
+            """, (assembly_count,))
+            cycle = connection.execute(
+                f"SELECT DISTINCT AncestorID FROM {CLOSURE_TABLE} WHERE AncestorID = DescendantID AND Depth > 0"
+            ).fetchall()
+            if cycle:
+                raise ValueError(f"{CYCLE_MESSAGE} (assemblies {sorted(row[0] for row in cycle)}).")
+        except Exception:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.notify_write(CLOSURE_TABLE)
+        if commit:
+            manager.commit_transaction(debug=False)
+        count = connection.execute(f"SELECT COUNT(*) FROM {CLOSURE_TABLE}").fetchone()[0]
+
+    if debug:
+        log.debug("Rebuilt %s with %s rows", CLOSURE_TABLE, count)
+    return count
+
+
+def ensure_closure(manager=None, debug=DEBUG):
+    """
+    Creates the closure table and its triggers if needed, building it on first use.
+
+    Triggers left by an older version are replaced, and the closure rebuilt
+    since they may have maintained it wrongly. Safe to call at every startup.
+    """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    triggers = _trigger_sql()
+    with manager.pool.writer_connection():
+        connection = manager.connection
+        created = not closure_exists(connection)
+        existing = dict(connection.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_closure_%'"))
+        # sqlite_master keeps the statement without IF NOT EXISTS
+        outdated = bool(existing) and set(existing.values()) != {sql.replace(" IF NOT EXISTS", "", 1) for sql in triggers}
+        manager.begin_transaction(debug=False)
+        try:
+            if outdated:
+                for name in existing:
+                    connection.execute(f"DROP TRIGGER IF EXISTS {name}")
+            for statement in CLOSURE_SCHEMA + triggers:
+                connection.execute(statement)
+        except Exception:
+            manager.rollback_transaction(debug=False)
+            raise
+        manager.commit_transaction(debug=False)
+        if created or outdated:
+            if outdated and debug:
+                log.debug("Replaced the %s triggers; rebuilding", CLOSURE_TABLE)
+            rebuild_closure(manager, debug=debug)
+
+
+def _lookup(query, params, manager):
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+    with manager.pool.writer_connection():
+        return [tuple(row) for row in manager.connection.execute(query, params)]
+
+
+def subtree(assembly_id, manager=None):
+    """
+    Returns every assembly contained in assembly_id, directly or indirectly.
+
+    Returns:
+        list: (AssemblyID, shortest depth) pairs, nearest first.
+    """
+    return _lookup(
+        f"SELECT DescendantID, MIN(Depth) FROM {CLOSURE_TABLE} WHERE AncestorID = ? AND Depth > 0 "
+        "GROUP BY DescendantID ORDER BY 2, 1",
+        (assembly_id,),
+        manager,
+    )
+
+
+def where_used(assembly_id, manager=None):
+    """
+    Returns every assembly that contains assembly_id, directly or indirectly.
+
+    Returns:
+        list: (AssemblyID, shortest depth) pairs, nearest first.
+    """
+    return _lookup(
+        f"SELECT AncestorID, MIN(Depth) FROM {CLOSURE_TABLE} WHERE DescendantID = ? AND Depth > 0 "
+        "GROUP BY AncestorID ORDER BY 2, 1",
+        (assembly_id,),
+        manager,
+    )
+
+
+def assembly_depth(assembly_id, manager=None):
+    """ Returns the length of the longest chain of assemblies above assembly_id (0 for a top-level assembly). """
+    rows = _lookup(f"SELECT MAX(Depth) FROM {CLOSURE_TABLE} WHERE DescendantID = ?", (assembly_id,), manager)
+    return rows[0][0] or 0
+
+
+def would_create_cycle(parent_id, child_id, manager=None):
+    """ Whether making child_id a subassembly of parent_id would create a loop. """
+    if parent_id == child_id:
+        return True
+    return bool(_lookup(
+        f"SELECT 1 FROM {CLOSURE_TABLE} WHERE AncestorID = ? AND DescendantID = ? LIMIT 1",
+        (child_id, parent_id),
+        manager,
+    ))
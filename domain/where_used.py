@@ -0,0 +1,149 @@
+"""
+Where-used lookups for parts: every assembly that uses a part, up to the top level.
+
+The reverse index (part -> assemblies using it, assembly -> assemblies using
+it) is built once from the same links as the BOM rollups and rebuilt lazily
+after any write to Assemblies, Assemblies_Parts or AssemblyComponents.
+"""
+import threading
+from collections import defaultdict
+
+from config.config_data import DEBUG
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Tables whose writes change the hierarchy or part lines
+STRUCTURE_TABLES = {"assemblies", "assemblies_parts", "assemblycomponents"}
+
+
+class WhereUsedIndex:
+    """
+    Reverse BOM index answering "which assemblies use this part, and how many in total?".
+
+    Attributes:
+        part_users (dict): PartID -> {AssemblyID: quantity per assembly}.
+        assembly_users (dict): AssemblyID -> {parent AssemblyID: quantity per parent}.
+        names (dict): AssemblyID -> AssemName.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.part_users = {}
+        self.assembly_users = {}
+        self.names = {}
+        self.stale = True
+        self._lock = threading.Lock()
+        manager.add_write_listener(self.invalidate)
+
+    def invalidate(self, table_name=None):
+        if table_name is None or table_name.lower() in STRUCTURE_TABLES:
+            self.stale = True
+
+    def build(self, debug=DEBUG):
+        """ Rebuilds the reverse index from committed data on a pooled read connection. """
+        from domain.bom import BomGraph
+
+        # Cleared before reading, so a write during the build marks it stale again
+        self.stale = False
+        with self.manager.pool.reader() as connection:
+            graph = BomGraph.load(connection, part_data=False)
+            names = {row[0]: row[1] for row in connection.execute("SELECT AssemblyID, AssemName FROM Assemblies")}
+
+        part_users = defaultdict(dict)
+        for assembly_id, lines in graph.part_lines.items():
+            for part_id, quantity, _ in lines:
+                users = part_users[part_id]
+                users[assembly_id] = users.get(assembly_id, 0.0) + quantity
+
+        assembly_users = defaultdict(dict)
+        for parent_id, children in graph.children.items():
+            for child_id, quantity in children.items():
+                assembly_users[child_id][parent_id] = quantity
+
+        self.part_users, self.assembly_users, self.names = dict(part_users), dict(assembly_users), names
+        if debug:
+            log.debug("Built where-used index for %s parts", len(self.part_users))
+
+    def part_where_used(self, part_id):
+        """
+        Returns every assembly that uses part_id, directly or through subassemblies.
+
+        Extended quantities multiply the quantities along each path and add up
+        the paths, so a top-level row gives the total number of the part
+        needed for one of that assembly.
+
+        Args:
+            part_id (int): The part to look up.
+
+        Returns:
+            list: Dicts with AssemblyID, AssemName, Level (1 = uses the part directly),
+                Quantity (extended) and TopLevel, nearest assemblies first.
+        """
+        with self._lock:
+            if self.stale:
+                self.build()
+            part_users = self.part_users.get(part_id, {})
+            assembly_users = self.assembly_users
+
+            # Collect the affected ancestors, then push quantities up children-first
+            levels = {assembly_id: 1 for assembly_id in part_users}
+            frontier = list(part_users)
+            pending_children = defaultdict(int)
+            while frontier:
+                next_frontier = []
+                for child_id in frontier:
+                    for parent_id in assembly_users.get(child_id, {}):
+                        pending_children[parent_id] += 1
+                        if parent_id not in levels:
+                            levels[parent_id] = levels[child_id] + 1
+                            next_frontier.append(parent_id)
+                frontier = next_frontier
+
+            extended = {assembly_id: quantity for assembly_id, quantity in part_users.items()}
+            ready = [assembly_id for assembly_id in levels if pending_children[assembly_id] == 0]
+            visited = 0
+            while ready:
+                child_id = ready.pop()
+                visited += 1
+                for parent_id, quantity in assembly_users.get(child_id, {}).items():
+                    extended[parent_id] = extended.get(parent_id, 0.0) + extended.get(child_id, 0.0) * quantity
+                    pending_children[parent_id] -= 1
+                    if pending_children[parent_id] == 0:
+                        ready.append(parent_id)
+            if visited != len(levels):
+                raise ValueError(f"Assembly hierarchy contains a cycle above part {part_id}.")
+
+            rows = [
+                {
+                    "AssemblyID": assembly_id,
+                    "AssemName": self.names.get(assembly_id, ""),
+                    "Level": level,
+                    "Quantity": extended.get(assembly_id, 0.0),
+                    "TopLevel": not assembly_users.get(assembly_id),
+                }
+                for assembly_id, level in levels.items()
+            ]
+        rows.sort(key=lambda row: (row["Level"], row["AssemblyID"]))
+        return rows
+
+
+# One index per DatabaseTransactionManager
+indexes = {}
+
+
+def get_where_used_index(manager=None):
+    """ Returns the where-used index for a manager (default: the application manager), creating it on first use. """
+    if manager is None:
+        from core.database_transactions import db_manager as manager
+
+    index = indexes.get(manager)
+    if index is None:
+        index = WhereUsedIndex(manager)
+        indexes[manager] = index
+    return index
+
+
+def part_where_used(part_id, manager=None):
+    """ Shortcut for get_where_used_index(manager).part_where_used(part_id). """
+    return get_where_used_index(manager).part_where_used(part_id)
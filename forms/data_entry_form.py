@@ -1,6 +1,9 @@
 import tkinter as tk
 from config.config_data import COLUMN_DEFINITIONS
 from tkinter import Tk, ttk, StringVar, messagebox
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 
 
@@ -18,54 +21,10 @@ def gather_form_data(context, entry_widgets):
     Raises:
         ValueError: If validation fails for any field.
     """
-    from config.config_data import COLUMN_DEFINITIONS
-
-    columns = COLUMN_DEFINITIONS.get(context, {}).get("columns", {})
-    if not columns:
-        raise ValueError(f"No column definitions found for context '{context}'.")
-
-    form_data = {}
-
-    for col_name, col_details in columns.items():
-        col_type = col_details.get("type", "text")  # Default type is "text"
-        is_required = col_details.get("required", False)  # Optional "required" flag
-        valid_options = col_details.get("options", [])  # Options for "options" type fields
+    from forms.validation import coerce_record
 
-        entry_var = entry_widgets.get(col_name)
-        if entry_var is None:
-            continue  # Skip fields not present in the form
-
-        value = entry_var.get().strip()
-
-        # Skip primary keys (not editable)
-        if col_details.get("is_primary_key", False):
-            continue
-
-        # Handle required fields
-        if is_required and not value:
-            raise ValueError(f"The field '{col_details.get('display_name', col_name)}' is required but was left empty.")
-
-        # Convert and validate data based on type
-        if not value:  # Allow nullable fields
-            form_data[col_name] = None
-        elif col_type == "int":
-            try:
-                form_data[col_name] = int(value)
-            except ValueError:
-                raise ValueError(f"Invalid integer value for '{col_details.get('display_name', col_name)}': {value}")
-        elif col_type == "float":
-            try:
-                form_data[col_name] = float(value)
-            except ValueError:
-                raise ValueError(f"Invalid float value for '{col_details.get('display_name', col_name)}': {value}")
-        elif col_type == "options":
-            if value not in valid_options:
-                raise ValueError(f"Invalid option for '{col_details.get('display_name', col_name)}': {value}. Valid options are {valid_options}.")
-            form_data[col_name] = value
-        else:  # Default to text
-            form_data[col_name] = value
-
-    return form_data
+    values = {col_name: entry_var.get() for col_name, entry_var in entry_widgets.items()}
+    return coerce_record(context, values)
 
 def build_form(context, columns, initial_data=None, readonly_fields=None):
     """
@@ -169,5 +128,5 @@ def prepare_form_data(treeview, columns):
             # Assume the rest of the data is tied to a Tkinter StringVar
             form_data[col_name] = tk.StringVar(value=item_values[index])
 
-    print(f"DEBUG: Prepared form_data for editing: {form_data}")
+    log.debug("Prepared form_data for editing: %s", form_data)
     return form_data
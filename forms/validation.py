@@ -1,3 +1,8 @@
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
 def validate_field(field_name, value, field_type, valid_values=None):
     """
     Validates a single field based on its type and constraints.
@@ -40,6 +45,81 @@ def validate_field(field_name, value, field_type, valid_values=None):
     return True
 
 
+def coerce_record(context, record, keep_primary_key=False):
+    """
+    Validates a record against COLUMN_DEFINITIONS and converts its values to column types.
+
+    Shared by the data entry form and the file importer so both apply the same rules.
+
+    Args:
+        context (str): The context of the record (e.g., "Parts").
+        record (dict): Raw values keyed by column name (strings from a form or file).
+        keep_primary_key (bool): Keep the primary key value instead of dropping it.
+
+    Returns:
+        dict: Converted values for the columns present in the record.
+
+    Raises:
+        ValueError: If validation fails for any field.
+    """
+    from config.config_data import COLUMN_DEFINITIONS
+
+    columns = COLUMN_DEFINITIONS.get(context, {}).get("columns", {})
+    if not columns:
+        raise ValueError(f"No column definitions found for context '{context}'.")
+
+    form_data = {}
+
+    for col_name, col_details in columns.items():
+        col_type = col_details.get("type", "text")  # Default type is "text"
+        is_required = col_details.get("required", False)  # Optional "required" flag
+        valid_options = col_details.get("options", [])  # Options for "options" type fields
+
+        if col_name not in record:
+            continue  # Skip fields not present in the record
+
+        value = record[col_name]
+        if value is None:
+            value = ""
+        elif isinstance(value, str):
+            value = value.strip()
+
+        # Skip primary keys (not editable)
+        if col_details.get("is_primary_key", False):
+            if keep_primary_key and value != "":
+                try:
+                    form_data[col_name] = int(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid integer value for '{col_details.get('display_name', col_name)}': {value}")
+            continue
+
+        # Handle required fields
+        if is_required and value == "":
+            raise ValueError(f"The field '{col_details.get('display_name', col_name)}' is required but was left empty.")
+
+        # Convert and validate data based on type
+        if value == "":  # Allow nullable fields
+            form_data[col_name] = None
+        elif col_type == "int":
+            try:
+                form_data[col_name] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid integer value for '{col_details.get('display_name', col_name)}': {value}")
+        elif col_type == "float":
+            try:
+                form_data[col_name] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid float value for '{col_details.get('display_name', col_name)}': {value}")
+        elif col_type == "options":
+            if value not in valid_options:
+                raise ValueError(f"Invalid option for '{col_details.get('display_name', col_name)}': {value}. Valid options are {valid_options}.")
+            form_data[col_name] = value
+        else:  # Default to text
+            form_data[col_name] = value
+
+    return form_data
+
+
 def validate_form_data(context, form_data):
     """
     Validates form data before inserting or updating the database.
@@ -61,7 +141,7 @@ def validate_form_data(context, form_data):
     if not all_columns:
         raise ValueError(f"No column definitions found for context: {context}")
 
-    print(f"DEBUG: Validating form data for {context}: {form_data}")
+    log.debug("Validating form data for %s: %s", context, form_data)
 
     missing_fields = []
     for col_name, col_details in all_columns.items():
@@ -71,7 +151,7 @@ def validate_form_data(context, form_data):
     if missing_fields:
         raise ValueError(f"Validation failed: Missing required fields - {missing_fields}")
 
-    print(f"DEBUG: Validation successful for {context}")
+    log.debug("Validation successful for %s", context)
     return True
 
 
@@ -94,49 +174,57 @@ def validate_table_selection(table, context):
         raise ValueError(f"Please select a {context} to proceed.")
     return table.item(selected_item, "values")
 
-def validate_foreign_keys(data, filtered_columns, debug=False):
+def validate_foreign_keys(data, filtered_columns, debug=False, manager=None):
     """
     Validates foreign key constraints before inserting or updating data.
 
+    Referenced keys come from the cached key sets of core.foreign_keys, so
+    repeated checks do not query the database.
+
     Args:
         data (dict): The form data being validated.
         filtered_columns (dict): Column definitions, including foreign key references.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
 
     Raises:
         ValueError: If a foreign key constraint fails.
     """
-    from core.database_transactions import db_manager  # Ensure db_manager is used
+    failures = validate_foreign_keys_batch([data], filtered_columns, debug=debug, manager=manager)
+    if failures:
+        raise ValueError(failures[0][1])
 
-    for col_name, col_details in filtered_columns.items():
-        if col_details.get("type") == "foreign_key":
-            fk_table = col_details.get("references")  # Name of the referenced table
-            fk_column = col_details.get("to", col_name)  # Referenced column (default to the same name)
-            fk_value = data.get(col_name)
 
-            # Skip validation if no foreign key value is provided
-            if not fk_value:
-                continue
+def validate_foreign_keys_batch(records, filtered_columns, debug=False, manager=None):
+    """
+    Validates the foreign keys of many records with one query per referenced table.
 
-            # Debugging: Log foreign key check
-            if debug:
-                print(f"DEBUG: Validating foreign key: {col_name} -> {fk_table}({fk_column}) with value {fk_value}")
+    Args:
+        records (list): Record dicts keyed by column name.
+        filtered_columns (dict): Column definitions, including foreign key references.
+        manager (DatabaseTransactionManager, optional): Defaults to the application manager.
 
-            # Construct query to check if foreign key exists
-            fk_query = f"SELECT 1 FROM {fk_table} WHERE {fk_column} = :fk_value"
+    Returns:
+        list: (record index, error message) for every record with a missing key, in record order.
 
-            try:
-                result = db_manager.execute_query(fk_query, {"fk_value": fk_value})
-
-                if not result:
-                    raise ValueError(
-                        f"The value '{fk_value}' for '{col_name}' does not exist in the referenced table '{fk_table}'."
-                    )
-
-            except Exception as e:
-                print(f"DEBUG: Foreign key validation error: {e}")
-                raise ValueError(
-                    f"Foreign key validation failed for column '{col_name}' referencing '{fk_table}({fk_column})': {e}"
-                )
+    Raises:
+        ValueError: If a referenced table cannot be read.
+    """
+    from core.foreign_keys import get_resolver
+
+    try:
+        missing = get_resolver(manager).check_records(records, filtered_columns)
+    except Exception as e:
+        log.error("Foreign key validation error: %s", e)
+        raise ValueError(f"Foreign key validation failed: {e}")
+
+    failures = []
+    for index, col_name, value, reference in missing:
+        if debug:
+            log.debug("Foreign key %s -> %s has no row for %s", col_name, reference, value)
+        failures.append(
+            (index, f"The value '{value}' for '{col_name}' does not exist in the referenced table '{reference}'.")
+        )
+    return failures
 
 def validate_contexts(contexts):
     """
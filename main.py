@@ -1,35 +1,76 @@
 import atexit
 from tkinter import Tk, ttk
-from ui.notebook_manager import create_datasheet_tab
+from ui.notebook_manager import create_datasheet_tab, create_lazy_datasheet_tab, enable_lazy_tabs, cancel_loads_on_tab_change
 from core.query_builder import query_generator
 from ui.ui_helpers import placeholder_add, placeholder_build, placeholder_clone, placeholder_delete, placeholder_edit, center_window_vertically
 from forms.validation import validate_contexts
-from config.config_data import CONTEXTS, COLUMN_DEFINITIONS
+from config.config_data import CONTEXTS, COLUMN_DEFINITIONS, LAZY_TABS
 from core.database_transactions import db_manager  # Import db_manager for cleanup
+from core.background import background_executor
+from domain.hierarchy import ensure_closure
+from core.search import ensure_search_index
+from core.blobs import apply_schema_types
+from core.journal import ensure_journal
+from core.pagination import ensure_sort_indexes
+from ui.diagnostics_tab import enable_diagnostics
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 # Force cleanup of all connections on application exit
 def cleanup():
-    print("DEBUG: Application exiting. Force-closing all database connections...")
+    log.debug("Application exiting. Force-closing all database connections...")
+    background_executor.shutdown()
     db_manager.connection_tracker.force_close_all()
 
 # Register the cleanup function with atexit
 atexit.register(cleanup)
 
 def main(test_mode=False):
-    print("Main function started")
+    log.debug("Main function started")
 
     # Define context names (list of strings)
     context_names = CONTEXTS["Some"] if test_mode else CONTEXTS["All"]
-    print(f"Contexts: {context_names}")
+    log.debug("Contexts: %s", context_names)
+
+    # Keep columns the schema declares as BLOB out of list queries
+    try:
+        apply_schema_types()
+    except Exception as e:
+        log.error("Failed to read column types from the schema: %s", e)
+
+    # Create or update the assembly closure table and its triggers
+    try:
+        ensure_closure()
+    except Exception as e:
+        log.error("Failed to prepare the assembly hierarchy table: %s", e)
+
+    # Create the full-text search indexes (rebuilt only when their columns change)
+    try:
+        ensure_search_index()
+    except Exception as e:
+        log.error("Failed to prepare the search indexes: %s", e)
+
+    # Index the sort columns of the paged tabs
+    try:
+        ensure_sort_indexes()
+    except Exception as e:
+        log.error("Failed to create the sort indexes: %s", e)
+
+    # Record form changes in the undo/redo journal
+    try:
+        ensure_journal()
+    except Exception as e:
+        log.error("Failed to prepare the undo journal: %s", e)
 
     # Initialize Tkinter root and notebook
     root = Tk()
     root.title("FarmBot Management")
-    print("Tkinter window initialized")
+    log.debug("Tkinter window initialized")
 
     notebook = ttk.Notebook(root)
     notebook.pack(fill="both", expand=True)
-    print("Notebook widget created")
+    log.debug("Notebook widget created")
 
     # Loop through the context names and fetch corresponding data
     for context_name in context_names:
@@ -41,14 +82,25 @@ def main(test_mode=False):
 
             # Add the 'name' key to context_data for tab display
             context_data["name"] = context_name
-            print(f"Updated context data passed to create_database_tab '{context_data}'")
+            log.debug("Updated context data passed to create_database_tab '%s'", context_data)
 
             # Pass the table name (context_name) and full context_data
-            create_datasheet_tab(notebook, context_name, context_data) 
-            print(f"Successfully created tab for context: {context_name}")
+            if LAZY_TABS:
+                create_lazy_datasheet_tab(notebook, context_name, context_data)
+            else:
+                create_datasheet_tab(notebook, context_name, context_data) 
+            log.debug("Successfully created tab for context: %s", context_name)
 
         except Exception as e:
-            print(f"Failed to create tab for context '{context_name}': {e}")
+            log.error("Failed to create tab for context '%s': %s", context_name, e)
+
+    # Build the selected tab now and the others when first opened
+    if LAZY_TABS:
+        enable_lazy_tabs(notebook)
+    cancel_loads_on_tab_change(notebook)
+
+    # Ctrl+Shift+D opens the query diagnostics tab
+    enable_diagnostics(root, notebook)
 
     # Run the Tkinter main event loop
     root.mainloop()
@@ -0,0 +1,76 @@
+import os
+import sys
+import threading
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.background import BackgroundExecutor, stream_query
+from core.database_transactions import DatabaseTransactionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "background.db"))
+    manager.execute_non_query("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)", commit=True)
+    for i in range(25):
+        manager.execute_non_query("INSERT INTO items (name) VALUES (:name)", {"name": f"item {i}"})
+    manager.commit_transaction()
+    yield manager
+    manager.close()
+
+
+def test_stream_query_yields_chunks(manager):
+    chunks = list(stream_query("SELECT id FROM items ORDER BY id", chunk_size=10, manager=manager))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[0][0] == {"id": 1}
+
+
+def test_new_job_with_same_key_cancels_previous(manager):
+    executor = BackgroundExecutor(max_workers=2)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_job(token):
+        started.set()
+        release.wait()
+        return token.cancelled
+
+    first, first_token = executor.submit(slow_job, key=".tab.tree")
+    started.wait()
+    second, second_token = executor.submit(lambda token: token.cancelled, key=".tab.tree")
+    release.set()
+
+    assert first.result() is True
+    assert second.result() is False
+    executor.shutdown()
+
+
+def test_cancelled_stream_stops_early(manager):
+    executor = BackgroundExecutor(max_workers=1)
+
+    def job(token):
+        seen = []
+        for chunk in stream_query("SELECT id FROM items", chunk_size=5, token=token, manager=manager):
+            seen.append(chunk)
+            token.cancel()
+        return seen
+
+    future, token = executor.submit(job)
+    assert len(future.result()) == 1
+    executor.shutdown()
+
+
+def test_cancel_interrupts_running_statement(manager):
+    from core.background import CancelToken
+
+    token = CancelToken()
+    slow = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10000000) SELECT max(i) FROM n"
+    timer = threading.Timer(0.05, token.cancel)
+    timer.start()
+
+    assert list(stream_query(slow, token=token, manager=manager)) == []
+    # The pooled connection is usable again afterwards
+    assert list(stream_query("SELECT count(*) AS n FROM items", manager=manager)) == [[{"n": 25}]]
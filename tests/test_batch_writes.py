@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "batch.db"))
+    manager.execute_non_query(
+        """
+        CREATE TABLE Suppliers (
+            SupplierID INTEGER PRIMARY KEY AUTOINCREMENT,
+            SupplierName TEXT NOT NULL,
+            PartID INT,
+            UnitOfOrder TEXT,
+            PricePerUnit REAL,
+            WebRef TEXT,
+            Manuf TEXT,
+            ManPartNum TEXT
+        )
+        """,
+        commit=True,
+    )
+    yield manager
+    manager.close()
+
+
+def test_execute_many_reports_failed_rows_and_keeps_the_rest(manager):
+    rows = ({"name": None if i in (3, 7) else f"Supplier {i}"} for i in range(10))
+    result = manager.execute_many(
+        "INSERT INTO Suppliers (SupplierName) VALUES (:name)", rows, chunk_size=4
+    )
+
+    assert result["succeeded"] == 8
+    assert [index for index, params, error in result["failed"]] == [3, 7]
+    assert "NOT NULL" in result["failed"][0][2]
+    assert not manager.in_transaction
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM Suppliers")[0]["n"] == 8
+
+
+def test_bulk_upsert_inserts_updates_and_fills_defaults(manager):
+    manager.execute_non_query(
+        "INSERT INTO Suppliers (SupplierName, PricePerUnit, Manuf) VALUES ('Acme', 2.5, 'Acme Corp')", commit=True
+    )
+    rows = [
+        {"SupplierID": "1", "PricePerUnit": 3.0},  # partial update keeps other columns
+        {"SupplierName": "Bolt Barn"},  # insert with defaults
+        {"SupplierID": 40, "SupplierName": "Keyed"},  # insert keeping the given key
+        {"PricePerUnit": 1.0},  # missing NOT NULL column
+    ]
+    result = manager.bulk_upsert("Suppliers", rows, chunk_size=2)
+
+    assert result["updated"] == 1
+    assert result["inserted"] == 2
+    assert [index for index, row, error in result["failed"]] == [3]
+
+    stored = {row["SupplierID"]: row for row in manager.execute_query("SELECT * FROM Suppliers")}
+    assert stored[1]["PricePerUnit"] == 3.0
+    assert stored[1]["Manuf"] == "Acme Corp"
+    assert stored[40]["SupplierName"] == "Keyed"
+    bolt_barn = next(row for row in stored.values() if row["SupplierName"] == "Bolt Barn")
+    assert bolt_barn["PricePerUnit"] == 0.0
+    assert bolt_barn["PartID"] == 50
@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.dataset import SyntheticDataset, generate_dataset
+from benchmarks.suite import compare_results, main, run_suite
+from config.config_data import ROOT_ASSEMBLY_ID
+
+VOLUMES = {"Drawings": 20, "Parts": 60, "Suppliers": 40, "Images": 3, "Assemblies": 45}
+
+
+@pytest.fixture
+def dataset():
+    return SyntheticDataset(VOLUMES, depth=5, seed=7, image_bytes=64)
+
+
+@pytest.fixture
+def manager(tmp_path, dataset):
+    manager = generate_dataset(str(tmp_path / "bench.db"), dataset)
+    yield manager
+    manager.close()
+
+
+def test_same_seed_generates_same_rows(dataset):
+    again = SyntheticDataset(VOLUMES, depth=5, seed=7, image_bytes=64)
+    other = SyntheticDataset(VOLUMES, depth=5, seed=8, image_bytes=64)
+
+    assert list(dataset.parts()) == list(again.parts())
+    assert list(dataset.assembly_links()) == list(again.assembly_links())
+    assert list(dataset.parts()) != list(other.parts())
+    # Other tables keep their rows when one table's volume changes
+    bigger = SyntheticDataset(dict(VOLUMES, Images=10), depth=5, seed=7, image_bytes=64)
+    assert list(bigger.parts()) == list(dataset.parts())
+
+
+def test_generated_database(manager):
+    counts = {
+        table: manager.execute_read(f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+        for table in ("Drawings", "Parts", "Suppliers", "Images", "Assemblies")
+    }
+    # The root placeholder comes on top of the generated assemblies
+    assert counts == dict(VOLUMES, Assemblies=VOLUMES["Assemblies"] + 1)
+
+    root = manager.execute_read("SELECT ParentAssemblyID FROM Assemblies WHERE AssemblyID = ?", (ROOT_ASSEMBLY_ID,))
+    assert root == [{"ParentAssemblyID": ROOT_ASSEMBLY_ID}]
+    # Five levels: the deepest assemblies have four ancestors below the root
+    depth = manager.execute_read("SELECT MAX(Depth) AS depth FROM AssemblyClosure")[0]["depth"]
+    assert depth == 4
+    # The startup steps ran: search index and journal exist
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM Parts_fts")[0]["n"] == VOLUMES["Parts"]
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM UndoGroups")[0]["n"] == 0
+
+
+def test_refuses_existing_database(tmp_path):
+    path = tmp_path / "existing.db"
+    path.write_bytes(b"")
+
+    with pytest.raises(FileExistsError):
+        generate_dataset(str(path), SyntheticDataset(VOLUMES))
+
+
+def test_run_suite(manager, dataset, tmp_path):
+    only = ["fetch.Parts", "fetch.Assemblies_Parts", "page.Assemblies_Parts", "crud", "fk", "import"]
+    results = run_suite(manager, dataset, str(tmp_path), repeat=1, only=only, import_rows=25)
+    json.dumps(results)
+
+    assert results["dataset"]["rows"]["Parts"] == VOLUMES["Parts"]
+    # The config names a column the Assemblies_Parts table does not have
+    skipped = {name: results["results"].pop(name) for name in ("fetch.Assemblies_Parts", "page.Assemblies_Parts")}
+    for result in skipped.values():
+        assert "ChildAssemblyID" in result["skipped"]
+    assert set(results["results"]) == {
+        "fetch.Parts", "crud.Parts", "crud.Suppliers", "crud.Assemblies",
+        "fk.Parts.cold", "fk.Parts.cached", "fk.Suppliers.cold", "fk.Suppliers.cached", "import.Parts",
+    }
+    for name, result in results["results"].items():
+        assert "error" not in result, name
+        assert result["runs"] == 1
+    assert results["results"]["fetch.Parts"]["rows"] == VOLUMES["Parts"]
+    # The CRUD round trips leave nothing behind but their undo history
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM Suppliers")[0]["n"] == VOLUMES["Suppliers"]
+    # One warm-up and one timed import
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM Parts")[0]["n"] == VOLUMES["Parts"] + 2 * 25
+
+
+def test_failing_case_is_reported(manager, dataset, tmp_path, monkeypatch):
+    from benchmarks import suite
+
+    monkeypatch.setitem(suite.SORT_KEYS, "Parts", [("NoSuchColumn", "ASC")])
+    results = run_suite(manager, dataset, str(tmp_path), repeat=1, only=["sort.keys.Parts"])
+
+    assert "error" in results["results"]["sort.keys.Parts"]
+
+
+def test_compare_results():
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}, "gone": {"median_ms": 1.0}}}
+    current = {"results": {"a": {"median_ms": 11.0}, "b": {"median_ms": 15.0}, "new": {"median_ms": 1.0}}}
+
+    rows = compare_results(baseline, current, threshold=0.2)
+
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [("a", False), ("b", True)]
+
+
+def test_main_writes_json(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    argv = [
+        "--output", str(output), "--repeat", "1", "--only", "query_generator,hierarchy",
+        "--drawings", "5", "--parts", "10", "--suppliers", "5", "--images", "1", "--assemblies", "8", "--depth", "3",
+    ]
+
+    assert main(argv) == 0
+    results = json.loads(output.read_text())
+    assert results["dataset"]["volumes"]["Parts"] == 10
+    assert set(results["results"]) == {"query_generator.cold", "query_generator.cached", "hierarchy.subtree", "hierarchy.rebuild"}
+
+    # Comparing a run with itself finds no regression
+    assert main(argv[2:] + ["--output", str(tmp_path / "again.json"), "--compare", str(output), "--threshold", "100"]) == 0
+    assert "Median times" in capsys.readouterr().out
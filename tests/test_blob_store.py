@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.blob_store import BlobStore, collect_garbage, migrate_blobs, parse_reference, stores
+from core.blobs import blob_size, iter_blob, read_blob, write_blob
+from core.database_transactions import DatabaseTransactionManager
+
+PAYLOAD = bytes(range(256)) * 1000
+COLUMNS = {"Images": ["ImageData"]}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "store.db"))
+    manager.execute_non_query("CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImageData BLOB)", commit=True)
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName, ImageData) VALUES (?, ?, ?)",
+        [(1, "large", PAYLOAD), (2, "copy", PAYLOAD), (3, "small", b"small"), (4, "empty", b""), (5, "none", None)],
+    )
+    stores[manager] = BlobStore(str(tmp_path / "blobs"))
+    yield manager
+    stores.pop(manager, None)
+    manager.close()
+
+
+def stored_values(manager):
+    return {row["ImageID"]: row["ImageData"] for row in manager.execute_read("SELECT ImageID, ImageData FROM Images", debug=False)}
+
+
+def test_migration_moves_and_deduplicates(manager):
+    report = migrate_blobs(manager, columns=COLUMNS, batch_size=2, debug=False)
+    assert report["moved"] == 4
+    assert report["bytes"] == 2 * len(PAYLOAD) + 5
+    assert report["files_added"] == 3  # Rows 1 and 2 share a file
+
+    values = stored_values(manager)
+    assert values[1] == values[2]
+    assert parse_reference(values[1])[1] == len(PAYLOAD)
+    assert values[5] is None
+
+    # Reads are unchanged
+    assert read_blob("Images", "ImageData", 1, manager) == PAYLOAD
+    assert read_blob("Images", "ImageData", 4, manager) == b""
+    assert read_blob("Images", "ImageData", 5, manager) is None
+    assert b"".join(bytes(chunk) for chunk in iter_blob("Images", "ImageData", 2, 100000, manager)) == PAYLOAD
+    assert blob_size("Images", "ImageData", 3, manager) == 5
+
+    # A second run has nothing left to move
+    assert migrate_blobs(manager, columns=COLUMNS, debug=False)["moved"] == 0
+
+
+def test_restore_and_garbage_collection(manager):
+    store = stores[manager]
+    migrate_blobs(manager, columns=COLUMNS, debug=False)
+    write_blob("Images", "ImageData", 3, b"replaced", manager, external=True, debug=False)
+    assert read_blob("Images", "ImageData", 3, manager) == b"replaced"
+
+    assert collect_garbage(manager, columns=COLUMNS, debug=False) == 1  # The old "small" file
+    assert len(list(store.digests())) == 3
+
+    report = migrate_blobs(manager, columns=COLUMNS, outward=False, debug=False)
+    assert report["moved"] == 4
+    values = stored_values(manager)
+    assert values[1] == PAYLOAD and values[3] == b"replaced" and values[4] == b""
+
+
+def test_garbage_collection_keeps_files_the_journal_refers_to(manager):
+    from core.journal import journaled, undo
+
+    migrate_blobs(manager, columns=COLUMNS, debug=False)
+    with journaled("Delete Images", manager, debug=False):
+        manager.execute_non_query("DELETE FROM Images WHERE ImageID = 3", debug=False)
+
+    assert collect_garbage(manager, columns=COLUMNS, debug=False) == 0
+    undo(manager, debug=False)
+    assert read_blob("Images", "ImageData", 3, manager) == b"small"
+
+
+def test_missing_file_is_an_error(manager):
+    store = stores[manager]
+    migrate_blobs(manager, columns=COLUMNS, debug=False)
+    store.remove(parse_reference(stored_values(manager)[3])[0])
+    with pytest.raises(FileNotFoundError):
+        read_blob("Images", "ImageData", 3, manager)
@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.config_data import COLUMN_DEFINITIONS
+from core.blobs import apply_schema_types, blob_size, copy_blob, iter_blob, read_blob
+from core.database_transactions import DatabaseTransactionManager
+from core.query_builder import query_generator
+
+PAYLOAD = bytes(range(256)) * 1000
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "blobs.db"))
+    manager.execute_non_query(
+        "CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImagePath TEXT, ImageData BLOB)", commit=True
+    )
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName, ImageData) VALUES (?, ?, ?)",
+        [(1, "large", PAYLOAD), (2, "empty", b""), (3, "none", None)],
+    )
+    yield manager
+    manager.close()
+
+
+def test_streams_one_value_in_chunks(manager):
+    chunks = list(iter_blob("Images", "ImageData", 1, chunk_size=100000, manager=manager))
+    assert [len(chunk) for chunk in chunks] == [100000, 100000, 56000]
+    assert b"".join(chunks) == PAYLOAD
+    assert blob_size("Images", "ImageData", 1, manager) == len(PAYLOAD)
+
+    stream = io.BytesIO()
+    assert copy_blob("Images", "ImageData", 1, stream, manager=manager) == len(PAYLOAD)
+    assert stream.getvalue() == PAYLOAD
+
+
+def test_missing_and_null_values(manager):
+    assert read_blob("Images", "ImageData", 2, manager) == b""
+    assert read_blob("Images", "ImageData", 3, manager) is None
+    assert blob_size("Images", "ImageData", 99, manager) is None
+    assert list(iter_blob("Images", "ImageData", 3, manager=manager)) == []
+    with pytest.raises(ValueError):
+        read_blob("Images", "NoSuchColumn", 1, manager)
+
+
+def test_schema_blob_columns_leave_list_queries(manager):
+    columns = COLUMN_DEFINITIONS["Images"]["columns"]
+    columns["ImagePath"] = {"display_name": "Path", "width": 100}
+    columns["ImageRef"] = {"display_name": "Reference", "width": 100, "type": "string"}
+    manager.execute_non_query("ALTER TABLE Images RENAME COLUMN ImagePath TO ImagePathOld", commit=True)
+    manager.execute_non_query("ALTER TABLE Images ADD COLUMN ImagePath BLOB", commit=True)
+    manager.execute_non_query("ALTER TABLE Images ADD COLUMN ImageRef BLOB", commit=True)
+    try:
+        assert "ImagePath" in query_generator("Images")["fetch_query"]
+        # Only the untyped column is re-typed
+        assert apply_schema_types(manager, debug=False) == [("Images", "ImagePath")]
+        queries = query_generator("Images")
+        assert "ImagePath" not in queries["fetch_query"]
+        assert "ImagePath" not in queries["insert_query"]
+        assert "ImagePath" not in queries["update_query"]
+        assert "ImageData" not in queries["fetch_query"]
+        # A column the config types as "string" stays in the forms and queries
+        assert columns["ImageRef"]["type"] == "string"
+        assert "ImageRef" in queries["fetch_query"]
+        assert "ImageRef" in queries["insert_query"]
+        assert "ImageRef" in queries["update_query"]
+    finally:
+        del columns["ImagePath"]
+        del columns["ImageRef"]
@@ -0,0 +1,165 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.database_utils import delete_saved_item, save_new_item
+from core.journal import undo
+from domain.bom import recalculate_for_edit, rollup_assemblies
+
+SCHEMA = [
+    """CREATE TABLE Assemblies (AssemblyID INTEGER PRIMARY KEY, AssemName TEXT, ParentAssemblyID INTEGER DEFAULT 40,
+       AssemCost NUMERIC, AssemWeight NUMERIC, AssemHoursParts NUMERIC DEFAULT 0, AssemHoursAssembly NUMERIC DEFAULT 0,
+       AssemTotalHours NUMERIC DEFAULT 0, AssemCostFlag INTEGER DEFAULT 0, AssemWeightFlag INTEGER DEFAULT 0)""",
+    """CREATE TABLE Assemblies_Parts (ID INTEGER PRIMARY KEY, ParentAssemblyID INTEGER, EntityType TEXT,
+       AssemblyID INTEGER, PartID INTEGER, Quantity REAL, HoursParts NUMERIC DEFAULT 0,
+       HoursAssembly NUMERIC DEFAULT 0, deleteFlag INTEGER DEFAULT 0)""",
+    """CREATE TABLE AssemblyComponents (AssemblyComponentID INTEGER PRIMARY KEY, AssemblyID INTEGER,
+       ComponentID INTEGER, Type TEXT, Quantity REAL)""",
+    "CREATE TABLE Parts (PartID INTEGER PRIMARY KEY, PartName TEXT, PartWeight FLOAT)",
+    "CREATE TABLE Suppliers (SupplierID INTEGER PRIMARY KEY, SupplierName TEXT, PartID INT, PricePerUnit REAL)",
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "bom.db"))
+    for statement in SCHEMA:
+        manager.execute_non_query(statement, commit=True)
+    # 40 is the placeholder root; 1 (frame) uses 2 (wheel) directly and twice through 3 (axle)
+    manager.execute_many(
+        "INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID, AssemHoursAssembly) VALUES (?, ?, ?, ?)",
+        [(40, "Root", 40, 0), (1, "Frame", 40, 2), (2, "Wheel", 3, 0), (3, "Axle", 40, 1), (4, "Spare", 40, 0)],
+    )
+    manager.execute_many(
+        "INSERT INTO Parts (PartID, PartName, PartWeight) VALUES (?, ?, ?)",
+        [(10, "Bolt", 0.01), (11, "Rim", 1.5), (12, "Beam", None)],
+    )
+    manager.execute_many(
+        "INSERT INTO Suppliers (SupplierName, PartID, PricePerUnit) VALUES (?, ?, ?)",
+        [("A", 10, 0.20), ("B", 10, 0.10), ("A", 11, 12.0), ("A", 12, "")],
+    )
+    manager.execute_many(
+        "INSERT INTO Assemblies_Parts (ParentAssemblyID, EntityType, AssemblyID, PartID, Quantity, HoursParts) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (None, "Part", 2, 11, 1, 0.5),
+            (None, "Part", 2, 10, 4, 0),
+            (3, "Assembly", 2, None, 2, 0),
+            (None, "Part", 1, 12, 3, 0),
+        ],
+    )
+    manager.execute_many(
+        "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (?, ?, ?, ?)",
+        [(1, 2, "Assembly", 1), (1, 3, "Assembly", 1)],
+    )
+    yield manager
+    manager.close()
+
+
+def stored(manager):
+    rows = manager.execute_read("SELECT * FROM Assemblies")
+    return {row["AssemblyID"]: row for row in rows}
+
+
+def test_rollup_totals(manager):
+    result = rollup_assemblies(manager, debug=False)
+    rows = stored(manager)
+
+    assert result == {"computed": 4, "updated": 4}
+    # Wheel: rim 12.0 + 4 bolts at the cheapest price 0.10
+    assert rows[2]["AssemCost"] == pytest.approx(12.4)
+    assert rows[2]["AssemWeight"] == pytest.approx(1.54)
+    assert rows[2]["AssemTotalHours"] == pytest.approx(0.5)
+    # Axle: two wheels (link quantity wins over ParentAssemblyID) plus 1 hour of assembly
+    assert rows[3]["AssemCost"] == pytest.approx(24.8)
+    assert rows[3]["AssemTotalHours"] == pytest.approx(2.0)
+    # Frame: beams have no price or weight, so the flags are raised
+    assert rows[1]["AssemCost"] == pytest.approx(12.4 + 24.8)
+    assert rows[1]["AssemTotalHours"] == pytest.approx(0.5 + 2.0 + 2)
+    assert (rows[1]["AssemCostFlag"], rows[1]["AssemWeightFlag"]) == (1, 1)
+    assert (rows[2]["AssemCostFlag"], rows[2]["AssemWeightFlag"]) == (0, 0)
+    # The placeholder root is never written
+    assert rows[40]["AssemCost"] is None
+
+
+def test_rollup_is_idempotent(manager):
+    rollup_assemblies(manager, debug=False)
+    assert rollup_assemblies(manager, debug=False)["updated"] == 0
+
+
+def test_cycle_is_rejected(manager):
+    manager.execute_non_query(
+        "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (2, 1, 'Assembly', 1)",
+        commit=True,
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        rollup_assemblies(manager, debug=False)
+
+
+def test_price_change_recomputes_only_ancestors(manager):
+    rollup_assemblies(manager, debug=False)
+    old_row = {"SupplierID": 3, "PartID": 11, "PricePerUnit": 12.0}
+    manager.execute_non_query("UPDATE Suppliers SET PricePerUnit = 10.0 WHERE SupplierID = 3")
+    new_row = {"SupplierID": 3, "PartID": 11, "PricePerUnit": 10.0}
+
+    result = recalculate_for_edit("Suppliers", old_row, new_row, manager=manager, debug=False)
+    manager.commit_transaction()
+
+    # Wheel, Axle and Frame are on the path; Spare is not
+    assert result == {"computed": 3, "updated": 3}
+    rows = stored(manager)
+    assert rows[2]["AssemCost"] == pytest.approx(10.4)
+    assert rows[1]["AssemCost"] == pytest.approx(10.4 + 20.8)
+
+
+def test_unrelated_edit_skips_recalculation(manager):
+    result = recalculate_for_edit(
+        "Parts", {"PartID": 11, "PartWeight": 1.5}, {"PartID": 11, "PartWeight": "1.5"}, manager=manager, debug=False
+    )
+    assert result == {"computed": 0, "updated": 0}
+
+
+def test_added_rows_update_the_rollups(manager):
+    rollup_assemblies(manager, debug=False)
+
+    save_new_item(
+        "Suppliers", "INSERT INTO Suppliers (SupplierName, PartID, PricePerUnit) VALUES (:SupplierName, :PartID, :PricePerUnit)",
+        {"SupplierName": "B", "PartID": 11, "PricePerUnit": 11.0}, "Add Suppliers", manager=manager,
+    )
+    # A cheaper rim reaches the wheel and every assembly above it
+    rows = stored(manager)
+    assert rows[2]["AssemCost"] == pytest.approx(11.4)
+    assert rows[1]["AssemCost"] == pytest.approx(11.4 + 22.8)
+
+    # A cloned link puts two rims in the spare
+    save_new_item(
+        "Assemblies_Parts", "INSERT INTO Assemblies_Parts (EntityType, AssemblyID, PartID, Quantity) "
+        "VALUES (:EntityType, :AssemblyID, :PartID, :Quantity)",
+        {"EntityType": "Part", "AssemblyID": 4, "PartID": 11, "Quantity": 2}, "Clone Assemblies_Parts", manager=manager,
+    )
+    assert stored(manager)[4]["AssemWeight"] == pytest.approx(3.0)
+
+    # Undo takes the rollups back with the rows
+    undo(manager, debug=False)
+    undo(manager, debug=False)
+    rows = stored(manager)
+    assert rows[2]["AssemCost"] == pytest.approx(12.4)
+    assert rows[4]["AssemWeight"] == 0
+
+
+def test_deleted_rows_update_the_rollups(manager):
+    rollup_assemblies(manager, debug=False)
+
+    delete_saved_item("Suppliers", "DELETE FROM Suppliers WHERE SupplierID = :SupplierID", 2, manager=manager)
+    # The bolts fall back to the other supplier's 0.20
+    assert stored(manager)[2]["AssemCost"] == pytest.approx(12.8)
+
+    delete_saved_item("Assemblies_Parts", "DELETE FROM Assemblies_Parts WHERE ID = :ID", 1, manager=manager)
+    rows = stored(manager)
+    assert rows[2]["AssemWeight"] == pytest.approx(0.04)
+    assert rows[1]["AssemCost"] == pytest.approx(0.8 + 1.6)
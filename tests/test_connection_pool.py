@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "pool.db"))
+    manager.execute_non_query("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)", commit=True)
+    manager.execute_non_query("INSERT INTO items (name) VALUES (:name)", {"name": "first"}, commit=True)
+    yield manager
+    manager.close()
+
+
+def test_worker_threads_get_their_own_read_connection(manager):
+    seen = {}
+
+    def worker(name):
+        with manager.pool.reader() as connection:
+            seen[name] = id(connection)
+            seen[name + "_rows"] = manager.execute_query("SELECT name FROM items")
+
+    threads = [threading.Thread(target=worker, args=(f"t{i}",)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen["t0_rows"] == [{"name": "first"}]
+    assert seen["t1_rows"] == [{"name": "first"}]
+    assert manager.pool.status()["readers_in_use"] == 0
+
+
+def test_reader_checkout_is_bounded(manager):
+    pool = manager.pool
+    held = []
+    release = threading.Event()
+
+    def hold():
+        with pool.reader():
+            held.append(True)
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(pool.max_readers)]
+    for thread in threads:
+        thread.start()
+    while len(held) < pool.max_readers:
+        pass
+
+    assert pool.status()["readers_in_use"] == pool.max_readers
+    with pytest.raises(TimeoutError):
+        pool.checkout_reader(timeout=0.05)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert pool.status()["readers_idle"] == pool.max_readers
+
+
+def test_nested_reader_checkout_reuses_connection(manager):
+    with manager.pool.reader() as outer:
+        with manager.pool.reader() as inner:
+            assert inner is outer
+        assert manager.pool.status()["readers_in_use"] == 1
+    assert manager.pool.status()["readers_in_use"] == 0
+
+
+def test_pool_status_reported_by_tracker(manager):
+    status = manager.connection_tracker.pool_status()
+    assert status[manager.db_path]["max_readers"] == manager.pool.max_readers
+    assert status[manager.db_path]["writer_busy"] is False
+
+
+def test_interactive_profile_uses_wal(manager):
+    journal_mode = manager.connection.execute("PRAGMA journal_mode;").fetchone()[0]
+    assert journal_mode == "wal"
+
+
+def test_readers_not_blocked_by_open_write(manager):
+    manager.execute_non_query("INSERT INTO items (name) VALUES (:name)", {"name": "pending"})
+    assert manager.in_transaction
+
+    # The uncommitted row stays invisible to readers, and they do not wait on the writer
+    rows = manager.execute_read("SELECT name FROM items", timeout=1)
+    assert rows == [{"name": "first"}]
+    manager.rollback_transaction()
+
+
+def test_unknown_pragma_profile_rejected(manager):
+    with pytest.raises(ValueError):
+        manager.use_pragma_profile("turbo")
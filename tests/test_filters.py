@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.filters import filter_query, filterable_columns, like_pattern, parse_filters
+from core.query_builder import generate_fetch_query_parts
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "filters.db"))
+    manager.execute_non_query(
+        "CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImagePath TEXT, ImageData BLOB)", commit=True
+    )
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName) VALUES (?, ?)",
+        [(1, "Bolt 10%"), (2, "bolt_head"), (3, "Nut"), (4, "Boltless"), (5, None)],
+    )
+    yield manager
+    manager.close()
+
+
+def filtered_ids(manager, values, sort_column=None, sort_direction="ASC"):
+    where_conditions, params = parse_filters("Images", values)
+    return [row["ImageID"] for row in manager.execute_query(filter_query("Images", where_conditions, sort_column, sort_direction), params)]
+
+
+def test_text_filters_match_anywhere_and_literally(manager):
+    assert filtered_ids(manager, {"ImageName": "bolt"}) == [1, 2, 4]
+    assert filtered_ids(manager, {"ImageName": "10%"}) == [1]
+    assert filtered_ids(manager, {"ImageName": "t_h"}) == [2]
+    assert like_pattern("a\\b") == "%a\\\\b%"
+
+
+def test_numeric_filters_and_sort(manager):
+    assert filtered_ids(manager, {"ImageID": ">= 3", "ImageName": "  "}) == [3, 4, 5]
+    assert filtered_ids(manager, {"ImageID": "!=1", "ImageName": "bolt"}, "ImageID", "DESC") == [4, 2]
+    assert filtered_ids(manager, {}, "ImageID", "DESC") == [5, 4, 3, 2, 1]
+
+
+def test_invalid_filters_raise_value_error():
+    with pytest.raises(ValueError):
+        parse_filters("Images", {"ImageID": "abc"})
+    with pytest.raises(ValueError):
+        parse_filters("Images", {"NoSuchColumn": "x"})
+    with pytest.raises(ValueError):
+        generate_fetch_query_parts("Where", "Images", {"ImageID": {}}, {"ImageID": "; DROP"})
+    assert "ImageData" not in filterable_columns({"ImageID": {"type": "int"}, "ImageData": {"type": "blob"}})
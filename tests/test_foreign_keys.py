@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager, written_table
+from core.foreign_keys import get_resolver
+from forms.validation import validate_foreign_keys, validate_foreign_keys_batch
+
+SUPPLIER_COLUMNS = {
+    "SupplierID": {"type": "int", "is_primary_key": True},
+    "PartID": {"type": "int", "foreign_key": True, "references": "Parts"},
+}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "fk.db"))
+    manager.execute_non_query("CREATE TABLE Parts (PartID INTEGER PRIMARY KEY, PartName TEXT)", commit=True)
+    manager.execute_many("INSERT INTO Parts (PartID) VALUES (?)", [(1,), (2,), (3,)])
+    yield manager
+    manager.close()
+
+
+def test_written_table():
+    assert written_table("INSERT OR REPLACE INTO Parts (PartID) VALUES (1)") == "Parts"
+    assert written_table("  update [Drawings] SET Type = 'x'") == "Drawings"
+    assert written_table("DELETE FROM Assemblies WHERE AssemblyID = 1") == "Assemblies"
+    assert written_table("SELECT * FROM Parts") is None
+
+
+def test_batch_reports_missing_keys(manager):
+    records = [{"PartID": 1}, {"PartID": "2"}, {"PartID": 7}, {"PartID": None}, {"PartID": 9}]
+
+    failures = validate_foreign_keys_batch(records, SUPPLIER_COLUMNS, manager=manager)
+
+    assert [index for index, message in failures] == [2, 4]
+    with pytest.raises(ValueError):
+        validate_foreign_keys({"PartID": 7}, SUPPLIER_COLUMNS, manager=manager)
+
+
+def test_key_set_is_cached_until_table_is_written(manager):
+    resolver = get_resolver(manager)
+    first = resolver.key_set("Parts", "PartID")
+    assert resolver.key_set("Parts", "PartID") is first
+
+    manager.execute_non_query("INSERT INTO Parts (PartID) VALUES (7)")
+    assert "7" in resolver.key_set("Parts", "PartID")
+
+    manager.rollback_transaction()
+    assert "7" not in resolver.key_set("Parts", "PartID")
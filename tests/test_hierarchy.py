@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from domain.bom import assembly_ancestors
+from domain.hierarchy import ensure_closure, rebuild_closure, subtree, where_used, assembly_depth, would_create_cycle
+
+SCHEMA = [
+    "CREATE TABLE Assemblies (AssemblyID INTEGER PRIMARY KEY AUTOINCREMENT, AssemName TEXT, ParentAssemblyID INTEGER DEFAULT 40)",
+    """CREATE TABLE Assemblies_Parts (ID INTEGER PRIMARY KEY, ParentAssemblyID INTEGER, EntityType TEXT,
+       AssemblyID INTEGER, PartID INTEGER, Quantity REAL, deleteFlag INTEGER DEFAULT 0)""",
+    """CREATE TABLE AssemblyComponents (AssemblyComponentID INTEGER PRIMARY KEY, AssemblyID INTEGER,
+       ComponentID INTEGER, Type TEXT, Quantity REAL)""",
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "hierarchy.db"))
+    for statement in SCHEMA:
+        manager.execute_non_query(statement, commit=True)
+    # 40 is the placeholder root: 1 > 2 > 3, and 4 is used by both 1 and 3
+    manager.execute_many(
+        "INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (?, ?, ?)",
+        [(40, "Root", 40), (1, "Frame", 40), (2, "Axle", 1), (3, "Wheel", 2), (4, "Bearing", 3)],
+    )
+    manager.execute_non_query(
+        "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (1, 4, 'Assembly', 2)",
+        commit=True,
+    )
+    ensure_closure(manager, debug=False)
+    yield manager
+    manager.close()
+
+
+def closure_rows(manager):
+    return manager.execute_read("SELECT * FROM AssemblyClosure ORDER BY AncestorID, DescendantID, Depth")
+
+
+def test_subtree_and_where_used(manager):
+    assert subtree(1, manager) == [(2, 1), (4, 1), (3, 2)]
+    assert where_used(4, manager) == [(1, 1), (3, 1), (2, 2)]
+    assert assembly_depth(4, manager) == 3
+    assert assembly_depth(1, manager) == 0
+
+
+def test_triggers_match_rebuild(manager):
+    manager.execute_non_query("UPDATE Assemblies SET ParentAssemblyID = 1 WHERE AssemblyID = 3")
+    manager.execute_non_query(
+        "INSERT INTO Assemblies_Parts (ParentAssemblyID, EntityType, AssemblyID, Quantity) VALUES (2, 'Assembly', 4, 1)"
+    )
+    manager.execute_non_query("DELETE FROM AssemblyComponents")
+    manager.execute_non_query("DELETE FROM Assemblies WHERE AssemblyID = 2")
+    manager.commit_transaction()
+    maintained = closure_rows(manager)
+
+    rebuild_closure(manager, debug=False)
+    assert closure_rows(manager) == maintained
+    assert where_used(4, manager) == [(3, 1), (1, 2)]
+
+
+def test_undone_delete_restores_paths(manager):
+    from core.journal import journaled, undo
+
+    before = closure_rows(manager)
+    with journaled("Delete Assemblies", manager, debug=False):
+        manager.execute_non_query("DELETE FROM Assemblies WHERE AssemblyID = 2")
+    assert subtree(1, manager) == [(4, 1)]
+
+    undo(manager, debug=False)
+    assert subtree(1, manager) == [(2, 1), (4, 1), (3, 2)]
+    assert where_used(3, manager) == [(2, 1), (1, 2)]
+    assert closure_rows(manager) == before
+
+
+def test_children_inserted_before_their_parent(manager):
+    # 6 names 5 as parent, and links point at 5 from both sides, before 5 exists
+    manager.execute_non_query("INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (6, 'Hub', 5)")
+    manager.execute_non_query(
+        "INSERT INTO Assemblies_Parts (ParentAssemblyID, EntityType, AssemblyID, Quantity) VALUES (5, 'Assembly', 4, 1)"
+    )
+    manager.execute_non_query(
+        "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (3, 5, 'Assembly', 1)"
+    )
+    manager.execute_non_query("INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (5, 'Spokes', 40)")
+    manager.commit_transaction()
+    maintained = closure_rows(manager)
+
+    assert subtree(5, manager) == [(4, 1), (6, 1)]
+    assert where_used(6, manager) == [(5, 1), (3, 2), (2, 3), (1, 4)]
+    rebuild_closure(manager, debug=False)
+    assert closure_rows(manager) == maintained
+
+
+def test_outdated_triggers_are_replaced(manager):
+    # An older insert trigger that only knew the row's own parent
+    manager.execute_non_query("DROP TRIGGER trg_closure_assemblies_insert", commit=True)
+    manager.execute_non_query(
+        "CREATE TRIGGER trg_closure_assemblies_insert AFTER INSERT ON Assemblies BEGIN "
+        "INSERT OR IGNORE INTO AssemblyClosure VALUES (NEW.AssemblyID, NEW.AssemblyID, 0, 1); END",
+        commit=True,
+    )
+    manager.execute_non_query("DELETE FROM AssemblyClosure WHERE AncestorID = 1 AND Depth > 0", commit=True)
+
+    ensure_closure(manager, debug=False)
+    assert subtree(1, manager) == [(2, 1), (4, 1), (3, 2)]
+    manager.execute_non_query("INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (5, 'Hub', 3)", commit=True)
+    assert where_used(5, manager) == [(3, 1), (2, 2), (1, 3)]
+
+
+def test_cycle_is_rejected(manager):
+    assert would_create_cycle(4, 1, manager)
+    with pytest.raises(sqlite3.IntegrityError, match="cycle"):
+        manager.execute_non_query("UPDATE Assemblies SET ParentAssemblyID = 3 WHERE AssemblyID = 1")
+    with pytest.raises(sqlite3.IntegrityError, match="cycle"):
+        manager.execute_non_query(
+            "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (4, 2, 'Assembly', 1)"
+        )
+    # 6 already names 5 as its parent, so 5 cannot be inserted under 6
+    manager.execute_non_query("INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (6, 'Hub', 5)")
+    with pytest.raises(sqlite3.IntegrityError, match="cycle"):
+        manager.execute_non_query("INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (5, 'Spokes', 6)")
+    assert subtree(1, manager) == [(2, 1), (4, 1), (3, 2)]
+
+
+def test_bom_ancestors_use_closure(manager):
+    assert assembly_ancestors(manager.connection, [4]) == {1, 2, 3, 4}
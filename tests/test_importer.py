@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.importer import import_file
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "import.db"))
+    manager.execute_non_query(
+        """CREATE TABLE Suppliers (SupplierID INTEGER PRIMARY KEY, SupplierName TEXT, PricePerUnit REAL,
+           PartID INTEGER, UnitOfOrder TEXT, WebRef TEXT, Manuf TEXT, ManPartNum TEXT)""",
+        commit=True,
+    )
+    manager.execute_non_query("CREATE TABLE Parts (PartID INTEGER PRIMARY KEY, PartName TEXT)", commit=True)
+    manager.execute_many("INSERT INTO Parts (PartID) VALUES (?)", [(part_id,) for part_id in range(50, 54)])
+    manager.execute_non_query(
+        "INSERT INTO Suppliers (SupplierID, SupplierName, PricePerUnit, PartID) VALUES (1, 'Old', 1.0, 50)", commit=True
+    )
+    yield manager
+    manager.close()
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_csv_import_inserts_updates_and_rejects(manager, tmp_path):
+    path = write_csv(tmp_path / "suppliers.csv", [
+        "ID,Name,Price/Unit,partid",
+        "1,Updated,2.5,50",
+        ",Acme,3.0,51",
+        ",Broken,not-a-number,52",
+        ",Bolts R Us,,53",
+        ",No Such Part,1.0,99",
+    ])
+
+    report = import_file("Suppliers", path, batch_size=2, manager=manager)
+
+    assert (report["read"], report["valid"], report["rejected"]) == (5, 3, 2)
+    assert (report["inserted"], report["updated"]) == (2, 1)
+    assert [line for line, message in report["errors"]] == [4, 6]
+    rows = manager.execute_read("SELECT SupplierName, PricePerUnit FROM Suppliers ORDER BY SupplierID")
+    assert [row["SupplierName"] for row in rows] == ["Updated", "Acme", "Bolts R Us"]
+    assert rows[2]["PricePerUnit"] is None
+
+
+def test_dry_run_writes_nothing(manager, tmp_path):
+    path = tmp_path / "suppliers.jsonl"
+    path.write_text("\n".join(json.dumps({"SupplierName": f"S{i}", "PartID": 50}) for i in range(10)), encoding="utf-8")
+
+    report = import_file("Suppliers", str(path), dry_run=True, manager=manager)
+
+    assert report["valid"] == 10
+    assert report["inserted"] == 0
+    assert manager.execute_read("SELECT COUNT(*) AS n FROM Suppliers")[0]["n"] == 1
@@ -0,0 +1,125 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.journal import JOURNAL_TABLE, history, journaled, prune_history, redo, undo
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "journal.db"))
+    manager.execute_non_query("CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImageData BLOB)", commit=True)
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName, ImageData) VALUES (?, ?, ?)",
+        [(1, "one", b"\x00\x01png"), (2, "two", None)],
+    )
+    yield manager
+    if manager.db_path in DatabaseTransactionManager._instances:
+        manager.close()
+
+
+def images(manager):
+    return {row["ImageID"]: (row["ImageName"], row["ImageData"]) for row in manager.execute_read("SELECT * FROM Images", debug=False)}
+
+
+def test_undo_and_redo_each_kind_of_change(manager):
+    original = images(manager)
+    with journaled("Add Images", manager, debug=False):
+        manager.execute_non_query("INSERT INTO Images (ImageName) VALUES ('three')", debug=False)
+    with journaled("Edit Images", manager, debug=False):
+        manager.execute_non_query("UPDATE Images SET ImageName = 'uno' WHERE ImageID = 1", debug=False)
+    with journaled("Delete Images", manager, debug=False):
+        manager.execute_non_query("DELETE FROM Images WHERE ImageID = 1", debug=False)
+    assert not manager.in_transaction  # Committed right away
+    changed = images(manager)
+
+    assert undo(manager, debug=False) == {"description": "Delete Images", "changes": {"Images": [1]}}
+    assert images(manager)[1] == ("uno", b"\x00\x01png")  # BLOB restored byte for byte
+    assert undo(manager, debug=False)["description"] == "Edit Images"
+    assert undo(manager, debug=False)["changes"] == {"Images": [3]}
+    assert images(manager) == original
+    assert undo(manager, debug=False) is None
+
+    for _ in range(3):
+        redo(manager, debug=False)
+    assert images(manager) == changed
+    assert redo(manager, debug=False) is None
+
+
+def test_updates_keep_only_changed_columns(manager):
+    with journaled("Edit Images", manager, debug=False):
+        manager.execute_non_query("UPDATE Images SET ImageName = 'uno' WHERE ImageID = 1", debug=False)
+        manager.execute_non_query("UPDATE Images SET ImageName = ImageName WHERE ImageID = 2", debug=False)
+
+    entries = manager.execute_read(f"SELECT RowKey, Before, After FROM {JOURNAL_TABLE}", debug=False)
+    assert [(row["RowKey"], row["Before"], row["After"]) for row in entries] == [(1, '{"ImageName": "one"}', '{"ImageName": "uno"}')]
+
+
+def test_history_survives_restart_and_new_action_clears_redo(manager, tmp_path):
+    with journaled("Edit Images", manager, debug=False):
+        manager.execute_non_query("UPDATE Images SET ImageName = 'uno' WHERE ImageID = 1", debug=False)
+    with journaled("Edit Images again", manager, debug=False):
+        manager.execute_non_query("UPDATE Images SET ImageName = 'dos' WHERE ImageID = 2", debug=False)
+    undo(manager, debug=False)
+
+    manager.close()
+    reopened = DatabaseTransactionManager(str(tmp_path / "journal.db"))
+    try:
+        assert [(row["Description"], row["Undone"]) for row in history(reopened)] == [("Edit Images again", 1), ("Edit Images", 0)]
+
+        with journaled("Add Images", reopened, debug=False):
+            reopened.execute_non_query("INSERT INTO Images (ImageName) VALUES ('three')", debug=False)
+        assert redo(reopened, debug=False) is None
+        assert undo(reopened, debug=False)["description"] == "Add Images"
+        assert undo(reopened, debug=False)["description"] == "Edit Images"
+        assert images(reopened)[1][0] == "one"
+    finally:
+        reopened.close()
+
+
+def test_failed_action_is_rolled_back_and_not_recorded(manager):
+    with pytest.raises(ValueError):
+        with journaled("Edit Images", manager, debug=False):
+            manager.execute_non_query("UPDATE Images SET ImageName = 'uno' WHERE ImageID = 1", debug=False)
+            raise ValueError("validation failed")
+
+    assert images(manager)[1][0] == "one"
+    assert history(manager) == []
+
+
+def test_main_thread_select_between_actions(manager):
+    # A refresh read on the main thread (as refresh_rows does) must not leave a transaction open
+    with journaled("Add Images", manager, debug=False):
+        manager.execute_non_query("INSERT INTO Images (ImageName) VALUES ('three')", debug=False)
+    assert manager.execute_query("SELECT * FROM Images WHERE ImageID = 3", debug=False)[0]["ImageName"] == "three"
+    assert not manager.in_transaction
+
+    with journaled("Edit Images", manager, debug=False):
+        manager.execute_non_query("UPDATE Images SET ImageName = 'drei' WHERE ImageID = 3", debug=False)
+    manager.execute_query("SELECT * FROM Images", debug=False)
+    assert undo(manager, debug=False)["description"] == "Edit Images"
+    assert images(manager)[3] == ("three", None)
+
+
+def test_history_is_limited_and_can_be_pruned(manager):
+    for name in ("a", "b", "c"):
+        with journaled(f"Rename to {name}", manager, debug=False, history_limit=2):
+            manager.execute_non_query("UPDATE Images SET ImageName = ? WHERE ImageID = 1", (name,), debug=False)
+
+    assert [row["Description"] for row in history(manager)] == ["Rename to c", "Rename to b"]
+    assert undo(manager, debug=False)["description"] == "Rename to c"
+    assert undo(manager, debug=False)["description"] == "Rename to b"
+    assert undo(manager, debug=False) is None
+    assert images(manager)[1][0] == "a"
+
+    # Pruning also drops the journaled row images, BLOBs included
+    with journaled("Delete Images", manager, debug=False):
+        manager.execute_non_query("DELETE FROM Images WHERE ImageID = 1", debug=False)
+    assert prune_history(0, manager) == 1  # The new action already dropped the undone ones
+    assert history(manager) == []
+    assert manager.execute_read(f"SELECT COUNT(*) AS n FROM {JOURNAL_TABLE}", debug=False)[0]["n"] == 0
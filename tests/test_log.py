@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.log import configure_logging, get_logger
+
+
+@pytest.fixture
+def json_log(tmp_path):
+    path = tmp_path / "farmbot.jsonl"
+    configure_logging(level="WARNING", levels={"core.verbose": "DEBUG"}, json_file=str(path), max_bytes=400, backups=2)
+    yield path
+    configure_logging()
+
+
+class Counted:
+    """ Counts how often it is formatted. """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+
+def read_entries(path):
+    with open(path, encoding="utf-8") as log_file:
+        return [json.loads(line) for line in log_file]
+
+
+def test_levels_per_module_and_lazy_formatting(json_log):
+    quiet, verbose = get_logger("core.quiet"), get_logger("core.verbose.child")
+    value = Counted()
+    quiet.debug("not emitted %s", value)
+    assert value.calls == 0
+
+    verbose.debug("emitted %s", value, extra={"rows": 3})
+    quiet.warning("warned")
+    entries = read_entries(json_log)
+    assert [(entry["level"], entry["logger"], entry["message"]) for entry in entries] == [
+        ("DEBUG", "farmbot.core.verbose.child", "emitted counted"),
+        ("WARNING", "farmbot.core.quiet", "warned"),
+    ]
+    assert entries[0]["rows"] == 3
+
+
+def test_json_sink_rotates(json_log):
+    log = get_logger("core.verbose")
+    for index in range(20):
+        log.info("message number %s", index)
+    rotated = sorted(name for name in os.listdir(json_log.parent) if name.startswith("farmbot.jsonl"))
+    assert rotated == ["farmbot.jsonl", "farmbot.jsonl.1", "farmbot.jsonl.2"]
+    assert read_entries(json_log)[-1]["message"] == "message number 19"
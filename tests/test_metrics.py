@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.background import stream_query
+from core.database_transactions import DatabaseTransactionManager
+from core.metrics import QueryMetrics, normalize_sql, query_metrics
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "metrics.db"))
+    manager.execute_non_query("CREATE TABLE Parts (PartID INTEGER PRIMARY KEY, PartName TEXT)", commit=True, debug=False)
+    query_metrics.reset()
+    yield manager
+    query_metrics.reset()
+    manager.close()
+
+
+def by_shape(shape):
+    return next(item for item in query_metrics.snapshot() if item["shape"] == shape)
+
+
+def test_normalize_sql_groups_statements_by_shape():
+    assert normalize_sql("SELECT *\n  FROM Parts WHERE PartID IN (?, ?, ?) AND PartName = 'it''s' LIMIT 10;") == \
+        "SELECT * FROM Parts WHERE PartID IN (...) AND PartName = ? LIMIT ?"
+    assert normalize_sql("SELECT * FROM Parts2 WHERE PartID = :id") == "SELECT * FROM Parts2 WHERE PartID = :id"
+
+
+def test_statements_are_aggregated_with_rows_and_changes(manager):
+    insert = "INSERT INTO Parts (PartName) VALUES (?)"
+    manager.execute_many(insert, [("a",), ("b",), ("c",)], debug=False)
+    manager.execute_non_query("UPDATE Parts SET PartName = 'x' WHERE PartID > 1", commit=True, debug=False)
+    for part_id in (1, 2):
+        manager.execute_read(f"SELECT * FROM Parts WHERE PartID = {part_id}", debug=False)
+    rows = [row for chunk in stream_query("SELECT * FROM Parts", manager=manager) for row in chunk]
+
+    assert by_shape(insert)["changes"] == 3
+    assert by_shape("UPDATE Parts SET PartName = ? WHERE PartID > ?")["changes"] == 2
+    lookup = by_shape("SELECT * FROM Parts WHERE PartID = ?")
+    assert (lookup["calls"], lookup["rows"]) == (2, 2)
+    assert by_shape("SELECT * FROM Parts")["rows"] == len(rows) == 3
+
+    with pytest.raises(Exception):
+        manager.execute_read("SELECT * FROM NoSuchTable", debug=False)
+    assert by_shape("SELECT * FROM NoSuchTable")["errors"] == 1
+
+
+def test_slow_statements_are_logged_with_their_plan(manager):
+    metrics = QueryMetrics(slow_ms=0, log_size=2)
+    with manager.pool.reader() as connection:
+        for part_id in range(3):
+            query = f"SELECT * FROM Parts WHERE PartID = {part_id}"
+            metrics.record(query, 0.5, rows=1, connection=connection, debug=False)
+        metrics.record("SELECT * FROM Parts WHERE PartName = ?", 0.2, connection=connection, params=("x",), debug=False)
+
+    slow = metrics.slow_queries()
+    assert [entry["sql"] for entry in slow] == ["SELECT * FROM Parts WHERE PartName = ?", "SELECT * FROM Parts WHERE PartID = 2"]
+    assert "SCAN" in slow[0]["plan"]
+    assert "INTEGER PRIMARY KEY" in slow[1]["plan"]
+    assert [item["calls"] for item in metrics.snapshot()] == [3, 1]
@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.config_data import COLUMN_DEFINITIONS
+from core.database_transactions import DatabaseTransactionManager
+from core.pagination import KeysetPager, ensure_sort_indexes
+from core.query_builder import generate_key_query
+from core.sorting import sort_rows
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "pages.db"))
+    manager.execute_non_query(
+        "CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImageData BLOB)", commit=True
+    )
+    names = ["bolt", "Nut", None, "washer", "Bolt", "gear", None, "Axle"] * 3
+    for name in names:
+        manager.execute_non_query("INSERT INTO Images (ImageName) VALUES (:name)", {"name": name})
+    manager.commit_transaction()
+    yield manager
+    manager.close()
+
+
+def collect(pager):
+    rows = []
+    while not pager.exhausted:
+        rows.extend(pager.next_page())
+    return rows
+
+
+def test_pages_by_primary_key(manager):
+    pager = KeysetPager("Images", page_size=5, manager=manager)
+    rows = collect(pager)
+
+    assert [row["ImageID"] for row in rows] == list(range(1, 25))
+    assert "ImageData" not in rows[0]
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+@pytest.mark.parametrize("page_size", [1, 3, 4])
+def test_pages_by_sort_column_with_duplicates_and_nulls(manager, direction, page_size):
+    pager = KeysetPager("Images", page_size=page_size, sort_column="ImageName", sort_direction=direction, manager=manager)
+    rows = collect(pager)
+
+    # Case-insensitive; NULLs first ascending and last descending, as SQLite orders them
+    expected = manager.execute_query(
+        f"SELECT ImageID FROM Images ORDER BY ImageName COLLATE NOCASE {direction}, ImageID {direction}"
+    )
+    assert [row["ImageID"] for row in rows] == [row["ImageID"] for row in expected]
+
+
+def test_paged_sort_matches_client_and_key_query_sort(manager):
+    columns = COLUMN_DEFINITIONS["Images"]["columns"]
+    rows = manager.execute_query("SELECT ImageID, ImageName FROM Images")
+    client = sort_rows(rows, [("ImageName", "ASC")], {"ImageName": "string"}, lambda row, col: row[col])
+    keys = manager.execute_query(generate_key_query("Images", columns, "ImageID", sort_keys=[("ImageName", "ASC")]))
+    paged = collect(KeysetPager("Images", page_size=3, sort_column="ImageName", manager=manager))
+
+    names = [row["ImageName"] for row in paged]
+    assert names == [row["ImageName"] for row in client]
+    assert [row["ImageID"] for row in paged] == [row["ImageID"] for row in keys]
+
+
+def test_sort_column_seeks_use_its_index(manager):
+    assert ensure_sort_indexes({"Images": ["ImageName"]}, manager, debug=False) == ["idx_Images_ImageName_sort"]
+    assert ensure_sort_indexes({"Images": ["ImageName"]}, manager, debug=False) == []
+    params = {"after_key": "gear", "after_pk": 6, "page_size": 2}
+    with manager.pool.reader() as connection:
+        for direction in ("ASC", "DESC"):
+            pager = KeysetPager("Images", page_size=2, sort_column="ImageName", sort_direction=direction, manager=manager)
+            for query in (pager.next_query, pager.next_null_query):
+                plan = " ".join(row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", params))
+                assert "SCAN Images" not in plan
+                assert "idx_Images_ImageName_sort" in plan
+
+
+def test_reset_restarts_from_first_page(manager):
+    pager = KeysetPager("Images", page_size=10, manager=manager)
+    pager.next_page()
+    pager.reset("ImageName")
+
+    assert pager.loaded == 0
+    assert pager.next_page()[0]["ImageName"] is None
+
+
+def test_filtered_pages_only_return_matches(manager):
+    pager = KeysetPager("Images", page_size=2, sort_column="ImageName", manager=manager)
+    pager.set_filters({"ImageName": "LIKE"}, {"ImageName": "%o%"})
+
+    rows = collect(pager)
+    assert [row["ImageName"].lower() for row in rows] == ["bolt"] * 6
+    assert [row["ImageID"] for row in rows] == sorted(row["ImageID"] for row in rows)
+
+    # Sorting again keeps the filter
+    pager.reset("ImageID", "DESC")
+    assert len(collect(pager)) == 6
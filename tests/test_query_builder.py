@@ -0,0 +1,41 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.config_data import COLUMN_DEFINITIONS
+from core import query_builder
+from core.query_builder import query_generator, invalidate_query_cache
+
+
+def test_repeat_calls_reuse_cached_queries():
+    invalidate_query_cache()
+    first = query_generator("Parts")
+    second = query_generator("Parts")
+
+    assert first == second
+    assert first["fetch_query"] is second["fetch_query"]
+    assert len([key for key in query_builder._query_cache if key[0] == "Parts"]) == 1
+
+
+def test_definition_change_regenerates_queries():
+    columns = COLUMN_DEFINITIONS["Images"]["columns"]
+    before = query_generator("Images")["fetch_query"]
+
+    columns["ImageTag"] = {"display_name": "Tag", "width": 80, "type": "string"}
+    try:
+        after = query_generator("Images")["fetch_query"]
+        assert "ImageTag" not in before
+        assert "ImageTag" in after
+        # The stale entry for the old definitions is dropped
+        assert len([key for key in query_builder._query_cache if key[0] == "Images"]) == 1
+    finally:
+        del columns["ImageTag"]
+        invalidate_query_cache("Images")
+
+
+def test_callers_cannot_mutate_cached_queries():
+    queries = query_generator("Suppliers")
+    queries["fetch_query"] = "SELECT 1"
+    assert query_generator("Suppliers")["fetch_query"] != "SELECT 1"
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.row_source import RowSource, count_rows, estimate_rows
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "rows.db"))
+    manager.execute_non_query(
+        "CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImagePath TEXT, ImageData BLOB)", commit=True
+    )
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName) VALUES (?, ?)",
+        [(i, f"{'ab'[i % 2]}-image {i:04d}") for i in range(1, 1001)],
+    )
+    yield manager
+    manager.close()
+
+
+def test_window_reads_only_missing_rows(manager):
+    source = RowSource("Images", manager=manager, cache_rows=50)
+    source.set_keys(source.load_keys())
+    assert len(source) == count_rows("Images", manager) == 1000
+
+    rows = source.rows(500, 520)
+    assert [row["ImageID"] for row in rows] == list(range(501, 521))
+    assert len(source.cache) == 20
+
+    source.rows(0, 100)
+    assert len(source.cache) == 50  # Bounded, least recently used rows dropped
+    assert source.index_of("750") == 749
+
+
+def test_filters_and_sort_order_keys(manager):
+    source = RowSource("Images", manager=manager)
+    keys = source.load_keys({"ImageName": "LIKE"}, {"ImageName": "b-%"}, [("ImageName", "DESC")])
+    assert len(keys) == 500
+    assert keys[:2] == [999, 997]
+
+
+def test_refresh_and_remove(manager):
+    source = RowSource("Images", manager=manager)
+    source.set_keys(source.load_keys())
+    assert source.rows(0, 1)[0]["ImageName"] == "b-image 0001"
+
+    manager.execute_non_query("UPDATE Images SET ImageName = 'renamed' WHERE ImageID = 1", commit=True)
+    manager.execute_non_query("DELETE FROM Images WHERE ImageID = 2", commit=True)
+    source.invalidate(["1"])
+    assert [row["ImageName"] for row in source.rows(0, 2)] == ["renamed"]  # Deleted row skipped
+
+    source.remove([2])
+    assert [row["ImageID"] for row in source.rows(0, 2)] == [1, 3]
+
+
+def test_cached_result_set_sorts_in_memory(manager):
+    source = RowSource("Images", manager=manager)
+    source.set_rows(manager.execute_read("SELECT ImageID, ImageName FROM Images WHERE ImageID IN (3, 2, 1)"))
+    assert source.sort_cached([("ImageName", "DESC")], {"ImageID": "int", "ImageName": "string"})
+    assert source.keys == [3, 1, 2]
+
+    source.invalidate([1])
+    assert not source.sort_cached([("ImageID", "ASC")], {"ImageID": "int"})
+
+
+def test_estimate_rows_without_counting(manager):
+    assert estimate_rows("Images", manager) == 1000
+    manager.execute_non_query("DELETE FROM Images WHERE ImageID <= 10", commit=True)
+    # The largest rowid is an upper bound until the statistics catch up
+    assert estimate_rows("Images", manager) == 1000
+    manager.execute_non_query("ANALYZE", commit=True)
+    assert estimate_rows("Images", manager) == count_rows("Images", manager) == 990
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.search import ensure_search_index, match_expression, search, searchable_columns
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "search.db"))
+    manager.execute_non_query(
+        "CREATE TABLE Parts (PartID INTEGER PRIMARY KEY, PartName TEXT, Model TEXT, Make TEXT, Dimensions TEXT, "
+        "Notes TEXT, Manufacturer TEXT, ImageRef BLOB, DrawingID INTEGER, ManPartNum TEXT, ProcurementType TEXT, "
+        "PartWeight REAL, PartMaterial TEXT)",
+        commit=True,
+    )
+    manager.execute_many(
+        "INSERT INTO Parts (PartID, PartName, Model, Notes) VALUES (?, ?, ?, ?)",
+        [
+            (1, "Stepper motor", "NEMA17", "Drives the gantry"),
+            (2, "Motor bracket", "MB-2", None),
+            (3, "Water valve", "Solenoid", "Motor not included, motor sold separately"),
+        ],
+    )
+    ensure_search_index(manager, contexts=["Parts"], debug=False)
+    yield manager
+    manager.close()
+
+
+def ids(rows):
+    return [row["PartID"] for row in rows]
+
+
+def test_indexes_text_columns_only(manager):
+    assert searchable_columns(manager.connection, "Parts") == [
+        "PartName", "Model", "Make", "Dimensions", "Notes", "Manufacturer", "ManPartNum", "ProcurementType", "PartMaterial"
+    ]
+    assert ensure_search_index(manager, contexts=["Parts"], debug=False) == []
+
+
+def test_prefix_and_ranking(manager):
+    assert ids(search("Parts", "nema", manager=manager)) == [1]
+    assert sorted(ids(search("Parts", "mot", manager=manager))) == [1, 2, 3]
+    assert ids(search("Parts", "motor bracket", manager=manager)) == [2]
+
+
+def test_index_follows_writes(manager):
+    manager.execute_non_query("INSERT INTO Parts (PartID, PartName) VALUES (4, 'Hose clamp')", commit=True)
+    manager.execute_non_query("UPDATE Parts SET PartName = 'Pump bracket' WHERE PartID = 2", commit=True)
+    manager.execute_non_query("DELETE FROM Parts WHERE PartID = 3", commit=True)
+
+    assert ids(search("Parts", "clamp", manager=manager)) == [4]
+    assert ids(search("Parts", "bracket", manager=manager)) == [2]
+    assert ids(search("Parts", "valve", manager=manager)) == []
+
+
+def test_punctuation_is_not_query_syntax(manager):
+    assert match_expression(' "(* OR  ') == '"OR"*'
+    assert match_expression("-- ;") is None
+    assert search("Parts", 'NEAR( "motor', manager=manager) == []
+    assert ids(search("Parts", "MB-2", manager=manager)) == [2]
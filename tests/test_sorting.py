@@ -0,0 +1,44 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.sorting import next_sort_keys, sort_rows
+
+TYPES = {"PartID": "int", "PartName": "string", "PartWeight": "float"}
+
+ROWS = [
+    {"PartID": 1, "PartName": "bolt", "PartWeight": 10},
+    {"PartID": 2, "PartName": "Axle", "PartWeight": 2.5},
+    {"PartID": 3, "PartName": "bolt", "PartWeight": None},
+    {"PartID": 4, "PartName": None, "PartWeight": "9"},
+    {"PartID": 5, "PartName": "Bolt", "PartWeight": 2.5},
+]
+
+
+def ids(sort_keys):
+    return [row["PartID"] for row in sort_rows(ROWS, sort_keys, TYPES, lambda row, col: row[col])]
+
+
+def test_typed_keys():
+    # Numbers compare numerically (10 after 9), blanks first, text ignores case
+    assert ids([("PartWeight", "ASC")]) == [3, 2, 5, 4, 1]
+    assert ids([("PartName", "ASC")]) == [4, 2, 1, 3, 5]
+
+
+def test_multi_column_sort_is_stable():
+    assert ids([("PartName", "DESC"), ("PartWeight", "ASC")]) == [3, 5, 1, 2, 4]
+    # Ties on every key keep their current order, in either direction
+    assert ids([("PartWeight", "DESC")]) == [1, 4, 2, 5, 3]
+
+
+def test_next_sort_keys():
+    keys = next_sort_keys([], "PartName")
+    assert keys == [("PartName", "ASC")]
+    keys = next_sort_keys(keys, "PartWeight", add=True)
+    assert keys == [("PartName", "ASC"), ("PartWeight", "ASC")]
+    keys = next_sort_keys(keys, "PartWeight", add=True)
+    assert keys == [("PartName", "ASC"), ("PartWeight", "DESC")]
+    assert next_sort_keys(keys, "PartName") == [("PartName", "DESC"), ("PartWeight", "DESC")]
+    assert next_sort_keys(keys, "PartID") == [("PartID", "ASC")]
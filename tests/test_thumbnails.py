@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from core.thumbnails import ThumbnailCache, make_thumbnail
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "images.db"))
+    manager.execute_non_query("CREATE TABLE Images (ImageID INTEGER PRIMARY KEY, ImageName TEXT, ImageData BLOB)", commit=True)
+    manager.execute_many(
+        "INSERT INTO Images (ImageID, ImageName, ImageData) VALUES (?, ?, ?)",
+        [(1, "one", b"first image" * 10), (2, "two", b"second image" * 10), (3, "none", None)],
+    )
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def renders():
+    return []
+
+
+@pytest.fixture
+def cache(manager, tmp_path, renders):
+    def render(data, size):
+        renders.append(data)
+        return data[:20]
+
+    return ThumbnailCache(manager, directory=str(tmp_path / "thumbs"), max_bytes=45, memory_items=1, render=render)
+
+
+def test_renders_once_then_reads_disk_or_memory(cache, renders):
+    assert cache.get(1) == (b"first image" * 10)[:20]
+    assert cache.get(1) == cache.get("1")
+    assert len(renders) == 1
+
+    cache.memory.clear()
+    assert cache.get(1) == (b"first image" * 10)[:20]
+    assert len(renders) == 1  # Served from the disk cache
+    assert cache.get(3) is None
+
+
+def test_changed_blob_replaces_thumbnail(cache, manager, renders):
+    cache.get(1)
+    manager.execute_non_query("UPDATE Images SET ImageData = :data WHERE ImageID = 1", {"data": b"new bytes" * 5}, commit=True)
+
+    assert cache.get(1) == (b"new bytes" * 5)[:20]
+    assert len(renders) == 2
+    assert len([name for name in os.listdir(cache.directory) if name.startswith("1-")]) == 1
+
+
+def test_disk_cache_is_size_bounded(cache, manager):
+    manager.execute_non_query("INSERT INTO Images (ImageID, ImageData) VALUES (4, :data)", {"data": b"fourth" * 10}, commit=True)
+    for image_id in (1, 2, 4):
+        cache.get(image_id)
+
+    files = os.listdir(cache.directory)
+    assert len(files) == 2
+    assert not any(name.startswith("1-") for name in files)  # Oldest evicted first
+    assert len(cache.memory) == 1
+
+
+def test_make_thumbnail_downscales():
+    Image = pytest.importorskip("PIL.Image")
+    import io
+
+    source = io.BytesIO()
+    Image.new("RGB", (800, 400), "red").save(source, format="PNG")
+    with Image.open(io.BytesIO(make_thumbnail(source.getvalue(), (100, 100)))) as thumbnail:
+        assert thumbnail.size == (100, 50)
+    with pytest.raises(ValueError):
+        make_thumbnail(b"not an image")
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from core.database_transactions import DatabaseTransactionManager
+from domain.where_used import get_where_used_index
+
+SCHEMA = [
+    """CREATE TABLE Assemblies (AssemblyID INTEGER PRIMARY KEY, AssemName TEXT, ParentAssemblyID INTEGER DEFAULT 40,
+       AssemCost NUMERIC, AssemWeight NUMERIC, AssemHoursParts NUMERIC DEFAULT 0, AssemHoursAssembly NUMERIC DEFAULT 0,
+       AssemTotalHours NUMERIC DEFAULT 0, AssemCostFlag INTEGER DEFAULT 0, AssemWeightFlag INTEGER DEFAULT 0)""",
+    """CREATE TABLE Assemblies_Parts (ID INTEGER PRIMARY KEY, ParentAssemblyID INTEGER, EntityType TEXT,
+       AssemblyID INTEGER, PartID INTEGER, Quantity REAL, HoursParts NUMERIC DEFAULT 0,
+       HoursAssembly NUMERIC DEFAULT 0, deleteFlag INTEGER DEFAULT 0)""",
+    """CREATE TABLE AssemblyComponents (AssemblyComponentID INTEGER PRIMARY KEY, AssemblyID INTEGER,
+       ComponentID INTEGER, Type TEXT, Quantity REAL)""",
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseTransactionManager(str(tmp_path / "where_used.db"))
+    for statement in SCHEMA:
+        manager.execute_non_query(statement, commit=True)
+    # Cart (1) has 4 Wheels (2) and 1 Axle (3); the Axle also holds 2 Wheels. Each Wheel has 6 bolts (part 10).
+    manager.execute_many(
+        "INSERT INTO Assemblies (AssemblyID, AssemName, ParentAssemblyID) VALUES (?, ?, ?)",
+        [(40, "Root", 40), (1, "Cart", 40), (2, "Wheel", 40), (3, "Axle", 1)],
+    )
+    manager.execute_many(
+        "INSERT INTO Assemblies_Parts (ParentAssemblyID, EntityType, AssemblyID, PartID, Quantity) VALUES (?, ?, ?, ?, ?)",
+        [(None, "Part", 2, 10, 6), (None, "Part", 3, 10, 1)],
+    )
+    manager.execute_many(
+        "INSERT INTO AssemblyComponents (AssemblyID, ComponentID, Type, Quantity) VALUES (?, ?, 'Assembly', ?)",
+        [(1, 2, 4), (3, 2, 2)],
+    )
+    yield manager
+    manager.close()
+
+
+def test_where_used_extends_quantities(manager):
+    rows = get_where_used_index(manager).part_where_used(10)
+
+    assert [(row["AssemblyID"], row["Level"]) for row in rows] == [(2, 1), (3, 1), (1, 2)]
+    by_id = {row["AssemblyID"]: row for row in rows}
+    assert by_id[3]["Quantity"] == pytest.approx(1 + 2 * 6)
+    # Cart: 4 wheels * 6 + 1 axle * 13
+    assert by_id[1]["Quantity"] == pytest.approx(24 + 13)
+    assert [row["AssemblyID"] for row in rows if row["TopLevel"]] == [1]
+
+
+def test_index_rebuilds_after_structure_write(manager):
+    index = get_where_used_index(manager)
+    assert index.part_where_used(11) == []
+
+    manager.execute_non_query(
+        "INSERT INTO Assemblies_Parts (EntityType, AssemblyID, PartID, Quantity) VALUES ('Part', 1, 11, 3)", commit=True
+    )
+    assert index.stale
+    assert [(row["AssemblyID"], row["Quantity"]) for row in index.part_where_used(11)] == [(1, 3.0)]
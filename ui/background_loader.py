@@ -0,0 +1,191 @@
+import queue
+import time
+from tkinter import messagebox, ttk
+
+from config.config_data import PAGE_SIZE
+from core.background import background_executor, stream_query
+from core.database_transactions import db_manager
+from ui.shared_utils import get_table_state, reconcile_table, write_row
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# One dispatcher per toplevel window, keyed by its widget path
+dispatchers = {}
+
+
+class TkDispatcher:
+    """
+    Marshals callbacks from worker threads onto the Tk main thread.
+
+    Workers call post() (thread-safe); the main thread drains the queue from
+    widget.after() in short time slices so large results never freeze the UI.
+    Polling only runs while jobs are active.
+    """
+
+    def __init__(self, widget, interval_ms=25, budget_ms=15):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.budget = budget_ms / 1000
+        self.queue = queue.Queue()
+        self.active = 0
+        self.polling = False
+
+    def post(self, callback, *args):
+        """ Queue callback(*args) to run on the main thread. Safe from any thread. """
+        self.queue.put((callback, args))
+
+    def job_started(self):
+        """ Call on the main thread when a job that will post() starts. """
+        self.active += 1
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.interval_ms, self._drain)
+
+    def job_finished(self):
+        """ Post from the worker as its last message. """
+        self.post(self._finish_job)
+
+    def _finish_job(self):
+        self.active -= 1
+
+    def _drain(self):
+        deadline = time.monotonic() + self.budget
+        while time.monotonic() < deadline:
+            try:
+                callback, args = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                log.warning("Error in background callback %s: %s", callback, e)
+
+        if self.active or not self.queue.empty():
+            self.widget.after(self.interval_ms, self._drain)
+        else:
+            self.polling = False
+
+
+def get_dispatcher(widget):
+    """ Returns the dispatcher for a widget's toplevel window, creating it on first use. """
+    toplevel = widget.winfo_toplevel()
+    dispatcher = dispatchers.get(str(toplevel))
+    if dispatcher is None:
+        dispatcher = TkDispatcher(toplevel)
+        dispatchers[str(toplevel)] = dispatcher
+    return dispatcher
+
+
+def create_progress_indicator(parent, treeview):
+    """
+    Adds a load progress bar and row count label for a registered Treeview.
+
+    Args:
+        parent (tk.Widget): Container to pack the indicator into.
+        treeview (ttk.Treeview): The Treeview whose loads it reports.
+    """
+    frame = ttk.Frame(parent)
+    frame.pack(fill="x", padx=10)
+    bar = ttk.Progressbar(frame, mode="indeterminate", length=120)
+    label = ttk.Label(frame, text="")
+    label.pack(side="left")
+    get_table_state(treeview)["progress"] = {"bar": bar, "label": label}
+
+
+def show_progress(treeview, loading, text=""):
+    """ Starts or stops a Treeview's progress bar (see create_progress_indicator) and sets its label. """
+    progress = get_table_state(treeview).get("progress")
+    if not progress:
+        return
+    if loading:
+        progress["bar"].pack(side="left", padx=5)
+        progress["bar"].start(10)
+    else:
+        progress["bar"].stop()
+        progress["bar"].pack_forget()
+    progress["label"].configure(text=text)
+
+
+def load_table_async(treeview, query, params=None, chunk_size=PAGE_SIZE, on_done=None, on_rows=None):
+    """
+    Loads a registered Treeview from a SELECT on a background worker.
+
+    Rows stream back in chunks through the Tk dispatcher. An empty table fills
+    chunk by chunk for a fast first paint; a populated one is reconciled once
+    the last chunk arrives. Starting another load for the same Treeview
+    cancels this one.
+
+    If the writer holds uncommitted changes (which pooled readers cannot see),
+    the load runs synchronously on the writer instead.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        query (str): SELECT statement returning the Treeview's columns.
+        params (dict, optional): Query parameters.
+        chunk_size (int): Rows per chunk sent to the main thread.
+        on_done (callable, optional): Called on the main thread after a successful load.
+        on_rows (callable, optional): Called with the loaded rows, before on_done.
+    """
+    state = get_table_state(treeview)
+
+    if db_manager.has_uncommitted_writes():
+        background_executor.cancel(str(treeview))
+        state["load_token"] = None
+        rows = db_manager.execute_query(query, params)
+        reconcile_table(treeview, rows)
+        state["stale"] = False
+        if on_rows:
+            on_rows(rows)
+        if on_done:
+            on_done()
+        return
+
+    dispatcher = get_dispatcher(treeview)
+    stream_rows = not treeview.get_children()
+    collected = []
+
+    def on_chunk(rows, token):
+        if state.get("load_token") is not token:
+            return
+        collected.extend(rows)
+        if stream_rows:
+            for row in rows:
+                write_row(treeview, state, row)
+        show_progress(treeview, True, f"Loading... {len(collected)} rows")
+
+    def on_finish(token, error):
+        if state.get("load_token") is not token:
+            return  # Superseded by a newer load
+        state["load_token"] = None
+        if token.cancelled:
+            # Cancelled by a tab switch: reload when the tab is shown again
+            state["stale"] = True
+            show_progress(treeview, False, "")
+            return
+        if error:
+            show_progress(treeview, False, "")
+            messagebox.showerror("Error", f"Failed to populate data: {error}")
+            return
+        reconcile_table(treeview, collected)
+        state["stale"] = False
+        show_progress(treeview, False, f"{len(collected)} rows")
+        if on_rows:
+            on_rows(collected)
+        if on_done:
+            on_done()
+
+    def job(token):
+        try:
+            for rows in stream_query(query, params, chunk_size, token):
+                dispatcher.post(on_chunk, rows, token)
+            dispatcher.post(on_finish, token, None)
+        except Exception as e:
+            dispatcher.post(on_finish, token, e)
+        finally:
+            dispatcher.job_finished()
+
+    dispatcher.job_started()
+    show_progress(treeview, True, "Loading...")
+    future, token = background_executor.submit(job, key=str(treeview))
+    state["load_token"] = token
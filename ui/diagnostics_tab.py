@@ -0,0 +1,145 @@
+import time
+from tkinter import Text, ttk
+
+from core.metrics import query_metrics
+
+# Key that opens the (otherwise hidden) diagnostics tab
+DIAGNOSTICS_SHORTCUT = "<Control-Shift-D>"
+
+# How often the open tab re-reads the metrics
+REFRESH_MS = 2000
+
+STATEMENT_COLUMNS = {
+    "calls": {"display_name": "Calls", "width": 60},
+    "total_ms": {"display_name": "Total ms", "width": 80},
+    "avg_ms": {"display_name": "Avg ms", "width": 70},
+    "max_ms": {"display_name": "Max ms", "width": 70},
+    "rows": {"display_name": "Rows", "width": 70},
+    "changes": {"display_name": "Changed", "width": 70},
+    "wait_ms": {"display_name": "Wait ms", "width": 70},
+    "shape": {"display_name": "Statement", "width": 600},
+}
+
+SLOW_COLUMNS = {
+    "time": {"display_name": "Time", "width": 80},
+    "elapsed_ms": {"display_name": "ms", "width": 70},
+    "rows": {"display_name": "Rows", "width": 60},
+    "shape": {"display_name": "Statement", "width": 700},
+}
+
+
+def _make_treeview(parent, columns, height):
+    treeview = ttk.Treeview(parent, columns=list(columns), show="headings", height=height, selectmode="browse")
+    for col, details in columns.items():
+        treeview.heading(col, text=details["display_name"])
+        treeview.column(col, width=details["width"], anchor="w", stretch=col == "shape")
+    treeview.pack(fill="both", expand=True)
+    return treeview
+
+
+def create_diagnostics_tab(notebook):
+    """
+    Adds a "Diagnostics" tab showing the hottest statements and the slow-query log.
+
+    Selecting a statement or a slow query shows its EXPLAIN QUERY PLAN (once
+    it has been slow). The tab refreshes itself while it is selected.
+
+    Args:
+        notebook (ttk.Notebook): The main notebook.
+
+    Returns:
+        ttk.Frame: The tab.
+    """
+    tab = ttk.Frame(notebook)
+    notebook.add(tab, text="Diagnostics")
+
+    buttons = ttk.Frame(tab)
+    buttons.pack(fill="x", padx=10, pady=5)
+    summary = ttk.Label(buttons)
+    summary.pack(side="left")
+
+    statements_frame = ttk.LabelFrame(tab, text="Statements (by total time)")
+    statements_frame.pack(fill="both", expand=True, padx=10)
+    statements = _make_treeview(statements_frame, STATEMENT_COLUMNS, 12)
+
+    slow_frame = ttk.LabelFrame(tab, text=f"Slow queries (over {query_metrics.slow_ms:g} ms)")
+    slow_frame.pack(fill="both", expand=True, padx=10)
+    slow = _make_treeview(slow_frame, SLOW_COLUMNS, 6)
+
+    plan_frame = ttk.LabelFrame(tab, text="Query plan")
+    plan_frame.pack(fill="x", padx=10, pady=5)
+    plan_text = Text(plan_frame, height=8, wrap="none")
+    plan_text.pack(fill="x")
+
+    plans = {}  # Item id -> (SQL, plan)
+
+    def show_plan(treeview):
+        selection = treeview.selection()
+        sql, plan = plans.get(selection[0], ("", None)) if selection else ("", None)
+        if plan is None:
+            plan = "(Not explained: plans are captured when a statement is slow.)"
+        plan_text.delete("1.0", "end")
+        plan_text.insert("1.0", f"{sql}\n\n{plan or '(No plan for this statement.)'}" if sql else "")
+
+    def refresh():
+        plans.clear()
+        stats = query_metrics.snapshot()
+        statements.delete(*statements.get_children())
+        for index, item in enumerate(stats):
+            item_id = f"s{index}"
+            statements.insert("", "end", iid=item_id, values=(
+                item["calls"], f"{item['total_ms']:.1f}", f"{item['avg_ms']:.2f}", f"{item['max_ms']:.1f}",
+                item["rows"], item["changes"], f"{item['wait_ms']:.1f}", item["shape"],
+            ))
+            plans[item_id] = (item["shape"], item["plan"])
+
+        slow.delete(*slow.get_children())
+        for index, entry in enumerate(query_metrics.slow_queries()):
+            item_id = f"q{index}"
+            slow.insert("", "end", iid=item_id, values=(
+                time.strftime("%H:%M:%S", time.localtime(entry["time"])), f"{entry['elapsed_ms']:.1f}",
+                entry["rows"], entry["shape"],
+            ))
+            plans[item_id] = (entry["sql"], entry["plan"])
+
+        total_ms = sum(item["total_ms"] for item in stats)
+        calls = sum(item["calls"] for item in stats)
+        summary.configure(text=f"{calls} statements, {len(stats)} distinct, {total_ms:.0f} ms in SQLite")
+
+    def reset():
+        query_metrics.reset()
+        refresh()
+
+    def auto_refresh():
+        if not tab.winfo_exists():
+            return
+        if notebook.select() == str(tab):
+            refresh()
+        tab.after(REFRESH_MS, auto_refresh)
+
+    ttk.Button(buttons, text="Refresh", command=refresh).pack(side="right", padx=5)
+    ttk.Button(buttons, text="Reset", command=reset).pack(side="right", padx=5)
+    statements.bind("<<TreeviewSelect>>", lambda event: show_plan(statements))
+    slow.bind("<<TreeviewSelect>>", lambda event: show_plan(slow))
+
+    refresh()
+    tab.after(REFRESH_MS, auto_refresh)
+    return tab
+
+
+def enable_diagnostics(root, notebook):
+    """
+    Binds DIAGNOSTICS_SHORTCUT to open the diagnostics tab, creating it on first use.
+
+    Args:
+        root (tk.Tk): The main window.
+        notebook (ttk.Notebook): The main notebook.
+    """
+    tabs = []
+
+    def show(event=None):
+        if not tabs or not tabs[0].winfo_exists():
+            tabs[:] = [create_diagnostics_tab(notebook)]
+        notebook.select(tabs[0])
+
+    root.bind_all(DIAGNOSTICS_SHORTCUT, show)
@@ -0,0 +1,114 @@
+from tkinter import StringVar, ttk
+
+from ui.shared_utils import get_table_state
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Delay after the last keystroke before filtering
+FILTER_DELAY_MS = 300
+
+
+def load_filtered(treeview):
+    """
+    Reloads a registered Treeview with only the rows matching its filters.
+
+    The query runs on a background worker and the rows keep the tab's current
+    sort order; a newer filter or load for the same Treeview cancels it.
+    Paginated tabs restart from the first matching page and keep paging
+    through matches on scroll.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+
+    Raises:
+        ValueError: If a filter cannot be applied (e.g. text in a numeric column).
+    """
+    from core.filters import filter_query, parse_filters
+    from ui.background_loader import load_table_async
+
+    state = get_table_state(treeview)
+    if state.get("virtual"):
+        state["virtual"].reload()
+        return
+
+    where_conditions, params = parse_filters(state["context"], state.get("filters") or {})
+
+    pager = state.get("pager")
+    if pager:
+        pager.set_filters(where_conditions, params)
+        query, page_params = pager.page_request()
+        load_table_async(treeview, query, page_params, on_rows=pager.accept_page)
+        return
+
+    # Client-side sorting is reapplied as the rows are reconciled
+    load_table_async(treeview, filter_query(state["context"], where_conditions), params)
+
+
+def create_filter_bar(parent, treeview, columns, before=None):
+    """
+    Adds a filter entry per column for a registered Treeview.
+
+    Typing filters after a short pause; Enter filters right away. Text
+    columns match anywhere in the value; numeric columns take a number,
+    optionally after a comparison (e.g. ">= 10").
+
+    Args:
+        parent (tk.Widget): Container to pack the filter bar into.
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        columns (dict): The Treeview's column definitions (name -> details).
+        before (tk.Widget, optional): Sibling to pack the filter bar above.
+
+    Returns:
+        dict: Column name -> StringVar holding its filter text.
+    """
+    from core.filters import filterable_columns
+
+    frame = ttk.Frame(parent)
+    if before is not None:
+        frame.pack(fill="x", padx=10, pady=(5, 0), before=before)
+    else:
+        frame.pack(fill="x", padx=10, pady=(5, 0))
+
+    variables = {}
+    for index, col in enumerate(filterable_columns(columns)):
+        details = columns[col]
+        ttk.Label(frame, text=details.get("display_name", col)).grid(row=0, column=index, sticky="w", padx=(0, 4))
+        variable = StringVar()
+        entry = ttk.Entry(frame, textvariable=variable, width=max(6, details.get("width", 100) // 10))
+        entry.grid(row=1, column=index, sticky="w", padx=(0, 4))
+        variables[col] = variable
+    status = ttk.Label(frame, text="")
+    status.grid(row=1, column=len(variables), sticky="w")
+    pending = {"after_id": None}
+
+    def apply_now(event=None):
+        if pending["after_id"]:
+            frame.after_cancel(pending["after_id"])
+            pending["after_id"] = None
+        state = get_table_state(treeview)
+        filters = {col: variable.get() for col, variable in variables.items() if variable.get().strip()}
+        if filters == state.get("filters"):
+            return
+        state["filters"] = filters
+        state["search"] = None  # Filtering replaces any search results
+        try:
+            load_filtered(treeview)
+            status.configure(text="")
+        except ValueError as e:
+            status.configure(text=str(e))
+            log.warning("Error applying filters %s: %s", filters, e)
+
+    def apply_later(event=None):
+        if event is not None and event.keysym in ("Return", "KP_Enter"):
+            return
+        if pending["after_id"]:
+            frame.after_cancel(pending["after_id"])
+        pending["after_id"] = frame.after(FILTER_DELAY_MS, apply_now)
+
+    for child in frame.grid_slaves(row=1):
+        if isinstance(child, ttk.Entry):
+            child.bind("<KeyRelease>", apply_later)
+            child.bind("<Return>", apply_now)
+            child.bind("<KP_Enter>", apply_now)
+    return variables
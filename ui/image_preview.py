@@ -0,0 +1,84 @@
+import base64
+from tkinter import PhotoImage, ttk
+
+from core.background import background_executor
+from ui.background_loader import get_dispatcher
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+
+def create_image_preview(parent, images_treeview):
+    """
+    Adds a "Preview" panel that shows a thumbnail of the image selected in the Images Treeview.
+
+    Thumbnails are made (or read from the thumbnail cache) on a background
+    worker; selecting another image first cancels the pending one.
+
+    Args:
+        parent (tk.Widget): Container to pack the panel into (the Images tab).
+        images_treeview (ttk.Treeview): The Images datasheet, whose item ids are ImageIDs.
+
+    Returns:
+        ttk.Label: The label showing the thumbnail.
+    """
+    from core.thumbnails import get_thumbnail_cache, previews_available
+
+    frame = ttk.LabelFrame(parent, text="Preview")
+    frame.pack(fill="x", padx=10)
+    picture = ttk.Label(frame)
+    picture.pack(side="left", padx=10, pady=5)
+    status = ttk.Label(frame, text="Select an image to preview it.")
+    status.pack(side="left", padx=10)
+
+    if not previews_available():
+        status.configure(text="Image previews need Pillow (pip install Pillow).")
+        return picture
+
+    cache = get_thumbnail_cache()
+    dispatcher = get_dispatcher(parent)
+    job_key = f"{picture}.thumbnail"
+
+    def show(image_id, thumbnail, token, error):
+        if token.cancelled:
+            return
+        if error:
+            picture.configure(image="")
+            picture.image = None
+            status.configure(text=f"Cannot preview image {image_id}: {error}")
+            return
+        if thumbnail is None:
+            picture.configure(image="")
+            picture.image = None
+            status.configure(text=f"Image {image_id} has no picture.")
+            return
+        image = PhotoImage(data=base64.b64encode(thumbnail))
+        picture.configure(image=image)
+        picture.image = image  # Keep a reference, or Tk drops the picture
+        status.configure(text=f"Image {image_id}")
+
+    def load(image_id, token):
+        thumbnail, error = None, None
+        try:
+            thumbnail = cache.get(image_id)
+        except Exception as e:
+            error = e
+            log.warning("Error making thumbnail for image %s: %s", image_id, e)
+        finally:
+            dispatcher.post(show, image_id, thumbnail, token, error)
+            dispatcher.job_finished()
+
+    def on_select(event=None):
+        selection = images_treeview.selection()
+        if not selection:
+            return
+        try:
+            image_id = int(selection[0])
+        except ValueError:
+            return
+        status.configure(text=f"Loading image {image_id}...")
+        dispatcher.job_started()
+        background_executor.submit(load, image_id, key=job_key)
+
+    images_treeview.bind("<<TreeviewSelect>>", on_select, add="+")
+    return picture
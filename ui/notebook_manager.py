@@ -2,17 +2,61 @@ import sqlite3
 import tkinter as tk
 from tkinter import messagebox, StringVar
 from tkinter import ttk, Frame  # Consolidated imports
-from config.config_data import DEBUG, DATABASE, COLUMN_DEFINITIONS
+from config.config_data import DATABASE, COLUMN_DEFINITIONS, PAGINATED_CONTEXTS, SEARCH_CONTEXTS, VIRTUAL_ROW_THRESHOLD
 from core.database_utils import get_processed_column_definitions, add_item, edit_item, clone_item, delete_item
 from ui.ui_helpers import create_buttons_frame
-from ui.shared_utils import sort_table, populate_table
+from ui.shared_utils import bind_sort_headings, populate_table, register_table, attach_paged_loader, reconcile_table, get_table_state
+from core.pagination import KeysetPager
+from core.row_source import RowSource, estimate_rows
 from core.query_builder import query_generator
-from core.database_transactions import undo_last_action
+from core.database_transactions import undo_last_action, redo_last_action, db_manager
+from core.background import background_executor
+from ui.background_loader import create_progress_indicator
+from ui.search_box import create_search_box
+from ui.filter_bar import create_filter_bar
+from ui.virtual_datasheet import VirtualDatasheet
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Placeholder tabs that have not been built yet, keyed by the tab's widget path
+lazy_tabs = {}
+
+def create_datasheet_tab(notebook, context_name, context_data, paginated=None, tab=None, rows=None, virtual=None, debug=False):
+    """
+    Adds a datasheet tab (Treeview plus CRUD buttons) for a context to the notebook.
+
+    Args:
+        notebook (ttk.Notebook): The notebook to add the tab to.
+        context_name (str): The context to display (e.g., "Parts").
+        context_data (dict): The context's COLUMN_DEFINITIONS entry plus a "name" key.
+        paginated (bool, optional): Load rows a page at a time as the user scrolls.
+            Defaults to whether the context is listed in PAGINATED_CONTEXTS.
+        tab (ttk.Frame, optional): Existing (placeholder) tab to build into instead of adding a new one.
+        rows (list, optional): Already fetched rows to show instead of querying the table.
+        virtual (bool, optional): Show the table in a virtual datasheet that only holds the
+            visible rows as items. Defaults to whether the table has more than
+            VIRTUAL_ROW_THRESHOLD rows, by an estimate that does not scan it (this
+            runs on the Tk thread). Virtual tabs are never paginated.
+
+    Returns:
+        tuple: (tab frame, Treeview)
+    """
+    if virtual is None:
+        try:
+            virtual = estimate_rows(context_name) > VIRTUAL_ROW_THRESHOLD
+        except sqlite3.Error as e:
+            virtual = False
+            if debug:
+                log.debug("Could not count rows of %s: %s", context_name, e)
+    if virtual:
+        paginated = False
+    elif paginated is None:
+        paginated = context_name in PAGINATED_CONTEXTS
 
-def create_datasheet_tab(notebook, context_name, context_data, debug=False):
     if debug:
-        print(f"create_datasheet_tab called with context_name: {context_name}")
-        print(f"context_data: {context_data}")
+        log.debug("create_datasheet_tab called with context_name: %s", context_name)
+        log.debug("context_data: %s", context_data)
 
     # Validate inputs
     if not isinstance(context_name, str):
@@ -26,24 +70,25 @@ def create_datasheet_tab(notebook, context_name, context_data, debug=False):
     columns = context_data["columns"]
     if not isinstance(columns, dict):
         raise ValueError(f"'columns' must be a dictionary, got {type(columns).__name__}. Value: {columns}")
-    print(f"Columns for context '{context_name}': {columns}")
+    log.debug("Columns for context '%s': %s", context_name, columns)
 
     # Generate queries
     queries = query_generator(context_name)
-    print(f"Generated queries for context '{context_name}': {queries}")
+    log.debug("Generated queries for context '%s': %s", context_name, queries)
 
     # Process column definitions if needed (optional step)
     processed_columns = get_processed_column_definitions(columns, exclude_hidden=True)
-    print(f"Processed columns for context '{context_name}': {processed_columns}")
+    log.debug("Processed columns for context '%s': %s", context_name, processed_columns)
 
     # Extract column names and details for Treeview
     column_names = list(processed_columns.keys())
     column_widths = {col: details.get("width", 100) for col, details in processed_columns.items()}
 
-    # Initialize the tab
-    tab = ttk.Frame(notebook)
-    notebook.add(tab, text=context_data["name"])
-    print(f"Tab '{context_data['name']}' successfully added to the notebook")
+    # Initialize the tab (lazy tabs pass in their placeholder frame)
+    if tab is None:
+        tab = ttk.Frame(notebook)
+        notebook.add(tab, text=context_data["name"])
+        log.debug("Tab '%s' successfully added to the notebook", context_data['name'])
 
     # Create a frame for the table and scrollbars
     table_frame = Frame(tab, width=1400)
@@ -60,19 +105,45 @@ def create_datasheet_tab(notebook, context_name, context_data, debug=False):
     h_scrollbar.pack(side="bottom", fill="x")
     treeview.pack(side="left", fill="both", expand=True)
 
+    if virtual:
+        register_table(treeview, context_name)
+        get_table_state(treeview)["virtual"] = VirtualDatasheet(treeview, v_scrollbar, RowSource(context_name))
+    elif paginated:
+        register_table(treeview, context_name, KeysetPager(context_name))
+        attach_paged_loader(treeview, v_scrollbar)
+    else:
+        register_table(treeview, context_name)
+    create_progress_indicator(tab, treeview)
+    if context_name in SEARCH_CONTEXTS:
+        create_search_box(tab, treeview, before=table_frame)
+    create_filter_bar(tab, treeview, processed_columns, before=table_frame)
+
     # Configure the Treeview headings and column widths
     for col, details in processed_columns.items():
-        print(f"Configuring Treeview column: {col}, Details: {details}")
-        treeview.heading(col, text=details.get("display_name", col), command=lambda c=col: sort_table(treeview, c, queries["fetch_query"]))
+        log.debug("Configuring Treeview column: %s, Details: %s", col, details)
+        treeview.heading(col, text=details.get("display_name", col))
         treeview.column(col, width=details.get("width", 100), anchor="w", stretch=False)
+    bind_sort_headings(treeview)
 
     # Populate the table with data
     try:
-        populate_table(treeview, queries["fetch_query"])
+        if rows is not None and not paginated and not virtual:
+            reconcile_table(treeview, rows)
+        else:
+            populate_table(treeview, queries["fetch_query"])
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load data for {context_name}.")
-        if DEBUG:
-            print(f"Error populating Treeview: {e}")
+        log.warning("Error populating Treeview: %s", e)
+
+    # Parts get a where-used panel that follows the selection
+    if context_name == "Parts":
+        from ui.where_used_panel import create_where_used_panel
+        create_where_used_panel(tab, treeview)
+
+    # Images get a thumbnail preview of the selected image
+    if context_name == "Images":
+        from ui.image_preview import create_image_preview
+        create_image_preview(tab, treeview)
 
     # Place the buttons frame below the table
     buttons_frame = Frame(tab)
@@ -106,10 +177,151 @@ def create_datasheet_tab(notebook, context_name, context_data, debug=False):
     undo_button = ttk.Button(
     buttons_frame,
     text="Undo",
-    command=lambda: undo_last_action(treeview, queries["fetch_query"])
+    command=lambda: undo_last_action(treeview)
     )
     undo_button.pack(side="left", padx=5, pady=5)
 
+    ttk.Button(
+        buttons_frame,
+        text="Redo",
+        command=lambda: redo_last_action(treeview)
+    ).pack(side="left", padx=5, pady=5)
+
     
     
     return tab, treeview
+
+
+def create_lazy_datasheet_tab(notebook, context_name, context_data):
+    """
+    Adds a lightweight placeholder tab for a context.
+
+    Nothing is queried until the tab is first selected; see enable_lazy_tabs.
+
+    Args:
+        notebook (ttk.Notebook): The notebook to add the tab to.
+        context_name (str): The context to display (e.g., "Parts").
+        context_data (dict): The context's COLUMN_DEFINITIONS entry plus a "name" key.
+
+    Returns:
+        ttk.Frame: The placeholder tab.
+    """
+    tab = ttk.Frame(notebook)
+    notebook.add(tab, text=context_data["name"])
+    placeholder = ttk.Label(tab, text=f"Loading {context_data['name']}...")
+    placeholder.pack(padx=10, pady=10)
+    lazy_tabs[str(tab)] = {
+        "context": context_name,
+        "context_data": context_data,
+        "placeholder": placeholder,
+        "prefetch": None,
+    }
+    return tab
+
+
+def build_lazy_tab(notebook, tab_id):
+    """
+    Builds the datasheet for a placeholder tab, once.
+
+    Args:
+        notebook (ttk.Notebook): The notebook holding the tab.
+        tab_id (str): Widget path of the tab (as returned by notebook.select()).
+
+    Returns:
+        tuple: (tab frame, Treeview), or None if the tab was already built.
+    """
+    entry = lazy_tabs.pop(str(tab_id), None)
+    if entry is None:
+        return None
+
+    entry["placeholder"].destroy()
+    rows = None
+    prefetch = entry["prefetch"]
+    # Prefetched rows are only used if nothing was written since the fetch started
+    if prefetch and prefetch["rows"] is not None and prefetch["changes"] == db_manager.connection.total_changes:
+        rows = prefetch["rows"]
+
+    return create_datasheet_tab(
+        notebook, entry["context"], entry["context_data"], tab=notebook.nametowidget(tab_id), rows=rows
+    )
+
+
+def prefetch_next_tab(notebook):
+    """
+    Fetches the rows of the tab after the selected one on a background thread.
+
+    The worker only reads through its pooled connection and stores the rows;
+    the Treeview is built on the main thread when the tab is selected.
+    Paginated contexts are skipped since their first page is already cheap.
+    """
+    tabs = notebook.tabs()
+    if len(tabs) < 2:
+        return
+    next_tab = tabs[(notebook.index(notebook.select()) + 1) % len(tabs)]
+    entry = lazy_tabs.get(str(next_tab))
+    if entry is None or entry["prefetch"] is not None or entry["context"] in PAGINATED_CONTEXTS:
+        return
+
+    fetch_query = query_generator(entry["context"])["fetch_query"]
+    prefetch = {"changes": db_manager.connection.total_changes, "rows": None}
+    entry["prefetch"] = prefetch
+
+    def worker(token):
+        try:
+            prefetch["rows"] = db_manager.execute_query(fetch_query)
+        except Exception as e:
+            log.warning("Error prefetching %s: %s", entry['context'], e)
+
+    background_executor.submit(worker)
+
+
+def enable_lazy_tabs(notebook, prefetch=True):
+    """
+    Builds placeholder tabs on their first <<NotebookTabChanged>>.
+
+    The selected tab is built right away, so startup only pays for one table.
+
+    Args:
+        notebook (ttk.Notebook): Notebook whose tabs were added with create_lazy_datasheet_tab.
+        prefetch (bool): Also load the next tab's rows in the background.
+    """
+    def on_tab_changed(event=None):
+        selected = notebook.select()
+        if not selected:
+            return
+        try:
+            build_lazy_tab(notebook, selected)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to build tab: {e}")
+            log.warning("Error building lazy tab %s: %s", selected, e)
+        if prefetch:
+            prefetch_next_tab(notebook)
+
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+    on_tab_changed()
+
+
+def cancel_loads_on_tab_change(notebook):
+    """
+    Cancels background table loads for tabs the user switches away from.
+
+    A tab whose load was cancelled is marked stale and reloads the next time
+    it is selected.
+
+    Args:
+        notebook (ttk.Notebook): The datasheet notebook.
+    """
+    from ui.shared_utils import table_states
+
+    def on_tab_changed(event=None):
+        selected = notebook.select()
+        if not selected:
+            return
+        prefix = f"{selected}."
+        background_executor.cancel_matching(lambda key: key.startswith(".") and not key.startswith(prefix))
+
+        for path, state in list(table_states.items()):
+            if path.startswith(prefix) and state.get("stale"):
+                populate_table(notebook.nametowidget(path), query_generator(state["context"])["fetch_query"])
+
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed, add="+")
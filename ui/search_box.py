@@ -0,0 +1,90 @@
+from tkinter import StringVar, ttk
+
+from config.config_data import SEARCH_LIMIT
+from ui.shared_utils import get_table_state
+
+# Delay after the last keystroke before searching
+SEARCH_DELAY_MS = 250
+
+
+def run_search(treeview, text):
+    """
+    Shows the ranked search results for text in a registered Treeview.
+
+    Empty text ends the search and reloads the table. While a search is
+    active, paginated tabs stop loading more pages on scroll.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        text (str): Free text to search for.
+    """
+    from core.search import match_expression, search_query
+    from core.query_builder import query_generator
+    from ui.background_loader import load_table_async
+    from ui.shared_utils import populate_table
+
+    state = get_table_state(treeview)
+    match = match_expression(text)
+    if match is None:
+        if state.get("search"):
+            state["search"] = None
+            populate_table(treeview, query_generator(state["context"])["fetch_query"])
+        return
+
+    state["search"] = text
+    if state.get("virtual"):
+        state["virtual"].load_rows(search_query(state["context"]), {"match": match, "limit": SEARCH_LIMIT})
+        return
+    load_table_async(treeview, search_query(state["context"]), {"match": match, "limit": SEARCH_LIMIT})
+
+
+def create_search_box(parent, treeview, before=None):
+    """
+    Adds a search box for a registered Treeview's context.
+
+    Typing searches after a short pause; Enter searches right away and
+    Escape clears the search.
+
+    Args:
+        parent (tk.Widget): Container to pack the search box into.
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        before (tk.Widget, optional): Sibling to pack the search box above.
+
+    Returns:
+        StringVar: The search text.
+    """
+    frame = ttk.Frame(parent)
+    if before is not None:
+        frame.pack(fill="x", padx=10, pady=(10, 0), before=before)
+    else:
+        frame.pack(fill="x", padx=10, pady=(10, 0))
+
+    text = StringVar()
+    ttk.Label(frame, text="Search:").pack(side="left")
+    entry = ttk.Entry(frame, textvariable=text, width=40)
+    entry.pack(side="left", padx=5)
+    pending = {"after_id": None}
+
+    def search_now(event=None):
+        if pending["after_id"]:
+            entry.after_cancel(pending["after_id"])
+            pending["after_id"] = None
+        run_search(treeview, text.get())
+
+    def search_later(event=None):
+        if event is not None and event.keysym in ("Return", "KP_Enter", "Escape"):
+            return
+        if pending["after_id"]:
+            entry.after_cancel(pending["after_id"])
+        pending["after_id"] = entry.after(SEARCH_DELAY_MS, search_now)
+
+    def clear(event=None):
+        text.set("")
+        search_now()
+
+    entry.bind("<KeyRelease>", search_later)
+    entry.bind("<Return>", search_now)
+    entry.bind("<KP_Enter>", search_now)
+    entry.bind("<Escape>", clear)
+    ttk.Button(frame, text="Clear", command=clear).pack(side="left")
+    return text
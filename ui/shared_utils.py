@@ -5,65 +5,411 @@ from tkinter import ttk, Frame  # Consolidated imports
 
 from config.config_data import DEBUG, DATABASE, COLUMN_DEFINITIONS
 from core.database_transactions import DatabaseTransactionManager
+from core.config_utils import get_primary_key
+from core.query_builder import list_columns
 
 from config.config_data import COLUMN_DEFINITIONS, DEBUG
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 
 db_manager = DatabaseTransactionManager(DATABASE)
 
-# Dictionary to track the current sort direction for each column
-sort_directions = {}
+# Per-tab state keyed by the Treeview's widget path (context name, pager, ...)
+table_states = {}
+
 
-def sort_table(treeview, column, fetch_query):
+def register_table(treeview, context_name, pager=None):
     """
-    Sorts the Treeview data by the given column in alternating order (ASC/DESC).
+    Records the context (and pager, for paginated tabs) behind a Treeview.
 
     Args:
-        treeview (ttk.Treeview): The Treeview widget to sort.
-        column (str): The column to sort.
-        fetch_query (str): SQL query to fetch data.
+        treeview (ttk.Treeview): The datasheet Treeview.
+        context_name (str): The context shown in the Treeview.
+        pager (KeysetPager, optional): Pager for tabs that load rows on demand.
     """
-    global sort_directions
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    table_states[str(treeview)] = {
+        "context": context_name,
+        "primary_key": get_primary_key(context_name),
+        # Columns of the cached row values, in query order
+        "columns": list_columns(columns),
+        "pager": pager,
+        "page_pending": False,
+        "row_values": {},  # Values last written to each item, keyed by item id (primary key)
+        "search": None,  # Active search text (see ui.search_box)
+        "filters": {},  # Filter text per column (see ui.filter_bar)
+        "sort_keys": [],  # Client-side (column, direction) sort, for tabs without a pager
+        "headings": {},  # Heading text without sort markers, keyed by column
+    }
 
-    # Determine the current sort direction for the column
-    current_direction = sort_directions.get(column, "ASC")
-    next_direction = "DESC" if current_direction == "ASC" else "ASC"
 
-    # Update the fetch_query to include the ORDER BY clause
-    sorted_query = f"{fetch_query} ORDER BY {column} {next_direction}"
-    print(f"Sorting {column} in {next_direction} order: {sorted_query}")
+def get_table_state(treeview):
+    """ Returns the registered state for a Treeview, or an empty dict. """
+    return table_states.get(str(treeview), {})
 
-    try:
-        # Execute the sorted query
-        rows = db_manager.execute_query(sorted_query)
 
-        # Clear current data in Treeview
-        for item in treeview.get_children():
-            treeview.delete(item)
+def write_row(treeview, state, row, index="end"):
+    """
+    Inserts or updates one row, using its primary key as the Treeview item id.
+
+    Returns:
+        str: The item id.
+    """
+    item_id = str(row[state["primary_key"]])
+    values = tuple(row.values())
+    row_values = state["row_values"]
+    if not treeview.exists(item_id):
+        treeview.insert("", index, iid=item_id, values=values)
+        row_values[item_id] = values
+    elif row_values.get(item_id) != values:
+        treeview.item(item_id, values=values)
+        row_values[item_id] = values
+    return item_id
+
+
+def reconcile_table(treeview, rows):
+    """
+    Brings a registered Treeview in line with rows by primary-key diff.
+
+    Only rows that were added, changed, moved or removed touch the widget, so
+    selection and scroll position survive and the cost follows the number of
+    changed rows rather than the table size.
+
+    Tabs sorted client-side keep their sort order; rows are otherwise shown
+    in the order given.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        rows (list): Rows as dictionaries, in display order.
+    """
+    state = get_table_state(treeview)
+    primary_key = state["primary_key"]
+    row_values = state["row_values"]
+    top = treeview.yview()[0]
+
+    if state.get("sort_keys") and not state.get("pager"):
+        from core.sorting import sort_rows
+        rows = sort_rows(rows, state["sort_keys"], column_types(state["context"]), lambda row, col: row.get(col))
+
+    wanted = [str(row[primary_key]) for row in rows]
+    wanted_set = set(wanted)
+    stale = [item_id for item_id in treeview.get_children() if item_id not in wanted_set]
+    if stale:
+        treeview.delete(*stale)
+        for item_id in stale:
+            row_values.pop(item_id, None)
+
+    current = list(treeview.get_children())
+    for row in rows:
+        write_row(treeview, state, row)
+
+    # New items were appended in row order, so once the old items are used up
+    # the remaining tail is already correct.
+    move_items(treeview, wanted, current)
+    treeview.yview_moveto(top)
+
+
+def move_items(treeview, wanted, current=None):
+    """
+    Reorders top-level items to match wanted, moving only the items that are out of place.
+
+    Args:
+        treeview (ttk.Treeview): The Treeview to reorder.
+        wanted (list): Item ids in the desired order.
+        current (list, optional): Item ids in their current order. Defaults to the Treeview's children.
 
-        # Populate Treeview with sorted data
+    Returns:
+        int: Number of items moved.
+    """
+    if current is None:
+        current = list(treeview.get_children())
+
+    # Walk the old order once; an item is moved only where it differs
+    placed = set()
+    position = 0
+    moved = 0
+    for index, item_id in enumerate(wanted):
+        while position < len(current) and current[position] in placed:
+            position += 1
+        if position < len(current):
+            if current[position] == item_id:
+                position += 1
+            else:
+                treeview.move(item_id, "", index)
+                moved += 1
+        placed.add(item_id)
+    return moved
+
+
+def column_types(context_name):
+    """ Returns column name -> COLUMN_DEFINITIONS type for a context. """
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    return {col: details.get("type", "string") for col, details in columns.items()}
+
+
+def refresh_rows(treeview, keys):
+    """
+    Re-reads specific rows by primary key and updates only those items.
+
+    Rows that no longer exist are removed; new rows are appended.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        keys (iterable): Primary key values to refresh.
+    """
+    from core.query_builder import generate_fetch_query_parts
+
+    state = get_table_state(treeview)
+    if state.get("virtual"):
+        state["virtual"].refresh([str(key) for key in keys])
+        return
+
+    context_name = state["context"]
+    primary_key = state["primary_key"]
+    columns = COLUMN_DEFINITIONS.get(context_name, {}).get("columns", {})
+    query = generate_fetch_query_parts("Where", context_name, columns, where_conditions={primary_key: None})
+
+    for key in dict.fromkeys(str(key) for key in keys if key not in (None, "")):
+        rows = db_manager.execute_query(query, {primary_key: key})
+        if rows:
+            write_row(treeview, state, rows[0])
+        else:
+            remove_rows(treeview, [key])
+
+
+def remove_rows(treeview, keys):
+    """ Removes the items for the given primary key values, if present. """
+    state = get_table_state(treeview)
+    if state.get("virtual"):
+        state["virtual"].remove(keys)
+        return
+    stale = [str(key) for key in keys if treeview.exists(str(key))]
+    if stale:
+        treeview.delete(*stale)
+        for item_id in stale:
+            state["row_values"].pop(item_id, None)
+
+
+def load_next_page(treeview):
+    """
+    Appends the next page of rows to a paginated Treeview.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with a pager.
+
+    Returns:
+        int: Number of rows appended.
+    """
+    state = get_table_state(treeview)
+    pager = state.get("pager")
+    state["page_pending"] = False
+    if pager is None or pager.exhausted:
+        return 0
+
+    try:
+        rows = pager.next_page()
         for row in rows:
-            treeview.insert("", "end", values=list(row.values()))
+            item_id = write_row(treeview, state, row)
+            # A row added since the last page load may already be shown out of order
+            treeview.move(item_id, "", "end")
+        return len(rows)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to load more rows: {e}")
+        log.warning("Error in load_next_page: %s", e)
+        return 0
+
+
+def attach_paged_loader(treeview, v_scrollbar, threshold=0.9):
+    """
+    Loads the next page whenever the user scrolls near the bottom of the Treeview.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with a pager.
+        v_scrollbar (ttk.Scrollbar): The Treeview's vertical scrollbar.
+        threshold (float): Fraction of the loaded rows scrolled past before loading more.
+    """
+    def on_yscroll(first, last):
+        v_scrollbar.set(first, last)
+        state = get_table_state(treeview)
+        pager = state.get("pager")
+        if (
+            pager and not pager.exhausted and not state["page_pending"] and not state.get("search")
+            and not state.get("load_token") and float(last) >= threshold
+        ):
+            # Defer the insert: yscrollcommand runs while Tk is redrawing the widget
+            state["page_pending"] = True
+            treeview.after_idle(load_next_page, treeview)
+
+    treeview.configure(yscrollcommand=on_yscroll)
+
+
+def sort_paged_table(treeview, column):
+    """
+    Sorts a paginated Treeview by re-seeking from the first page in the new order.
+
+    Clicking the same column again flips the direction; a new column starts ascending.
 
-        # Update the sort direction for the column
-        sort_directions[column] = next_direction
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with a pager.
+        column (str): The column to sort.
+    """
+    pager = get_table_state(treeview)["pager"]
+    if pager.sort_column == column:
+        next_direction = "DESC" if pager.sort_direction == "ASC" else "ASC"
+    else:
+        next_direction = "ASC"
 
+    try:
+        pager.reset(column, next_direction)
+        remove_rows(treeview, treeview.get_children())
+        load_next_page(treeview)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to sort by {column}: {e}")
-        if DEBUG:
-            print(f"Error in sort_table: {e}")
+        log.warning("Error in sort_paged_table: %s", e)
+
+def sort_items(treeview):
+    """
+    Reorders a registered Treeview's items by its sort keys, using the cached row values.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+
+    Returns:
+        int: Number of items moved.
+    """
+    from core.sorting import sort_rows
+
+    state = get_table_state(treeview)
+    positions = {col: index for index, col in enumerate(state["columns"])}
+    row_values = state["row_values"]
+
+    def value_of(item_id, col):
+        values = row_values.get(item_id)
+        return values[positions[col]] if values and col in positions else None
+
+    current = list(treeview.get_children())
+    ordered = sort_rows(current, state["sort_keys"], column_types(state["context"]), value_of)
+    return move_items(treeview, ordered, current)
+
+
+def show_sort_markers(treeview):
+    """ Marks the sorted columns' headings with their direction (and rank, for multi-column sorts). """
+    state = get_table_state(treeview)
+    headings = state["headings"]
+    sort_keys = state.get("sort_keys") or []
+    pager = state.get("pager")
+    if pager:
+        sort_keys = [(pager.sort_column, pager.sort_direction)]
+
+    for col in treeview["columns"]:
+        text = headings.setdefault(col, treeview.heading(col, "text"))
+        for rank, (sort_column, direction) in enumerate(sort_keys, start=1):
+            if sort_column == col:
+                marker = "\u25b2" if direction == "ASC" else "\u25bc"
+                text = f"{text} {marker}{rank if len(sort_keys) > 1 else ''}"
+        treeview.heading(col, text=text)
+
+
+def sort_table(treeview, column, add=False):
+    """
+    Sorts a registered Treeview by a column, alternating ASC/DESC.
+
+    Fully loaded tabs sort the rows they already hold, typed by the column's
+    COLUMN_DEFINITIONS type, and move the existing items into place; nothing
+    is re-queried. Paginated and virtual tabs hold only some rows, so they
+    re-read their order from the database instead.
+
+    Args:
+        treeview (ttk.Treeview): A Treeview registered with register_table.
+        column (str): The column to sort.
+        add (bool): Add the column as a further sort key (Shift+click) instead
+            of sorting by it alone.
+    """
+    from core.sorting import is_sortable, next_sort_keys
+
+    state = get_table_state(treeview)
+    if not state:
+        log.debug("sort_table: %s is not a registered table", treeview)
+        return
+
+    try:
+        if state.get("pager"):
+            sort_paged_table(treeview, column)
+        elif is_sortable(column_types(state["context"]).get(column, "string")):
+            state["sort_keys"] = next_sort_keys(state["sort_keys"], column, add)
+            if state.get("virtual"):
+                state["virtual"].sort()
+            else:
+                sort_items(treeview)
+        show_sort_markers(treeview)
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to sort by {column}: {e}")
+        log.warning("Error in sort_table: %s", e)
+
+
+def bind_sort_headings(treeview):
+    """ Sorts a registered Treeview on heading clicks; Shift+click adds a sort column. """
+    def on_shift_click(event):
+        if treeview.identify_region(event.x, event.y) != "heading":
+            return None
+        column_id = treeview.identify_column(event.x)
+        columns = treeview["columns"]
+        index = int(column_id.lstrip("#") or 0) - 1
+        if 0 <= index < len(columns):
+            sort_table(treeview, columns[index], add=True)
+        return "break"
+
+    for col in treeview["columns"]:
+        treeview.heading(col, command=lambda c=col: sort_table(treeview, c))
+    treeview.bind("<Shift-Button-1>", on_shift_click)
 
 
 def populate_table(treeview, fetch_query): 
     """
     Populates the Treeview with data from the database.
+    Registered tabs load in the background and are reconciled by primary key;
+    paginated tabs re-read as many rows as they had loaded, in the current
+    sort order.
     :param treeview: The Treeview widget.
     :param fetch_query: SQL query to fetch data.
     """
+    state = get_table_state(treeview)
     try:
+        if state.get("search"):
+            # Keep showing the search results, refreshed
+            from ui.search_box import run_search
+            run_search(treeview, state["search"])
+            return
+
+        if state.get("virtual"):
+            state["virtual"].reload()
+            return
+
+        pager = state.get("pager")
+        if pager:
+            loaded = max(pager.loaded, pager.page_size)
+            pager.reset(pager.sort_column, pager.sort_direction)
+            rows = []
+            while not pager.exhausted and len(rows) < loaded:
+                rows.extend(pager.next_page())
+            reconcile_table(treeview, rows)
+            return
+
+        if state:
+            # Registered tabs load on a worker thread and reconcile when done
+            from ui.background_loader import load_table_async
+            if state.get("filters"):
+                from ui.filter_bar import load_filtered
+                load_filtered(treeview)
+                return
+            load_table_async(treeview, fetch_query)
+            return
+
         # Call db_manager's execute_query directly without passing the connection
         rows = db_manager.execute_query(fetch_query)
-       
+
         # Clear existing rows in the Treeview
         for item in treeview.get_children():
             treeview.delete(item)
@@ -74,5 +420,4 @@ def populate_table(treeview, fetch_query):
        
     except Exception as e:
         messagebox.showerror("Error", f"Failed to populate data: {e}")
-        if DEBUG:
-            print(f"Error in populate_table: {e}")
\ No newline at end of file
+        log.warning("Error in populate_table: %s", e)
\ No newline at end of file
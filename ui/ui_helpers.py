@@ -3,6 +3,9 @@ import tkinter as tk
 from tkinter import messagebox, StringVar, Button
 from tkinter import ttk, Frame  # Consolidated imports
 from core.query_builder import query_generator
+from core.log import get_logger
+
+log = get_logger(__name__)
 
 
 def create_buttons_frame(parent_frame, context, add_item, edit_item, clone_item, delete_item, table, build_assy=None):
@@ -28,7 +31,7 @@ def create_buttons_frame(parent_frame, context, add_item, edit_item, clone_item,
     # Fetch queries once for reuse
 
     queries = query_generator(context)
-    print(f"Generated Queries for {context}: {queries}")
+    log.debug("Generated Queries for %s: %s", context, queries)
 
     # Add common buttons
     create_button(parent=button_frame, text=f"Add {context}", 
@@ -55,51 +58,51 @@ def create_buttons_frame(parent_frame, context, add_item, edit_item, clone_item,
 
 # Placeholder function for Add
 def placeholder_add(context, treeview, insert_query, fetch_query, foreign_key_value=None):
-    print(f"Context: {context}, Foreign Key Value: {foreign_key_value}")
+    log.debug("Context: %s, Foreign Key Value: %s", context, foreign_key_value)
     if not foreign_key_value:
         raise ValueError(f"Foreign key value is missing for context: {context}")
-    print(f"Add action triggered for context '{context}'")
+    log.debug("Add action triggered for context '%s'", context)
     # Example: Simulate adding a new row (for UI testing)
     treeview.insert("", "end", values=("New Item", "Placeholder"))
 
 # Placeholder function for Edit
 def placeholder_edit(context, treeview, fetch_query, update_query, columns, foreign_key_value=None):
-    print(f"Context: {context}, Foreign Key Value: {foreign_key_value}")
+    log.debug("Context: %s, Foreign Key Value: %s", context, foreign_key_value)
     if not foreign_key_value:
         raise ValueError(f"Foreign key value is missing for context: {context}")
-    print(f"Edit action triggered for context '{context}'")
+    log.debug("Edit action triggered for context '%s'", context)
     selected_item = treeview.focus()
     if selected_item:
-        print(f"Editing item: {treeview.item(selected_item)['values']}")
+        log.debug("Editing item: %s", treeview.item(selected_item)['values'])
     else:
-        print("No item selected for editing.")
+        log.debug("No item selected for editing.")
 
 # Placeholder function for Clone
 def placeholder_clone(context, treeview, fetch_query, insert_query, columns, foreign_key_value=None):
-    print(f"Context: {context}, Foreign Key Value: {foreign_key_value}")
+    log.debug("Context: %s, Foreign Key Value: %s", context, foreign_key_value)
     if not foreign_key_value:
         raise ValueError(f"Foreign key value is missing for context: {context}")
-    print(f"Clone action triggered for context '{context}'")
+    log.debug("Clone action triggered for context '%s'", context)
     selected_item = treeview.focus()
     if selected_item:
-        print(f"Cloning item: {treeview.item(selected_item)['values']}")
+        log.debug("Cloning item: %s", treeview.item(selected_item)['values'])
         treeview.insert("", "end", values=treeview.item(selected_item)['values'])
     else:
-        print("No item selected for cloning.")
+        log.debug("No item selected for cloning.")
 
 # Placeholder function for Delete
 def placeholder_delete(context, treeview, fetch_query, delete_query, foreign_key_value=None):
-    print(f"Delete action triggered for context '{context}'")
+    log.debug("Delete action triggered for context '%s'", context)
     selected_item = treeview.focus()
     if selected_item:
-        print(f"Deleting item: {treeview.item(selected_item)['values']}")
+        log.debug("Deleting item: %s", treeview.item(selected_item)['values'])
         treeview.delete(selected_item)
     else:
-        print("No item selected for deletion.")
+        log.debug("No item selected for deletion.")
 
 # Placeholder function for Build (specific to Assemblies)
 def placeholder_build(assembly_id):
-    print(f"Build action triggered for assembly ID '{assembly_id}'")
+    log.debug("Build action triggered for assembly ID '%s'", assembly_id)
 
 def center_window_vertically(window, width, height):
     """
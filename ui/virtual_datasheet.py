@@ -0,0 +1,265 @@
+from tkinter import messagebox, ttk
+
+from config.config_data import VIRTUAL_OVERSCAN
+from core.background import background_executor
+from core.database_transactions import db_manager
+from ui.background_loader import get_dispatcher, show_progress
+from ui.shared_utils import get_table_state, move_items
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+# Rows scrolled per mouse wheel notch
+WHEEL_ROWS = 3
+
+
+class VirtualDatasheet:
+    """
+    Shows a RowSource in a ttk.Treeview that only holds the visible rows.
+
+    The Treeview keeps the rows in view plus `overscan` rows above and below
+    as real items (with the primary key as item id, as in other datasheets),
+    so memory and redraw cost follow the viewport height instead of the table
+    size. The vertical scrollbar maps to row positions in the source, and
+    scrolling swaps items in and out. Heading clicks, <<TreeviewSelect>>
+    bindings and treeview.selection() keep working; the selected row is
+    remembered while it is scrolled out of view.
+    """
+
+    def __init__(self, treeview, scrollbar, source, overscan=VIRTUAL_OVERSCAN):
+        self.treeview = treeview
+        self.scrollbar = scrollbar
+        self.source = source
+        self.overscan = overscan
+        self.top = 0  # Source position of the first visible row
+        self.visible = max(int(treeview.cget("height")), 1)
+        self.selected_key = None
+        self.values = {}  # Values last written to each item
+        self.load_token = None
+        self.render_pending = False
+
+        # The Treeview only scrolls within the window of items; the scrollbar drives the source
+        treeview.configure(yscrollcommand=lambda first, last: None)
+        scrollbar.configure(command=self.yview)
+        treeview.bind("<Configure>", self.on_resize, add="+")
+        treeview.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        treeview.bind("<MouseWheel>", self.on_wheel)
+        treeview.bind("<Button-4>", lambda event: self.scroll_by(-WHEEL_ROWS))
+        treeview.bind("<Button-5>", lambda event: self.scroll_by(WHEEL_ROWS))
+        treeview.bind("<Up>", lambda event: self.move_selection(-1))
+        treeview.bind("<Down>", lambda event: self.move_selection(1))
+        treeview.bind("<Prior>", lambda event: self.move_selection(-self.visible))
+        treeview.bind("<Next>", lambda event: self.move_selection(self.visible))
+        treeview.bind("<Home>", lambda event: self.move_selection(-len(self.source)))
+        treeview.bind("<End>", lambda event: self.move_selection(len(self.source)))
+
+    # Rendering
+
+    def render(self):
+        """ Makes the Treeview items match the rows around self.top and updates the scrollbar. """
+        self.render_pending = False
+        total = len(self.source)
+        self.top = max(0, min(self.top, total - self.visible))
+        start = max(0, self.top - self.overscan)
+        stop = min(total, self.top + self.visible + self.overscan)
+        rows = self.source.rows(start, stop)
+        primary_key = self.source.primary_key
+
+        treeview = self.treeview
+        wanted = [str(row[primary_key]) for row in rows]
+        wanted_set = set(wanted)
+        stale = [item_id for item_id in treeview.get_children() if item_id not in wanted_set]
+        if stale:
+            treeview.delete(*stale)
+            for item_id in stale:
+                self.values.pop(item_id, None)
+
+        current = list(treeview.get_children())
+        for item_id, row in zip(wanted, rows):
+            values = tuple(row.values())
+            if not treeview.exists(item_id):
+                treeview.insert("", "end", iid=item_id, values=values)
+            elif self.values.get(item_id) != values:
+                treeview.item(item_id, values=values)
+            self.values[item_id] = values
+        move_items(treeview, wanted, current)
+
+        selected = str(self.selected_key) if self.selected_key is not None else None
+        if selected and selected in wanted_set and selected not in treeview.selection():
+            treeview.selection_set(selected)
+
+        if wanted:
+            treeview.yview_moveto((self.top - start) / len(wanted))
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def schedule_render(self):
+        """ Renders once the pending events are handled, coalescing rapid scrolls. """
+        if not self.render_pending:
+            self.render_pending = True
+            self.treeview.after_idle(self.render)
+
+    # Scrolling and selection
+
+    def scroll_to(self, position):
+        self.top = max(0, min(int(position), len(self.source) - self.visible))
+        self.schedule_render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def yview(self, *args):
+        """ Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" | "pages"). """
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.source))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll_by(int(args[1]) * step)
+
+    def on_wheel(self, event):
+        return self.scroll_by(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+
+    def on_resize(self, event=None):
+        children = self.treeview.get_children()
+        bbox = self.treeview.bbox(children[0]) if children else None
+        if not bbox:
+            return
+        # bbox's y is the heading height and its height the row height
+        visible = max(1, (self.treeview.winfo_height() - bbox[1]) // max(bbox[3], 1))
+        if visible != self.visible:
+            self.visible = visible
+            self.schedule_render()
+
+    def on_select(self, event=None):
+        selection = self.treeview.selection()
+        if selection:
+            self.selected_key = selection[0]
+
+    def move_selection(self, rows):
+        """ Moves the selection by rows, scrolling to keep it in view. """
+        total = len(self.source)
+        if not total:
+            return "break"
+        position = self.source.index_of(self.selected_key) if self.selected_key is not None else None
+        position = 0 if position is None else max(0, min(position + rows, total - 1))
+        self.selected_key = str(self.source.keys[position])
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + self.visible:
+            self.top = position - self.visible + 1
+        self.render()
+        if self.treeview.exists(self.selected_key):
+            self.treeview.focus(self.selected_key)
+        return "break"
+
+    # Loading
+
+    def _load(self, fetch, apply):
+        """
+        Runs fetch(token) on a background worker and apply(result) on the main thread.
+
+        A newer load for the same Treeview cancels this one.
+        """
+        treeview = self.treeview
+        state = get_table_state(treeview)
+        dispatcher = get_dispatcher(treeview)
+
+        def on_finish(result, token, error):
+            if self.load_token is not token:
+                return  # Superseded by a newer load
+            self.load_token = None
+            if token.cancelled or result is None and not error:
+                # Cancelled by a tab switch: reload when the tab is shown again
+                state["stale"] = True
+                show_progress(treeview, False, "")
+                return
+            if error:
+                show_progress(treeview, False, "")
+                messagebox.showerror("Error", f"Failed to populate data: {error}")
+                return
+            apply(result)
+            state["stale"] = False
+            self.render()
+            show_progress(treeview, False, f"{len(self.source)} rows")
+
+        def job(token):
+            try:
+                dispatcher.post(on_finish, fetch(token), token, None)
+            except Exception as e:
+                dispatcher.post(on_finish, None, token, e)
+                log.warning("Error loading virtual datasheet %s: %s", treeview, e)
+            finally:
+                dispatcher.job_finished()
+
+        dispatcher.job_started()
+        show_progress(treeview, True, "Loading...")
+        future, self.load_token = background_executor.submit(job, key=str(treeview))
+
+    def reload(self):
+        """
+        Re-reads the display order for the tab's filters and sort keys, keeping the scroll position.
+
+        Raises:
+            ValueError: If the tab's filters cannot be applied.
+        """
+        from core.filters import parse_filters
+
+        state = get_table_state(self.treeview)
+        where_conditions, params = parse_filters(state["context"], state.get("filters") or {})
+        sort_keys = state.get("sort_keys") or []
+
+        def apply(keys):
+            self.source.invalidate()
+            self.source.set_keys(keys)
+
+        if db_manager.has_uncommitted_writes():
+            # Pooled readers cannot see the open transaction
+            background_executor.cancel(str(self.treeview))
+            self.load_token = None
+            apply(self.source.load_keys(where_conditions, params, sort_keys, through_writer=True))
+            state["stale"] = False
+            self.render()
+            return
+        self._load(lambda token: self.source.load_keys(where_conditions, params, sort_keys, token), apply)
+
+    def load_rows(self, query, params=None):
+        """ Shows the rows of a SELECT (e.g. search results) instead of the whole table. """
+        from core.background import stream_query
+
+        def fetch(token):
+            rows = []
+            for chunk in stream_query(query, params, 500, token):
+                rows.extend(chunk)
+            return None if token.cancelled else rows
+
+        self.top = 0
+        self._load(fetch, self.source.set_rows)
+
+    def sort(self):
+        """ Applies the tab's sort keys: in memory for loaded result sets, otherwise by reloading the keys. """
+        from ui.shared_utils import column_types
+
+        state = get_table_state(self.treeview)
+        if state.get("search") and self.source.sort_cached(state["sort_keys"], column_types(state["context"])):
+            self.render()
+        else:
+            self.reload()
+
+    def refresh(self, keys):
+        """ Re-reads the given rows; a key not shown yet (a new row) reloads the display order. """
+        keys = [key for key in keys if key not in (None, "")]
+        self.source.invalidate(keys)
+        if any(self.source.index_of(key) is None for key in keys):
+            self.reload()
+        else:
+            self.render()
+
+    def remove(self, keys):
+        """ Drops deleted rows from the display. """
+        self.source.remove(keys)
+        self.render()
@@ -0,0 +1,87 @@
+from tkinter import ttk
+
+from core.background import background_executor
+from ui.background_loader import get_dispatcher
+from core.log import get_logger
+
+log = get_logger(__name__)
+
+WHERE_USED_COLUMNS = {
+    "AssemblyID": {"display_name": "Assembly ID", "width": 90},
+    "AssemName": {"display_name": "Assembly", "width": 240},
+    "Level": {"display_name": "Level", "width": 60},
+    "Quantity": {"display_name": "Total Qty", "width": 80},
+    "TopLevel": {"display_name": "Top Level", "width": 80},
+}
+
+
+def create_where_used_panel(parent, parts_treeview):
+    """
+    Adds a "Where Used" panel that follows the selection in the Parts Treeview.
+
+    Selecting a part looks up every assembly using it, up to the top level,
+    on a background worker; the panel fills when the answer arrives.
+    Selecting another part first cancels the pending lookup.
+
+    Args:
+        parent (tk.Widget): Container to pack the panel into (the Parts tab).
+        parts_treeview (ttk.Treeview): The Parts datasheet, whose item ids are PartIDs.
+
+    Returns:
+        ttk.Treeview: The panel's Treeview.
+    """
+    from domain.where_used import get_where_used_index
+
+    frame = ttk.LabelFrame(parent, text="Where Used")
+    frame.pack(fill="x", padx=10)
+    panel = ttk.Treeview(frame, columns=list(WHERE_USED_COLUMNS), show="headings", height=6, selectmode="none")
+    for col, details in WHERE_USED_COLUMNS.items():
+        panel.heading(col, text=details["display_name"])
+        panel.column(col, width=details["width"], anchor="w", stretch=False)
+    panel.pack(side="left", fill="x", expand=True)
+    status = ttk.Label(frame, text="Select a part to see where it is used.")
+    status.pack(side="left", padx=10)
+
+    index = get_where_used_index()
+    dispatcher = get_dispatcher(parent)
+    job_key = f"{panel}.where_used"
+
+    def show(part_id, rows, token, error):
+        if token.cancelled:
+            return
+        panel.delete(*panel.get_children())
+        if error:
+            status.configure(text=f"Lookup failed: {error}")
+            return
+        for row in rows:
+            panel.insert("", "end", values=(
+                row["AssemblyID"], row["AssemName"], row["Level"], f"{row['Quantity']:g}", "Yes" if row["TopLevel"] else ""
+            ))
+        total = sum(row["Quantity"] for row in rows if row["TopLevel"])
+        status.configure(text=f"Part {part_id}: {len(rows)} assemblies, {total:g} at top level" if rows else f"Part {part_id} is not used in any assembly.")
+
+    def lookup(part_id, token):
+        rows, error = [], None
+        try:
+            rows = index.part_where_used(part_id)
+        except Exception as e:
+            error = e
+            log.warning("Error looking up where part %s is used: %s", part_id, e)
+        finally:
+            dispatcher.post(show, part_id, rows, token, error)
+            dispatcher.job_finished()
+
+    def on_select(event=None):
+        selection = parts_treeview.selection()
+        if not selection:
+            return
+        try:
+            part_id = int(selection[0])
+        except ValueError:
+            return
+        status.configure(text=f"Looking up part {part_id}...")
+        dispatcher.job_started()
+        background_executor.submit(lookup, part_id, key=job_key)
+
+    parts_treeview.bind("<<TreeviewSelect>>", on_select, add="+")
+    return panel